@@ -7,6 +7,88 @@ load_dotenv(".env")
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Режим получения апдейтов: polling (по умолчанию) или webhook.
+# worker — внутренний режим шарда, который запускает supervisor.py
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+# Публичный https-адрес (балансировщик), на который Telegram шлёт апдейты
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL")
+# Путь вебхука на aiohttp-сервере health/metrics
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+# Секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+
+# Исполнитель апдейтов: порядок внутри чата, параллельно между чатами
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", 32))
+# Сколько апдейтов может ждать в очереди, прежде чем начнём их отбрасывать
+UPDATE_QUEUE_LIMIT = int(os.getenv("UPDATE_QUEUE_LIMIT", 1000))
+
+# Мультипроцессный режим (supervisor.py): число воркеров и их порты
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", os.cpu_count() or 1))
+WORKER_BASE_PORT = int(os.getenv("WORKER_BASE_PORT", 8100))
+# Номер шарда текущего процесса (выставляет supervisor.py)
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", 0))
+
+# Реплика для read-only хэндлеров (REPLICA_DATABASE_URL читает database.py):
+# при отставании больше REPLICA_MAX_LAG_SEC чтения уходят в primary
+REPLICA_MAX_LAG_SEC = float(os.getenv("REPLICA_MAX_LAG_SEC", 5))
+REPLICA_LAG_CHECK_INTERVAL_SEC = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL_SEC", 5))
+
+# Кэш principal (user + company) по tg_id: время жизни записи и размер LRU
+PRINCIPAL_CACHE_TTL_SEC = float(os.getenv("PRINCIPAL_CACHE_TTL_SEC", 60))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+# Кэш статуса подписки по company_id (запись живёт не дольше expires_at trial/подписки)
+SUBSCRIPTION_STATUS_CACHE_TTL_SEC = float(
+    os.getenv("SUBSCRIPTION_STATUS_CACHE_TTL_SEC", 300)
+)
+SUBSCRIPTION_STATUS_CACHE_SIZE = int(os.getenv("SUBSCRIPTION_STATUS_CACHE_SIZE", 10000))
+
+# Размер страницы /my_tasks
+TASKS_PAGE_SIZE = int(os.getenv("TASKS_PAGE_SIZE", 10))
+
+# Кнопок на страницу в пикерах проектов/задач (/upload)
+PICKER_PAGE_SIZE = int(os.getenv("PICKER_PAGE_SIZE", 8))
+
+# Общий таймаут скачивания файла из Telegram при потоковой загрузке в S3 (/upload)
+TELEGRAM_DOWNLOAD_TIMEOUT_SEC = int(os.getenv("TELEGRAM_DOWNLOAD_TIMEOUT_SEC", 120))
+# Сколько ждать, прежде чем удалить объект загрузки, чья транзакция не закоммитилась
+# (резерв в storage_deletions; должно с запасом покрывать загрузку и хэндлер)
+UPLOAD_PENDING_GRACE_SEC = int(os.getenv("UPLOAD_PENDING_GRACE_SEC", 3600))
+
+# Один и тот же SQL столько раз за апдейт — считаем N+1 (метрика + warning в лог)
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", 5))
+
+# Мягкое удаление: сколько дней хранить удалённые задачи/проекты до физического
+# удаления, размер пачки purge (строк на транзакцию) и пауза между пачками
+SOFT_DELETE_RETENTION_DAYS = int(os.getenv("SOFT_DELETE_RETENTION_DAYS", 30))
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", 500))
+PURGE_BATCH_PAUSE_SEC = float(os.getenv("PURGE_BATCH_PAUSE_SEC", 0.2))
+PURGE_INTERVAL_MIN = int(os.getenv("PURGE_INTERVAL_MIN", 60))
+
+# Превью картинок (services.previews): процессов в пуле, стороны превью и миниатюры
+# в пикселях, максимальный размер оригинала, для которого они делаются
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", 2))
+PREVIEW_MAX_SIDE = int(os.getenv("PREVIEW_MAX_SIDE", 1280))
+THUMBNAIL_MAX_SIDE = int(os.getenv("THUMBNAIL_MAX_SIDE", 320))
+PREVIEW_MAX_SOURCE_BYTES = int(os.getenv("PREVIEW_MAX_SOURCE_BYTES", 30 * 1024 * 1024))
+# Добор пропущенных превью в worker.py: период (мин), blob на пачку, сколько
+# попыток на blob, прежде чем сдаться (битые картинки), и сколько ждать после
+# загрузки, пока превью делает сам бот (сек)
+PREVIEW_SWEEP_INTERVAL_MIN = int(os.getenv("PREVIEW_SWEEP_INTERVAL_MIN", 30))
+PREVIEW_SWEEP_BATCH_SIZE = int(os.getenv("PREVIEW_SWEEP_BATCH_SIZE", 50))
+PREVIEW_MAX_ATTEMPTS = int(os.getenv("PREVIEW_MAX_ATTEMPTS", 3))
+PREVIEW_SWEEP_GRACE_SEC = int(os.getenv("PREVIEW_SWEEP_GRACE_SEC", 600))
+
+# Архивация старых файлов (services.archive, scripts/compress_and_archive.py):
+# возраст в днях, класс хранения архива (пусто — не менять, например для MinIO),
+# объектов одновременно, blob на транзакцию и файл точки продолжения
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 30))
+ARCHIVE_STORAGE_CLASS = os.getenv("ARCHIVE_STORAGE_CLASS", "STANDARD_IA")
+ARCHIVE_CONCURRENCY = int(os.getenv("ARCHIVE_CONCURRENCY", 8))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 200))
+ARCHIVE_CHECKPOINT_PATH = os.getenv(
+    "ARCHIVE_CHECKPOINT_PATH", ".archive_checkpoint.json"
+)
+
 
 # Переменные для S3 / MinIO
 S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID")
@@ -28,3 +110,6 @@ DISABLE_ON_EXPIRE = True
 GLOBAL_ADMIN_TG_IDS = []  # например: [123456789]
 # Периодичность проверки уведомлений (если используешь APScheduler/cron)
 NOTIFY_CHECK_INTERVAL_MIN = 30
+# Как часто каждый процесс бота сверяет каталог тарифов с БД (сек): правки
+# и /admin_reload_plans в одном шарде/реплике доходят до остальных за это время
+PLAN_CATALOG_REFRESH_SEC = int(os.getenv("PLAN_CATALOG_REFRESH_SEC", 300))
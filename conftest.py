@@ -125,6 +125,9 @@ def db_session():
     session = Session()
 
     Base.metadata.drop_all(bind=sync_engine)
+    with sync_engine.begin() as conn:
+        # нужен для trigram-индексов моделей
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     Base.metadata.create_all(bind=sync_engine)
 
     try:
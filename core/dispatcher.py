@@ -0,0 +1,97 @@
+# saas_bot/core/dispatcher.py
+from aiogram import Dispatcher
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio.session import async_sessionmaker
+
+from config import UPDATE_WORKERS, UPDATE_QUEUE_LIMIT
+from core.update_executor import ChatPartitionedExecutor
+from core.replica import replica_router
+
+# routers
+from handlers.start import router as start_router
+from handlers.help import router as help_router
+from handlers.company import router as company_router
+from handlers.invite import router as invite_router
+from handlers.projects import router as projects_router
+from handlers.tasks import router as tasks_router
+from handlers.reassign import router as reassign_router
+from handlers.status import router as status_router
+from handlers.reports import router as reports_router
+from handlers.user import router as user_router
+from handlers.file_upload import router as file_upload_router
+from handlers.files import router as files_router
+from handlers.important_stuff import router as important_router
+from handlers import admin_billing
+from handlers import admin
+from handlers import payments
+from handlers import example_handler
+
+# middlewares
+from middlewares.context_middleware import ContextMiddleware
+from middlewares.db_middleware import DbSessionMiddleware
+from middlewares.role_checker import RoleCheckerMiddleware
+from middlewares.company_middleware import CompanyMiddleware
+from middlewares.subscription_checker import SubscriptionCheckerMiddleware
+from middlewares.audit_middleware import AuditMiddleware
+from middlewares.metrics_middleware import MetricsMiddleware
+from middlewares.executor_middleware import UpdateExecutorMiddleware
+
+
+def build_dispatcher(session_pool: async_sessionmaker[AsyncSession]) -> Dispatcher:
+    """
+    Собирает Dispatcher со всей цепочкой middleware и роутерами.
+    Используется и для polling, и для webhook-режима (а также в бенчмарках).
+    """
+    dp = Dispatcher()
+
+    # исполнитель: по порядку внутри чата, параллельно между чатами (после FSM)
+    executor = ChatPartitionedExecutor(
+        max_workers=UPDATE_WORKERS, max_pending=UPDATE_QUEUE_LIMIT
+    )
+    dp.update.outer_middleware(UpdateExecutorMiddleware(executor))
+    # main.py дожидается остановки партиций при завершении
+    dp["update_executor"] = executor
+
+    # порядок middleware критичен
+    dp.message.middleware(DbSessionMiddleware(session_pool, replica_router))
+    dp.callback_query.middleware(DbSessionMiddleware(session_pool, replica_router))
+
+    dp.message.middleware(RoleCheckerMiddleware())
+    dp.callback_query.middleware(RoleCheckerMiddleware())
+
+    dp.message.middleware(CompanyMiddleware())
+    dp.callback_query.middleware(CompanyMiddleware())
+
+    dp.message.middleware(SubscriptionCheckerMiddleware())
+    dp.callback_query.middleware(SubscriptionCheckerMiddleware())
+
+    dp.message.middleware(AuditMiddleware())
+    dp.callback_query.middleware(AuditMiddleware())
+
+    dp.update.middleware(ContextMiddleware())
+
+    dp.message.middleware(MetricsMiddleware())
+    dp.callback_query.middleware(MetricsMiddleware())
+
+    # routers
+    dp.include_router(start_router)
+    dp.include_router(help_router)
+    dp.include_router(company_router)
+    dp.include_router(invite_router)
+    dp.include_router(projects_router)
+    dp.include_router(tasks_router)
+    dp.include_router(reassign_router)
+    dp.include_router(status_router)
+    dp.include_router(reports_router)
+    dp.include_router(user_router)
+    dp.include_router(file_upload_router)
+    dp.include_router(files_router)
+    dp.include_router(important_router)
+    dp.include_router(admin_billing.router)
+    dp.include_router(payments.router)
+    dp.include_router(admin.router)
+
+    # Пример логирования (тестовый хэндлер)
+    dp.include_router(example_handler.router)
+
+    return dp
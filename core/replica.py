@@ -0,0 +1,115 @@
+# saas_bot/core/replica.py
+import asyncio
+import time
+
+import structlog
+from prometheus_client import Counter, Gauge
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from config import REPLICA_MAX_LAG_SEC, REPLICA_LAG_CHECK_INTERVAL_SEC
+from database import replica_engine, replica_session_maker
+from metrics.registry import registry
+
+logger = structlog.get_logger(__name__)
+
+DB_REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of the read replica (-1 = unknown)",
+    registry=registry,
+)
+DB_REPLICA_USABLE = Gauge(
+    "db_replica_usable",
+    "1 if read-only handlers are routed to the replica",
+    registry=registry,
+)
+DB_READ_ROUTED = Counter(
+    "db_read_sessions_total",
+    "Read-only handler sessions by target database",
+    ["target"],  # replica | primary
+    registry=registry,
+)
+
+# 0, если реплика догнала primary; иначе — возраст последней применённой транзакции
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """)
+
+
+class ReplicaRouter:
+    """
+    Выбирает базу для read-only хэндлеров: реплика, пока её отставание
+    (проверяется фоном) не превышает max_lag, иначе — primary.
+    Если реплика не настроена или отставание неизвестно — всегда primary.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine | None,
+        session_pool: async_sessionmaker[AsyncSession] | None,
+        max_lag: float = REPLICA_MAX_LAG_SEC,
+    ):
+        self.engine = engine
+        self.session_pool = session_pool
+        self.max_lag = max_lag
+        self.lag: float | None = None
+        self.checked_at = 0.0
+        DB_REPLICA_LAG.set(-1)
+        DB_REPLICA_USABLE.set(0)
+
+    @property
+    def enabled(self) -> bool:
+        return self.session_pool is not None
+
+    @property
+    def usable(self) -> bool:
+        if not self.enabled or self.lag is None:
+            return False
+        # устаревшая проверка (монитор завис) — не доверяем
+        stale_after = max(3 * REPLICA_LAG_CHECK_INTERVAL_SEC, self.max_lag)
+        if time.monotonic() - self.checked_at > stale_after:
+            return False
+        return self.lag <= self.max_lag
+
+    def read_pool(self) -> async_sessionmaker[AsyncSession] | None:
+        """sessionmaker реплики или None, если читать нужно из primary."""
+        if self.usable:
+            DB_READ_ROUTED.labels(target="replica").inc()
+            return self.session_pool
+        DB_READ_ROUTED.labels(target="primary").inc()
+        return None
+
+    async def check(self) -> float | None:
+        try:
+            async with self.engine.connect() as conn:
+                lag = float((await conn.execute(LAG_SQL)).scalar() or 0)
+        except Exception as e:
+            logger.warning("replica lag check failed", error=str(e))
+            self.lag = None
+        else:
+            self.lag = lag
+            self.checked_at = time.monotonic()
+
+        DB_REPLICA_LAG.set(-1 if self.lag is None else self.lag)
+        DB_REPLICA_USABLE.set(1 if self.usable else 0)
+        return self.lag
+
+    async def run(self, interval: float = REPLICA_LAG_CHECK_INTERVAL_SEC):
+        """Фоновая проверка отставания реплики."""
+        logger.info("replica lag monitor started", max_lag=self.max_lag)
+        was_usable = None
+        while True:
+            await self.check()
+            if self.usable != was_usable:
+                was_usable = self.usable
+                logger.info("replica routing changed", usable=was_usable, lag=self.lag)
+            await asyncio.sleep(interval)
+
+
+replica_router = ReplicaRouter(replica_engine, replica_session_maker)
@@ -0,0 +1,41 @@
+# saas_bot/core/startup.py
+import os
+import time
+
+import structlog
+from prometheus_client import Gauge
+
+from metrics.registry import registry
+
+logger = structlog.get_logger(__name__)
+
+# запасная точка отсчёта, если /proc недоступен (не Linux)
+_IMPORTED_AT = time.monotonic()
+
+STARTUP_SECONDS = Gauge(
+    "bot_startup_seconds",
+    "Seconds from process start to the end of a startup phase",
+    ["phase"],  # imports | db | ready
+    registry=registry,
+)
+
+
+def process_uptime() -> float:
+    """Сколько секунд назад запущен процесс (по /proc, иначе — от импорта модуля)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # поля после "(comm)"; starttime — 22-е поле, т.е. 20-е после comm
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+
+def record_startup_phase(phase: str) -> float:
+    """Фиксирует окончание фазы старта в метрике и логе."""
+    seconds = process_uptime()
+    STARTUP_SECONDS.labels(phase=phase).set(seconds)
+    logger.info("startup phase done", phase=phase, seconds=round(seconds, 3))
+    return seconds
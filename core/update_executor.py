@@ -0,0 +1,129 @@
+# saas_bot/core/update_executor.py
+import asyncio
+import contextvars
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge, Histogram
+
+from metrics.registry import registry
+
+logger = structlog.get_logger(__name__)
+
+UPDATE_QUEUE_DEPTH = Gauge(
+    "update_queue_depth",
+    "Updates accepted by the executor and not finished yet",
+    registry=registry,
+)
+UPDATE_ACTIVE_PARTITIONS = Gauge(
+    "update_active_partitions",
+    "Chats that have pending or running updates",
+    registry=registry,
+)
+UPDATE_PARTITION_LAG = Histogram(
+    "update_partition_lag_seconds",
+    "Time an update waits in its chat partition before the handler starts",
+    registry=registry,
+)
+UPDATE_SHED_TOTAL = Counter(
+    "update_shed_total",
+    "Updates dropped because the executor queue is full",
+    registry=registry,
+)
+
+Job = Callable[[], Awaitable[Any]]
+_Item = Tuple[Job, asyncio.Future, float, contextvars.Context]
+
+
+class ChatPartitionedExecutor:
+    """
+    Исполнитель апдейтов, разбитых на партиции по ключу (chat_id).
+
+    - внутри одной партиции апдейты выполняются строго по порядку поступления;
+    - разные партиции выполняются параллельно, но не больше max_workers сразу;
+    - если в работе уже max_pending апдейтов, новые отбрасываются (shed load).
+    """
+
+    def __init__(self, max_workers: int = 32, max_pending: int = 1000):
+        if max_workers < 1:
+            raise ValueError("max_workers должен быть >= 1")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._slots = asyncio.Semaphore(max_workers)
+        self._partitions: Dict[Hashable, Deque[_Item]] = {}
+        self._drainers: set[asyncio.Task] = set()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Сколько апдейтов принято и ещё не завершено."""
+        return self._pending
+
+    @property
+    def active_partitions(self) -> int:
+        return len(self._partitions)
+
+    def submit(self, key: Hashable, job: Job) -> Optional[asyncio.Future]:
+        """
+        Ставит job в партицию key. Возвращает future с результатом
+        или None, если апдейт отброшен из-за переполнения.
+        """
+        if self._pending >= self.max_pending:
+            UPDATE_SHED_TOTAL.inc()
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        # job выполняется в контексте отправителя (contextvars апдейта)
+        item = (job, future, time.monotonic(), contextvars.copy_context())
+        self._pending += 1
+        UPDATE_QUEUE_DEPTH.set(self._pending)
+
+        queue = self._partitions.get(key)
+        if queue is not None:
+            queue.append(item)
+            return future
+
+        # новая партиция — заводим для неё отдельный «разборщик»
+        queue = self._partitions[key] = deque([item])
+        UPDATE_ACTIVE_PARTITIONS.set(len(self._partitions))
+        task = asyncio.create_task(self._drain(key, queue))
+        self._drainers.add(task)
+        task.add_done_callback(self._drainers.discard)
+        return future
+
+    async def _drain(self, key: Hashable, queue: Deque[_Item]) -> None:
+        try:
+            while queue:
+                job, future, enqueued_at, ctx = queue[0]
+                async with self._slots:
+                    UPDATE_PARTITION_LAG.observe(time.monotonic() - enqueued_at)
+                    try:
+                        result = await asyncio.create_task(job(), context=ctx)
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+                queue.popleft()
+                self._pending -= 1
+                UPDATE_QUEUE_DEPTH.set(self._pending)
+        except asyncio.CancelledError:
+            # остановка приложения: снимаем всё, что не успели выполнить
+            for _, future, _, _ in queue:
+                future.cancel()
+            self._pending -= len(queue)
+            UPDATE_QUEUE_DEPTH.set(self._pending)
+            raise
+        finally:
+            self._partitions.pop(key, None)
+            UPDATE_ACTIVE_PARTITIONS.set(len(self._partitions))
+
+    async def shutdown(self) -> None:
+        """Отменяет все партиции и дожидается их остановки."""
+        for task in list(self._drainers):
+            task.cancel()
+        if self._drainers:
+            await asyncio.gather(*self._drainers, return_exceptions=True)
@@ -1,7 +1,16 @@
 import os
-from sqlalchemy import event
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from models.base import Base
+from sqlalchemy import event, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
+from sqlalchemy.orm import with_loader_criteria
+from metrics.db_pool import InstrumentedQueuePool, instrument_pool
+from models.base import Base, SoftDeleteMixin
 
 # Читаем атомарные ENV (с дефолтами для локала)
 POSTGRES_USER = os.getenv("POSTGRES_USER", "saasuser")
@@ -17,17 +26,122 @@ DATABASE_URL = (
     or f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 )
 
+# Пул соединений (дефолты SQLAlchemy: 5 + 10 overflow, без pre-ping и recycle)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# кэш prepared statements asyncpg на соединение; 0 — для pgbouncer в transaction mode
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+
+
+def engine_url(url: str) -> URL:
+    """URL с настройками драйвера (кэш prepared statements для asyncpg)."""
+    url = make_url(url)
+    if url.drivername.endswith("+asyncpg"):
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)}
+        )
+    return url
+
+
+def create_engine_from_env(url: str, name: str = "primary") -> AsyncEngine:
+    """Async engine с пулом из ENV и метриками пула (метка pool=name)."""
+    engine = create_async_engine(
+        engine_url(url),
+        echo=False,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_logging_name=name,
+    )
+    instrument_pool(engine)
+    return engine
+
+
 # Async engine + sessionmaker
-async_engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+async_engine = create_engine_from_env(DATABASE_URL)
 async_session_maker = async_sessionmaker(
     bind=async_engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
+# Реплика для чтения (необязательно). Без REPLICA_DATABASE_URL все чтения идут в primary.
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+replica_engine = (
+    create_engine_from_env(REPLICA_DATABASE_URL, "replica")
+    if REPLICA_DATABASE_URL
+    else None
+)
+replica_session_maker = (
+    async_sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        info={"replica": True},
+    )
+    if replica_engine is not None
+    else None
+)
+
+
+# Подготовка схемы при старте:
+#   create_all — Base.metadata.create_all (рефлексия всех таблиц, удобно локально);
+#   check      — один SELECT из alembic_version и сверка с head миграций, fail fast.
+DB_STARTUP_MODE = os.getenv("DB_STARTUP_MODE", "create_all")
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class SchemaVersionMismatch(RuntimeError):
+    """Ревизия БД не совпадает с head миграций в коде."""
+
+
+def alembic_heads() -> set[str]:
+    """Head-ревизии из migrations/versions (без обращения к БД)."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    cfg = Config(os.path.join(PROJECT_DIR, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(PROJECT_DIR, "migrations"))
+    return set(ScriptDirectory.from_config(cfg).get_heads())
+
+
+async def check_schema_version() -> set[str]:
+    """Сверяет alembic_version с head миграций одним запросом."""
+    heads = alembic_heads()
+    try:
+        async with async_engine.connect() as conn:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            current = set(result.scalars())
+    except ProgrammingError:
+        # таблицы alembic_version нет — миграции не применялись
+        current = set()
+
+    if current != heads:
+        raise SchemaVersionMismatch(
+            f"Схема БД {sorted(current) or 'не инициализирована'}, "
+            f"код ожидает {sorted(heads)}. Выполните `alembic upgrade head`."
+        )
+    return current
+
+
 async def init_db():
-    """Создание всех таблиц (без сидирования тарифов)."""
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """
+    Подготовка БД при старте (без сидирования тарифов):
+    проверка ревизии (DB_STARTUP_MODE=check) или создание всех таблиц.
+    """
+    if DB_STARTUP_MODE == "check":
+        await check_schema_version()
+    else:
+        async with async_engine.begin() as conn:
+            # trigram-индексы (ix_*_trgm) требуют расширения
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await conn.run_sync(Base.metadata.create_all)
     return async_session_maker
 
 
@@ -44,4 +158,69 @@ def set_audit_fields(session, flush_context, instances):
             obj.updated_by = actor_id
 
 
+# Ленивая сессия: всё, что нужно транзакции, делаем на её старте
+def mark_session_used(session, transaction, connection):
+    """
+    Срабатывает, когда сессия реально взяла соединение из пула.
+    Отмечает сессию как использованную (для метрик DbSessionMiddleware)
+    и выставляет app.company_id для RLS в каждой новой транзакции —
+    в том числе после commit посреди апдейта.
+    """
+    session.info["db_used"] = True
+    cid = session.info.get("company_id")
+    if cid is not None:
+        connection.execute(
+            text("SELECT set_config('app.company_id', :cid, true)"),
+            {"cid": str(cid)},
+        )
+
+
+# Мягкое удаление: по умолчанию ORM не видит строки с deleted_at
+def filter_soft_deleted(execute_state):
+    """
+    Добавляет deleted_at IS NULL ко всем ORM-SELECT (включая get и ленивые связи)
+    для моделей с SoftDeleteMixin — запросы попадают в частичные индексы
+    WHERE deleted_at IS NULL. Увидеть удалённые: .execution_options(include_deleted=True).
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                SoftDeleteMixin,
+                lambda cls: cls.deleted_at.is_(None),
+                include_aliases=True,
+            )
+        )
+
+
+# Побочные эффекты, которые имеют смысл только после фиксации транзакции
+def on_commit(session, callback) -> None:
+    """
+    Откладывает callback (без аргументов) до успешного commit сессии.
+    Commit апдейта делает DbSessionMiddleware; при rollback callback отбрасывается.
+    """
+    session.info.setdefault("on_commit", []).append(callback)
+
+
+def run_on_commit(session):
+    for callback in session.info.pop("on_commit", ()):
+        callback()
+
+
+def drop_on_commit(session, previous_transaction):
+    session.info.pop("on_commit", None)
+
+
 event.listen(async_session_maker().sync_session_class, "before_flush", set_audit_fields)
+event.listen(async_session_maker().sync_session_class, "after_begin", mark_session_used)
+event.listen(
+    async_session_maker().sync_session_class, "do_orm_execute", filter_soft_deleted
+)
+event.listen(async_session_maker().sync_session_class, "after_commit", run_on_commit)
+event.listen(
+    async_session_maker().sync_session_class, "after_soft_rollback", drop_on_commit
+)
@@ -33,13 +33,13 @@ async def force_plan_cmd(message: types.Message, session: AsyncSession, user):
 
 
 # Изменен декоратор на Command
-@router.message(Command("audit_last"))
-async def audit_last_cmd(message: types.Message, session: AsyncSession, user):
+@router.message(Command("audit_last"), flags={"read_only": True})
+async def audit_last_cmd(message: types.Message, read_session: AsyncSession, user):
     if user.role != UserRole.admin.value:
         await message.answer("⛔ Команда доступна только администраторам.")
         return
 
-    result = await session.execute(
+    result = await read_session.execute(
         select(AuditLog).order_by(AuditLog.id.desc()).limit(5)
     )
     rows = result.scalars().all()
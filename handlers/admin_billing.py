@@ -1,6 +1,7 @@
 # handlers/admin_billing.py
 from aiogram import Router, types, F
 from sqlalchemy.ext.asyncio import AsyncSession
+from config import PLAN_CATALOG_REFRESH_SEC
 from utils.enums import UserRole
 from services.subscriptions import (
     extend_trial,
@@ -10,6 +11,7 @@ from services.subscriptions import (
     cancel_subscription,
     get_company_subscription_status,
 )
+from services.plans import plan_catalog
 
 router = Router(name="admin_billing")
 
@@ -90,13 +92,15 @@ async def cmd_cancel(message: types.Message, session: AsyncSession, user):
     await message.answer("✅ Подписка отменена." if ok else "ℹ️ Подписка не найдена.")
 
 
-@router.message(F.text.regexp(r"^/admin_company_status\s+\d+$"))
-async def cmd_company_status(message: types.Message, session: AsyncSession, user):
+@router.message(
+    F.text.regexp(r"^/admin_company_status\s+\d+$"), flags={"read_only": True}
+)
+async def cmd_company_status(message: types.Message, read_session: AsyncSession, user):
     if not _is_admin(user):
         await message.answer("Недостаточно прав.")
         return
     company_id = int(message.text.split()[1])
-    st = await get_company_subscription_status(session, company_id)
+    st = await get_company_subscription_status(read_session, company_id)
     trial, sub = st["trial"], st["subscription"]
 
     trial_info = "—"
@@ -114,3 +118,17 @@ async def cmd_company_status(message: types.Message, session: AsyncSession, user
         f"Подписка: {sub.get('status') or 'нет'} ({sub_info})",
     ]
     await message.answer("\n".join(txt))
+
+
+@router.message(F.text.regexp(r"^/admin_reload_plans$"))
+async def cmd_reload_plans(message: types.Message, session: AsyncSession, user):
+    if not _is_admin(user):
+        await message.answer("Недостаточно прав.")
+        return
+    version = await plan_catalog.load(session)
+    codes = ", ".join(p.code for p in plan_catalog.all()) or "—"
+    await message.answer(
+        f"✅ Каталог тарифов перечитан в этом процессе (версия {version}).\n"
+        f"Остальные шарды и реплики сверятся с БД в течение "
+        f"{PLAN_CATALOG_REFRESH_SEC} с.\nТарифы: {codes}"
+    )
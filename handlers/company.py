@@ -1,10 +1,13 @@
 import logging
+from functools import partial
 from aiogram import Router, types, F
 from sqlalchemy.ext.asyncio import AsyncSession
 from services.companies import create_company as svc_create_company
 from models import Company
 from utils.enums import UserRole
 from services.audit import log_action
+from services.principal import invalidate_principal
+from database import on_commit
 
 router = Router(name="company")
 logger = logging.getLogger(__name__)
@@ -22,9 +25,11 @@ async def create_company_cmd(message: types.Message, session: AsyncSession, user
         user.company_id = company.id
         user.role = UserRole.manager  # создатель компании = руководитель
         session.add(user)
-        await session.commit()
+        # кэш principal сбрасываем после commit апдейта, иначе параллельный
+        # апдейт успеет закэшировать старую роль
+        on_commit(session, partial(invalidate_principal, user.tg_id))
 
-        # Добавляем логирование
+        # аудит — в той же транзакции
         await log_action(
             session,
             actor_user_id=user.id,
@@ -81,9 +86,11 @@ async def join_company_cmd(message: types.Message, session: AsyncSession, user):
         user.company_id = company.id
         user.role = role_enum
         session.add(user)
-        await session.commit()
+        # кэш principal сбрасываем после commit апдейта, иначе параллельный
+        # апдейт успеет закэшировать старую роль
+        on_commit(session, partial(invalidate_principal, user.tg_id))
 
-        # Добавляем логирование
+        # аудит — в той же транзакции
         await log_action(
             session,
             actor_user_id=user.id,
@@ -1,9 +1,9 @@
 import uuid
 import os
 import logging
-import aiohttp
+from functools import partial
 from aiogram import Router, F, Bot
-from aiogram.filters import Command
+from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import (
@@ -13,13 +13,17 @@ from aiogram.types import (
     InlineKeyboardButton,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 
-from models.project import Project
-from models.task import Task
+from config import PICKER_PAGE_SIZE, TELEGRAM_DOWNLOAD_TIMEOUT_SEC
+from database import on_commit
 from models.user import User
+from services.blobs import store_blob
 from services.files import create_file
-from storage.s3 import generate_presigned_put_url
+from services.pagination import IdPage
+from services.previews import schedule_previews, wants_previews
+from services.projects import get_projects_page
+from services.tasks import get_project_tasks_page
+from utils.helpers import shorten
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -33,65 +37,228 @@ class FileUploadState(StatesGroup):
     waiting_for_file = State()
 
 
+# -- Пикеры проектов и задач --
+
+# страниц пикера, которые держим в данных FSM (листание назад/вперёд без запросов)
+PICKER_CACHE_LIMIT = 20
+
+PICKER_PROMPTS = {
+    "project": "Выберите проект, к которому хотите прикрепить файл:",
+    "task": "Выберите задачу, к которой прикрепить файл:",
+}
+
+
+async def load_picker_page(
+    state: FSMContext,
+    session: AsyncSession,
+    user: User,
+    kind: str,
+    direction: str = "first",
+    cursor: int | None = None,
+) -> IdPage:
+    """
+    Страница пикера kind ("project" | "task") с учётом поиска из FSM.
+    Загруженные страницы кэшируются в данных FSM и живут до конца загрузки.
+    """
+    data = await state.get_data()
+    query = data.get(f"{kind}_query")
+    parent = data.get("project_id") if kind == "task" else user.company_id
+    key = f"{kind}:{parent}:{query or ''}:{direction}:{cursor or ''}"
+
+    pages = data.get("picker_pages") or {}
+    if key in pages:
+        return IdPage.from_dict(pages[key])
+
+    after = cursor if direction == "n" else None
+    before = cursor if direction == "p" else None
+    if kind == "project":
+        page = await get_projects_page(
+            session,
+            user.company_id,
+            query=query,
+            after=after,
+            before=before,
+            limit=PICKER_PAGE_SIZE,
+        )
+    else:
+        page = await get_project_tasks_page(
+            session,
+            parent,
+            user.company_id,
+            query=query,
+            after=after,
+            before=before,
+            limit=PICKER_PAGE_SIZE,
+        )
+
+    pages[key] = page.as_dict()
+    while len(pages) > PICKER_CACHE_LIMIT:
+        pages.pop(next(iter(pages)))
+    await state.update_data(picker_pages=pages)
+    return page
+
+
+def picker_text(kind: str, query: str | None) -> str:
+    text = PICKER_PROMPTS[kind]
+    if query:
+        text += f"\nПоиск: «{query}»"
+    return text + "\nНапишите часть названия, чтобы найти нужное."
+
+
+def picker_keyboard(kind: str, page: IdPage, query: str | None):
+    if kind == "project":
+        buttons = [
+            [
+                InlineKeyboardButton(
+                    text=shorten(name, 60), callback_data=f"upload_project:{pid}"
+                )
+            ]
+            for pid, name in page.items
+        ]
+    else:
+        buttons = [
+            [
+                InlineKeyboardButton(
+                    text=f"{shorten(title, 50)} (ID: {tid})",
+                    callback_data=f"upload_task:{tid}",
+                )
+            ]
+            for tid, title in page.items
+        ]
+
+    nav = []
+    if page.has_prev:
+        nav.append(
+            InlineKeyboardButton(
+                text="◀️ Назад", callback_data=f"upload_pick:{kind}:p:{page.first_id}"
+            )
+        )
+    if page.has_next:
+        nav.append(
+            InlineKeyboardButton(
+                text="Вперёд ▶️", callback_data=f"upload_pick:{kind}:n:{page.last_id}"
+            )
+        )
+    if nav:
+        buttons.append(nav)
+    if query:
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    text="✖️ Сбросить поиск", callback_data=f"upload_pick:{kind}:all:0"
+                )
+            ]
+        )
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def _picker_kind(state_name: str | None) -> str:
+    return "task" if state_name == FileUploadState.waiting_for_task.state else "project"
+
+
 # -- Команды и хэндлеры --
 
 
-@router.message(Command("upload", "add_file"))
+@router.message(Command("upload", "add_file"), flags={"read_only": True})
 async def cmd_upload_start(
-    message: Message, state: FSMContext, session: AsyncSession, user: User
+    message: Message, state: FSMContext, read_session: AsyncSession, user: User
 ):
     """Начинает процесс загрузки файла."""
-    # Получаем проекты для текущей компании пользователя
-    projects_stmt = select(Project).where(Project.company_id == user.company_id)
-    projects = (await session.execute(projects_stmt)).scalars().all()
+    # новая загрузка — без поиска и кэша страниц прошлой
+    await state.set_data({})
+    page = await load_picker_page(state, read_session, user, "project")
 
-    if not projects:
+    if not page.items:
         await message.answer("В вашей компании нет проектов для загрузки файлов.")
         await state.clear()
         return
 
-    buttons = [
-        [InlineKeyboardButton(text=p.name, callback_data=f"upload_project:{p.id}")]
-        for p in projects
-    ]
-    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
     await message.answer(
-        "Выберите проект, к которому хотите прикрепить файл:", reply_markup=keyboard
+        picker_text("project", None),
+        reply_markup=picker_keyboard("project", page, None),
     )
     await state.set_state(FileUploadState.waiting_for_project)
 
 
 @router.callback_query(
-    F.data.startswith("upload_project:"), FileUploadState.waiting_for_project
+    F.data.startswith("upload_pick:"),
+    StateFilter(FileUploadState.waiting_for_project, FileUploadState.waiting_for_task),
+    flags={"read_only": True},
+)
+async def upload_picker_page(
+    callback_query: CallbackQuery,
+    state: FSMContext,
+    read_session: AsyncSession,
+    user: User,
+):
+    """Листание пикера и сброс поиска."""
+    _, kind, direction, cursor = callback_query.data.split(":")
+    if kind != _picker_kind(await state.get_state()):
+        await callback_query.answer("Этот список уже неактуален.")
+        return
+
+    if direction == "all":
+        await state.update_data({f"{kind}_query": None})
+        page = await load_picker_page(state, read_session, user, kind)
+    else:
+        page = await load_picker_page(
+            state, read_session, user, kind, direction, int(cursor)
+        )
+    query = (await state.get_data()).get(f"{kind}_query")
+
+    await callback_query.message.edit_text(
+        picker_text(kind, query), reply_markup=picker_keyboard(kind, page, query)
+    )
+    await callback_query.answer()
+
+
+@router.message(
+    StateFilter(FileUploadState.waiting_for_project, FileUploadState.waiting_for_task),
+    F.text,
+    ~F.text.startswith("/"),
+    flags={"read_only": True},
+)
+async def upload_picker_search(
+    message: Message, state: FSMContext, read_session: AsyncSession, user: User
+):
+    """Текст во время выбора — фильтр по подстроке названия."""
+    kind = _picker_kind(await state.get_state())
+    query = message.text.strip()[:64]
+    await state.update_data({f"{kind}_query": query})
+
+    page = await load_picker_page(state, read_session, user, kind)
+    text = picker_text(kind, query)
+    if not page.items:
+        text = f"Ничего не найдено по «{query}».\n" + text
+    await message.answer(text, reply_markup=picker_keyboard(kind, page, query))
+
+
+@router.callback_query(
+    F.data.startswith("upload_project:"),
+    FileUploadState.waiting_for_project,
+    flags={"read_only": True},
 )
 async def upload_select_project(
-    callback_query: CallbackQuery, state: FSMContext, session: AsyncSession, user: User
+    callback_query: CallbackQuery,
+    state: FSMContext,
+    read_session: AsyncSession,
+    user: User,
 ):
     """Обрабатывает выбор проекта."""
     project_id = int(callback_query.data.split(":")[1])
-    await state.update_data(project_id=project_id)
+    await state.update_data(project_id=project_id, task_query=None)
 
-    tasks_stmt = select(Task).where(Task.project_id == project_id)
-    tasks = (await session.execute(tasks_stmt)).scalars().all()
+    page = await load_picker_page(state, read_session, user, "task")
 
-    if not tasks:
+    if not page.items:
         await callback_query.message.edit_text(
             "В этом проекте нет задач для прикрепления файлов."
         )
         await state.clear()
         return
 
-    buttons = [
-        [
-            InlineKeyboardButton(
-                text=f"{t.title} (ID: {t.id})", callback_data=f"upload_task:{t.id}"
-            )
-        ]
-        for t in tasks
-    ]
-    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
     await callback_query.message.edit_text(
-        "Выберите задачу, к которой прикрепить файл:", reply_markup=keyboard
+        picker_text("task", None), reply_markup=picker_keyboard("task", page, None)
     )
     await state.set_state(FileUploadState.waiting_for_task)
 
@@ -110,6 +277,15 @@ async def upload_select_task(callback_query: CallbackQuery, state: FSMContext):
     await state.set_state(FileUploadState.waiting_for_file)
 
 
+def telegram_chunks(bot: Bot, file_path: str):
+    """Чанки файла с серверов Telegram по мере скачивания (без буфера на весь файл)."""
+    return bot.session.stream_content(
+        url=bot.session.api.file_url(bot.token, file_path),
+        timeout=TELEGRAM_DOWNLOAD_TIMEOUT_SEC,
+        chunk_size=64 * 1024,
+    )
+
+
 @router.message(FileUploadState.waiting_for_file, F.photo | F.document)
 async def handle_file(
     message: Message, state: FSMContext, session: AsyncSession, user: User, bot: Bot
@@ -130,29 +306,33 @@ async def handle_file(
             original_name = f"photo_{file_info.file_unique_id}.jpg"
             mime_type = "image/jpeg"  # У фото нет mime_type, поэтому задаем явно
 
-        # Генерируем уникальный ключ для S3. Используем company_id для изоляции.
+        # Ключ нового объекта; blob общий для задач компании, поэтому без task_id.
+        # Используем company_id для изоляции.
         file_extension = os.path.splitext(original_name)[1]
-        s3_key = (
-            f"company_{user.company_id}/task_{task_id}/{uuid.uuid4()}{file_extension}"
-        )
-
-        # Загружаем файл с серверов Telegram
-        telegram_file = await bot.get_file(file_info.file_id)
-        file_bytes = await bot.download_file(telegram_file.file_path)
-
-        # Генерируем URL для загрузки файла
-        presigned_url = await generate_presigned_put_url(s3_key)
+        s3_key = f"company_{user.company_id}/blobs/{uuid.uuid4()}{file_extension}"
 
-        if not presigned_url:
-            await message.answer(
-                "Произошла ошибка при подготовке к загрузке. Пожалуйста, попробуйте снова."
-            )
-            await state.clear()
-            return
+        async def telegram_stream():
+            # Файл идёт из Telegram в S3 потоком: в памяти не больше двух частей multipart
+            telegram_file = await bot.get_file(file_info.file_id)
+            async for chunk in telegram_chunks(bot, telegram_file.file_path):
+                yield chunk
 
-        # Загружаем файл в S3
-        async with aiohttp.ClientSession() as http_session:
-            await http_session.put(presigned_url, data=file_bytes)
+        # Повторно присланный файл не скачивается и не загружается заново
+        blob = await store_blob(
+            session,
+            user.company_id,
+            telegram_stream,
+            s3_key,
+            mime_type,
+            file_unique_id=file_info.file_unique_id,
+        )
+        logger.info(
+            "Файл %s: blob %s, %s байт, sha256=%s",
+            original_name,
+            blob.id,
+            blob.size,
+            blob.sha256,
+        )
 
         # Сохраняем информацию о файле в БД
         new_file = await create_file(
@@ -162,15 +342,28 @@ async def handle_file(
             uploader_id=user.id,
             original_name=original_name,
             mime_type=mime_type,
-            size=file_info.file_size,
-            s3_key=s3_key,
+            size=blob.size,
+            s3_key=blob.s3_key,
+            blob_id=blob.id,
+            tg_file_id=file_info.file_id,
+            tg_file_unique_id=file_info.file_unique_id,
+            tg_file_type="document" if message.document else "photo",
+            preview_s3_key=blob.preview_s3_key,
+            thumbnail_s3_key=blob.thumbnail_s3_key,
         )
+        # превью делает пул процессов после commit, когда blob уже виден другим сессиям
+        if blob.preview_s3_key is None and wants_previews(mime_type, blob.size):
+            on_commit(session, partial(schedule_previews, blob.id, blob.s3_key))
+        # ошибки INSERT — до ответа «успешно»; commit в DbSessionMiddleware
+        await session.flush()
         await message.answer(
             f"Файл '{new_file.original_name}' успешно прикреплён к задаче! ✅"
         )
 
     except Exception as e:
         logger.error(f"Error saving file info to DB: {e}")
+        # ответ «ошибка» — значит, ничего не коммитим
+        await session.rollback()
         await message.answer(
             "Произошла ошибка при сохранении данных о файле. Пожалуйста, попробуйте снова."
         )
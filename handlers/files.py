@@ -1,19 +1,47 @@
 from aiogram import Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import Message
 from aiogram.filters import Command
+from prometheus_client import Counter
 from sqlalchemy.ext.asyncio import AsyncSession
+from metrics.registry import registry
 from services.files import get_file_by_id
-from storage.s3 import generate_presigned_get_url
+from storage.s3 import storage
 from models.user import User
-import uuid
 import logging
 
 router = Router()
 logger = logging.getLogger(__name__)
 
+# telegram — переслали по file_id; presigned — ссылка на S3 (file_id нет или отвергнут)
+FILE_DELIVERIES_TOTAL = Counter(
+    "file_deliveries_total",
+    "/get_file deliveries by method",
+    ["method"],
+    registry=registry,
+)
 
-@router.message(Command("get_file"))
-async def get_file_cmd(message: Message, session: AsyncSession, user: User):
+
+async def send_by_file_id(message: Message, file) -> bool:
+    """
+    Пересылает файл по сохранённому file_id Telegram — без трафика из S3.
+    False — file_id нет или Telegram его не принял (другой бот, файл удалён).
+    """
+    if not file.tg_file_id:
+        return False
+    try:
+        if file.tg_file_type == "photo":
+            await message.answer_photo(file.tg_file_id, caption=file.original_name)
+        else:
+            await message.answer_document(file.tg_file_id, caption=file.original_name)
+    except TelegramBadRequest as e:
+        logger.info("file_id файла %s отвергнут Telegram: %s", file.id, e)
+        return False
+    return True
+
+
+@router.message(Command("get_file"), flags={"read_only": True})
+async def get_file_cmd(message: Message, read_session: AsyncSession, user: User):
     args = message.text.split(maxsplit=1)
     if len(args) < 2:
         await message.answer(
@@ -22,12 +50,12 @@ async def get_file_cmd(message: Message, session: AsyncSession, user: User):
         return
 
     try:
-        file_id = uuid.UUID(args[1])
+        file_id = int(args[1])
     except ValueError:
-        await message.answer("Неверный формат ID файла. ID должен быть UUID.")
+        await message.answer("Неверный формат ID файла. ID должен быть числом.")
         return
 
-    file = await get_file_by_id(session, file_id)
+    file = await get_file_by_id(read_session, file_id)
 
     if not file:
         await message.answer("Файл с таким ID не найден.")
@@ -37,13 +65,14 @@ async def get_file_cmd(message: Message, session: AsyncSession, user: User):
         await message.answer("У вас нет прав для доступа к этому файлу.")
         return
 
-    presigned_url = await generate_presigned_get_url(file.s3_key)
+    if await send_by_file_id(message, file):
+        FILE_DELIVERIES_TOTAL.labels(method="telegram").inc()
+        return
 
-    if presigned_url:
-        await message.answer(
-            f"Файл '{file.original_name}' доступен по временной ссылке:\n{presigned_url}\n\nСсылка будет активна 1 час."
-        )
-    else:
-        await message.answer(
-            "Произошла ошибка при получении ссылки на файл. Пожалуйста, попробуйте снова."
-        )
+    # повторная ссылка на тот же файл — из кэша, пока не подошёл её срок
+    presigned = storage.presign("get_object", file.s3_key)
+    FILE_DELIVERIES_TOTAL.labels(method="presigned").inc()
+    await message.answer(
+        f"Файл '{file.original_name}' доступен по временной ссылке:\n{presigned.url}\n\n"
+        f"Ссылка будет активна ещё {presigned.minutes_left} мин."
+    )
@@ -34,14 +34,14 @@ async def cmd_help(message: Message, session: AsyncSession, user: User):
             "/add_project – добавить проект",
             "/add_task – добавить задачу",
             "/show_projects – посмотреть проекты",
-            "/my_tasks – показать мои задачи",
+            "/my_tasks [статус] [ID проекта] – мои задачи (по страницам)",
             "/reassign_task – переназначить задачу",
             "/set_status – изменить статус задачи",
         ]
 
     if user.role == UserRole.worker:
         commands += [
-            "/my_tasks – показать мои задачи",
+            "/my_tasks [статус] [ID проекта] – мои задачи (по страницам)",
             "/set_status – изменить статус задачи",
         ]
 
@@ -50,6 +50,7 @@ async def cmd_help(message: Message, session: AsyncSession, user: User):
             "/list_companies – список компаний",
             "/force_plan <company_id> <plan_code> – назначить тариф",
             "/force_extend_trial <company_id> <days> – продлить триал",
+            "/admin_reload_plans – перечитать каталог тарифов",
         ]
 
     await message.answer("Доступные команды:\n" + "\n".join(commands))
@@ -43,22 +43,28 @@ async def add_project_cmd(message: types.Message, session: AsyncSession, user: U
             entity_id=project.id,
             payload={"name": project.name, "company_id": project.company_id},
         )
+        # ошибки INSERT (в т.ч. аудита) — до ответа «успешно»; commit в DbSessionMiddleware
+        await session.flush()
 
         await message.answer(
             f"Проект '{project.name}' успешно добавлен! ID: {project.id}"
         )
     except Exception as e:
         logging.error(f"Ошибка при создании проекта: {str(e)}")
+        # ответ «ошибка» — значит, ничего не коммитим
+        await session.rollback()
         await message.answer("Произошла ошибка при создании проекта")
 
 
-@router.message(Command("show_projects"))
+@router.message(Command("show_projects"), flags={"read_only": True})
 @is_manager_or_foreman
-async def show_projects_cmd(message: types.Message, session: AsyncSession, user: User):
+async def show_projects_cmd(
+    message: types.Message, read_session: AsyncSession, user: User
+):
     logging.debug(f"Получение проектов для компании: {user.company_id}")
 
     try:
-        projects = await get_projects_by_company_id(session, user.company_id)
+        projects = await get_projects_by_company_id(read_session, user.company_id)
         logging.debug(f"Найдено проектов: {len(projects)}")
 
         if not projects:
@@ -1,11 +1,12 @@
-from aiogram import Router, types
-from aiogram.filters import Command
+from aiogram import F, Router, types
+from aiogram.filters import Command, CommandObject
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.user import User
-from models.project import Project
-from services.tasks import create_task, get_my_tasks
+from services.tasks import create_task, get_my_tasks_page
 from services.projects import get_project_by_id_and_company
+from utils.enums import TaskStatus
 from utils.helpers import format_tasks_list
+from utils.keyboards import get_tasks_page_keyboard
 from utils.decorators import is_manager_or_foreman
 from services.audit import log_action
 import logging  # Импортируем logging
@@ -67,28 +68,112 @@ async def add_task_cmd(message: types.Message, session: AsyncSession, user: User
             },
         )
 
+        # ошибки INSERT (в т.ч. аудита) — до ответа «успешно»; commit в DbSessionMiddleware
+        await session.flush()
         logging.info(f"Задача успешно создана: ID={task.id}")
         await message.answer(
             f"Задача '{task.title}' успешно создана в проекте '{project.name}'!"
         )
     except Exception as e:
         logging.error(f"Ошибка при создании задачи: {str(e)}")
+        # ответ «ошибка» — значит, ничего не коммитим
+        await session.rollback()
         await message.answer("Произошла ошибка при создании задачи.")
 
 
-@router.message(Command("my_tasks"))
-async def my_tasks_cmd(message: types.Message, session: AsyncSession, user: User):
+def parse_task_filters(args: str | None) -> tuple[TaskStatus | None, int | None]:
+    """
+    Фильтры /my_tasks: статус и/или ID проекта в любом порядке,
+    например `/my_tasks in_progress 12`. ValueError — неизвестный аргумент.
+    """
+    status, project_id = None, None
+    for arg in (args or "").split():
+        if arg.isdigit():
+            project_id = int(arg)
+        else:
+            status = TaskStatus(arg.lower())
+    return status, project_id
+
+
+@router.message(Command("my_tasks"), flags={"read_only": True})
+async def my_tasks_cmd(
+    message: types.Message,
+    read_session: AsyncSession,
+    user: User,
+    command: CommandObject | None = None,
+):
     if not user.company_id:
         await message.answer("Вы не состоите в компании.")
         return
 
-    tasks = await get_my_tasks(session, user.id)
-    if not tasks:
-        await message.answer("У вас пока нет задач.")
+    try:
+        status, project_id = parse_task_filters(command.args if command else None)
+    except ValueError:
+        statuses = ", ".join(s.value for s in TaskStatus)
+        await message.answer(
+            f"Использование: /my_tasks [статус] [ID проекта]\nСтатусы: {statuses}"
+        )
+        return
+
+    page = await get_my_tasks_page(
+        read_session, user.id, status=status, project_id=project_id
+    )
+    if not page.tasks:
+        if status is not None or project_id is not None:
+            await message.answer("Нет задач с такими фильтрами.")
+        else:
+            await message.answer("У вас пока нет задач.")
         return
 
-    for task in tasks:
-        task.project = await session.get(Project, task.project_id)
+    await message.answer(
+        format_tasks_list(page.tasks),
+        reply_markup=get_tasks_page_keyboard(page, status, project_id),
+    )
+
+
+def parse_tasks_page_data(
+    data: str,
+) -> tuple[str, TaskStatus | None, int | None, tuple[TaskStatus, int]]:
+    """
+    callback_data кнопок листания (utils.keyboards.get_tasks_page_keyboard):
+    направление, фильтры и курсор. ValueError — устаревший или битый payload.
+    """
+    _, direction, status, project_id, key_status, key_id = data.split(":")
+    if direction not in ("n", "p"):
+        raise ValueError(f"unknown direction: {direction}")
+    return (
+        direction,
+        TaskStatus(status) if status != "-" else None,
+        int(project_id) if project_id != "-" else None,
+        (TaskStatus(key_status), int(key_id)),
+    )
+
+
+@router.callback_query(F.data.startswith("my_tasks:"), flags={"read_only": True})
+async def my_tasks_page_cb(
+    callback: types.CallbackQuery, read_session: AsyncSession, user: User
+):
+    """Листание /my_tasks: курсор и фильтры приходят в callback_data."""
+    try:
+        direction, status, project_id, cursor = parse_tasks_page_data(callback.data)
+    except ValueError:
+        await callback.answer("Этот список устарел, откройте /my_tasks заново.")
+        return
+
+    page = await get_my_tasks_page(
+        read_session,
+        user.id,
+        status=status,
+        project_id=project_id,
+        after=cursor if direction == "n" else None,
+        before=cursor if direction == "p" else None,
+    )
+    if not page.tasks:
+        await callback.answer("Задач больше нет.")
+        return
 
-    text = format_tasks_list(tasks)
-    await message.answer(text)
+    await callback.message.edit_text(
+        format_tasks_list(page.tasks),
+        reply_markup=get_tasks_page_keyboard(page, status, project_id),
+    )
+    await callback.answer()
@@ -3,43 +3,35 @@ import os
 import asyncio
 import structlog
 from aiogram import Bot, Dispatcher
-from middlewares.context_middleware import ContextMiddleware
-from prometheus_client import CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.openmetrics import exposition as openmetrics
+from metrics.registry import registry
 
 from core.logging_setup import setup_logging
-from config import BOT_TOKEN, NOTIFY_CHECK_INTERVAL_MIN, DATABASE_URL
+from config import (
+    BOT_TOKEN,
+    NOTIFY_CHECK_INTERVAL_MIN,
+    PLAN_CATALOG_REFRESH_SEC,
+    DATABASE_URL,
+    BOT_MODE,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    SHARD_INDEX,
+)
 from database import init_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio.session import async_sessionmaker
 from aiohttp import web
 from urllib.parse import urlparse
 
-# routers
-from handlers.start import router as start_router
-from handlers.help import router as help_router
-from handlers.company import router as company_router
-from handlers.invite import router as invite_router
-from handlers.projects import router as projects_router
-from handlers.tasks import router as tasks_router
-from handlers.reassign import router as reassign_router
-from handlers.status import router as status_router
-from handlers.reports import router as reports_router
-from handlers.user import router as user_router
-from handlers.file_upload import router as file_upload_router
-from handlers.files import router as files_router
-from handlers.important_stuff import router as important_router
-from handlers import admin_billing
-from handlers import admin
-from handlers import payments
-from handlers import example_handler
-
-# middlewares
-from middlewares.db_middleware import DbSessionMiddleware
-from middlewares.role_checker import RoleCheckerMiddleware
-from middlewares.company_middleware import CompanyMiddleware
-from middlewares.subscription_checker import SubscriptionCheckerMiddleware
-from middlewares.audit_middleware import AuditMiddleware
-from middlewares.metrics_middleware import MetricsMiddleware, init_metrics
+from core.dispatcher import build_dispatcher
+from core.replica import replica_router
+from core.startup import record_startup_phase
+from storage.s3 import storage
+from services.previews import shutdown_previews
+from middlewares.metrics_middleware import init_metrics
 
 # jobs
 from services.notify_jobs import (
@@ -48,24 +40,44 @@ from services.notify_jobs import (
     enforce_expirations,
 )
 from services.seed import seed_plans
+from services.plans import plan_catalog
 
 # --- Hawk integration ---
 from core.monitoring.hawk_setup import setup_hawk, capture_exception, capture_message
 
-
 # --- Structlog logging setup ---
 setup_logging()
 logger = structlog.get_logger(__name__)
 
-# создаём отдельный реестр, чтобы избежать дубликатов
-registry = CollectorRegistry()
-
 # инициализируем метрики
 init_metrics(registry)
 
 # Инициализация Hawk при старте
 setup_hawk()
 
+record_startup_phase("imports")
+
+# ссылки на фоновые задачи, чтобы их не собрал GC до завершения
+_background_tasks: set[asyncio.Task] = set()
+
+
+def spawn_background(coro) -> asyncio.Task:
+    """create_task со ссылкой в _background_tasks и логом необработанной ошибки."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_done)
+    return task
+
+
+def _background_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(
+            "background task failed",
+            task=task.get_coro().__name__,
+            exc_info=task.exception(),
+        )
+
 
 # --- Глобальный перехватчик необработанных ошибок ---
 def handle_uncaught_exception(loop, context):
@@ -82,15 +94,27 @@ def handle_uncaught_exception(loop, context):
 
 
 # --- Health-check server ---
-async def start_health_server():
+async def start_health_server(dp: Dispatcher | None = None, bot: Bot | None = None):
+    """
+    Поднимает aiohttp-сервер с /healthz и /metrics.
+    Если переданы dp и bot — на этом же приложении монтируется вебхук Telegram.
+    """
+
     async def handle_health(request):
         return web.Response(text="OK", status=200)
 
     async def handle_metrics(request):
         try:
-            data = generate_latest(registry)
+            # exemplar'ы (request_id у db_statements_*) есть только в OpenMetrics —
+            # его Prometheus просит через Accept; остальным — текстовый формат
+            if "application/openmetrics-text" in request.headers.get("Accept", ""):
+                data = openmetrics.generate_latest(registry)
+                content_type = openmetrics.CONTENT_TYPE_LATEST
+            else:
+                data = generate_latest(registry)
+                content_type = CONTENT_TYPE_LATEST
             # aiohttp >= 3.9 не принимает charset в content_type
-            safe_content_type = CONTENT_TYPE_LATEST.split(";")[0]
+            safe_content_type = content_type.split(";")[0]
             return web.Response(body=data, content_type=safe_content_type)
         except Exception as e:
             logger.exception("metrics endpoint error", error=str(e))
@@ -100,6 +124,18 @@ async def start_health_server():
     app.router.add_get("/healthz", handle_health)
     app.router.add_get("/metrics", handle_metrics)
 
+    if dp is not None and bot is not None:
+        # handle_in_background=True: Telegram сразу получает 200,
+        # а апдейт обрабатывается в отдельной задаче
+        SimpleRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            secret_token=WEBHOOK_SECRET,
+            handle_in_background=True,
+        ).register(app, path=WEBHOOK_PATH)
+        setup_application(app, dp, bot=bot)
+        logger.info("🔗 Webhook смонтирован", path=WEBHOOK_PATH)
+
     runner = web.AppRunner(app)
     await runner.setup()
     port = int(os.getenv("PORT", 8080))
@@ -107,7 +143,7 @@ async def start_health_server():
     await site.start()
 
     logger.info(f"🩺 Health-check + Metrics запущены на порту {port}")
-    logger.info("🟢 Bot ready: healthz OK, metrics OK, polling starting…")
+    logger.info(f"🟢 Bot ready: healthz OK, metrics OK, {BOT_MODE} starting…")
 
 
 async def main():
@@ -117,80 +153,60 @@ async def main():
     logger.info("[BOOT] DB host", db_host=db_host)
     logger.info("[BOOT] BOT_TOKEN (prefix only)", prefix=BOT_TOKEN[:6])
 
-    logger.info("[INFO] Инициализация базы данных...")
+    logger.info("[INFO] Проверка базы данных...")
     session_pool: async_sessionmaker[AsyncSession] = await init_db()
     logger.info("[INFO] База данных готова")
+    record_startup_phase("db")
 
-    # безопасный сид тарифов (один раз при старте)
-    async with session_pool() as s:
-        await seed_plans(s)
-        await s.commit()
+    # сид тарифов идёт параллельно со стартом health-сервера и бота
+    spawn_background(seed_plans_on_boot(session_pool))
 
-    # --- Health-check ---
-    asyncio.create_task(start_health_server())
+    # каталог тарифов в памяти процесса: правки из других шардов/реплик
+    spawn_background(plan_catalog_refresher(session_pool))
 
     # --- Telegram Bot ---
     bot = Bot(token=BOT_TOKEN)
-    dp = Dispatcher()
-
-    # порядок middleware критичен
-    dp.message.middleware(DbSessionMiddleware(session_pool))
-    dp.callback_query.middleware(DbSessionMiddleware(session_pool))
-
-    dp.message.middleware(RoleCheckerMiddleware())
-    dp.callback_query.middleware(RoleCheckerMiddleware())
-
-    dp.message.middleware(CompanyMiddleware())
-    dp.callback_query.middleware(CompanyMiddleware())
-
-    dp.message.middleware(SubscriptionCheckerMiddleware())
-    dp.callback_query.middleware(SubscriptionCheckerMiddleware())
-
-    dp.message.middleware(AuditMiddleware())
-    dp.callback_query.middleware(AuditMiddleware())
-
-    dp.update.middleware(ContextMiddleware())
-
-    dp.message.middleware(MetricsMiddleware())
-    dp.callback_query.middleware(MetricsMiddleware())
-
-    # routers
-    dp.include_router(start_router)
-    dp.include_router(help_router)
-    dp.include_router(company_router)
-    dp.include_router(invite_router)
-    dp.include_router(projects_router)
-    dp.include_router(tasks_router)
-    dp.include_router(reassign_router)
-    dp.include_router(status_router)
-    dp.include_router(reports_router)
-    dp.include_router(user_router)
-    dp.include_router(file_upload_router)
-    dp.include_router(files_router)
-    dp.include_router(important_router)
-    dp.include_router(admin_billing.router)
-    dp.include_router(payments.router)
-    dp.include_router(admin.router)
+    dp = build_dispatcher(session_pool)
 
-    # Пример логирования (тестовый хэндлер)
-    dp.include_router(example_handler.router)
+    # отставание реплики: пока оно в норме, read-only хэндлеры читают с неё
+    if replica_router.enabled:
+        spawn_background(replica_router.run())
 
-    # фоновый воркер
-    asyncio.create_task(billing_notifier(bot, session_pool))
+    # фоновый воркер (под supervisor.py — только в шарде 0, чтобы не слать дубли)
+    if SHARD_INDEX == 0:
+        spawn_background(billing_notifier(bot, session_pool))
 
     logger.info("[INFO] Бот запускается...")
 
     try:
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        if BOT_MODE == "webhook":
+            await run_webhook(bot, dp)
+        elif BOT_MODE == "worker":
+            # шард под supervisor.py: апдейты пересылает супервизор,
+            # вебхук в Telegram не регистрируем
+            await start_health_server(dp, bot)
+            record_startup_phase("ready")
+            await asyncio.Event().wait()
+        else:
+            # --- Health-check ---
+            await start_health_server()
+            # вебхук мог остаться от webhook-режима — polling с ним не работает
+            await bot.delete_webhook(drop_pending_updates=False)
+            record_startup_phase("ready")
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
         logger.info("🧩 Shutting down gracefully...")
         # отменяем все фоновые задачи
         tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
         for t in tasks:
             t.cancel()
+        # партиции исполнителя доделывают отмену до закрытия сессий бота и S3
+        await dp["update_executor"].shutdown()
 
         # закрываем сессию Telegram-бота
         await bot.session.close()
+        storage.close()
+        shutdown_previews()
 
         # даём немного времени задачам завершиться
         await asyncio.sleep(0.1)
@@ -198,6 +214,52 @@ async def main():
         logger.info("[INFO] Бот остановлен.")
 
 
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """
+    Webhook-режим: апдейты принимает aiohttp-сервер health/metrics.
+    Несколько реплик можно ставить за балансировщик — каждая обслуживает свою долю.
+    """
+    if not WEBHOOK_BASE_URL or not WEBHOOK_SECRET:
+        raise RuntimeError(
+            "BOT_MODE=webhook требует WEBHOOK_BASE_URL и WEBHOOK_SECRET в окружении."
+        )
+
+    await start_health_server(dp, bot)
+
+    webhook_url = WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH
+    # set_webhook идемпотентен — каждая реплика может вызывать его при старте
+    await bot.set_webhook(
+        url=webhook_url,
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info("[INFO] Webhook зарегистрирован", url=webhook_url)
+    record_startup_phase("ready")
+
+    # держим процесс живым, апдейты обрабатывает aiohttp
+    await asyncio.Event().wait()
+
+
+async def seed_plans_on_boot(session_pool: async_sessionmaker[AsyncSession]):
+    """UPSERT тарифов + загрузка каталога; ошибка не мешает боту стартовать."""
+    try:
+        async with session_pool() as s:
+            await seed_plans(s)
+    except Exception as e:
+        logger.exception("seed_plans failed", error=str(e))
+
+
+async def plan_catalog_refresher(session_pool: async_sessionmaker[AsyncSession]):
+    """Периодически сверяет каталог тарифов с БД (см. PlanCatalog.refresh)."""
+    while True:
+        await asyncio.sleep(PLAN_CATALOG_REFRESH_SEC)
+        try:
+            async with session_pool() as session:
+                await plan_catalog.refresh(session)
+        except Exception as e:
+            logger.exception("plan_catalog refresh failed", error=str(e))
+
+
 async def billing_notifier(bot: Bot, session_pool: async_sessionmaker[AsyncSession]):
     while True:
         async with session_pool() as session:
@@ -222,17 +284,19 @@ if __name__ == "__main__":
 
     loop = custom_loop()
 
-try:
-    loop.run_until_complete(main())
-except KeyboardInterrupt:
-    logger.info("🛑 Bot stopped by user (KeyboardInterrupt)")
-finally:
-    # 🧩 Завершаем Hawk, чтобы не было "Task was destroyed but it is pending!"
+    # запуск — только под guard: воркеры пула превью (spawn) импортируют этот
+    # модуль как __mp_main__ и не должны поднимать второй бот
     try:
-        from core.monitoring.hawk_setup import close_hawk
+        loop.run_until_complete(main())
+    except KeyboardInterrupt:
+        logger.info("🛑 Bot stopped by user (KeyboardInterrupt)")
+    finally:
+        # 🧩 Завершаем Hawk, чтобы не было "Task was destroyed but it is pending!"
+        try:
+            from core.monitoring.hawk_setup import close_hawk
 
-        asyncio.run(close_hawk())
-    except Exception as e:
-        logger.warning(f"⚠️ Failed to close Hawk cleanly: {e}")
+            asyncio.run(close_hawk())
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to close Hawk cleanly: {e}")
 
-    loop.close()
+        loop.close()
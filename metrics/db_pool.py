@@ -0,0 +1,106 @@
+# metrics/db_pool.py
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from metrics.registry import registry
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured pool size (without overflow)",
+    ["pool"],
+    registry=registry,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    ["pool"],
+    registry=registry,
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Overflow connections currently open",
+    ["pool"],
+    registry=registry,
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    registry=registry,
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that failed with pool timeout",
+    ["pool"],
+    registry=registry,
+)
+DB_POOL_CONNECTIONS_CREATED = Counter(
+    "db_pool_connections_created_total",
+    "New DBAPI connections opened by the pool",
+    ["pool"],
+    registry=registry,
+)
+DB_POOL_INVALIDATIONS = Counter(
+    "db_pool_invalidations_total",
+    "Connections invalidated (errors, pre-ping failures, recycle)",
+    ["pool", "kind"],  # kind: hard | soft
+    registry=registry,
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool, который замеряет ожидание соединения.
+    Метка pool — это pool_logging_name engine (сохраняется при dispose/recreate).
+    """
+
+    @property
+    def metrics_name(self) -> str:
+        return self._orig_logging_name or "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.labels(pool=self.metrics_name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(pool=self.metrics_name).observe(
+                time.perf_counter() - start
+            )
+
+
+def instrument_pool(engine: AsyncEngine) -> None:
+    """Подключает метрики пула engine к общему реестру (метка pool — имя пула)."""
+    pool = engine.sync_engine.pool
+    name = pool.metrics_name
+
+    # пул пересоздаётся при engine.dispose(), поэтому берём актуальный каждый раз
+    def current():
+        return engine.sync_engine.pool
+
+    DB_POOL_SIZE.labels(pool=name).set_function(lambda: current().size())
+    DB_POOL_CHECKED_OUT.labels(pool=name).set_function(lambda: current().checkedout())
+    # overflow() отрицательный, пока пул не заполнен до pool_size
+    DB_POOL_OVERFLOW.labels(pool=name).set_function(
+        lambda: max(current().overflow(), 0)
+    )
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTIONS_CREATED.labels(pool=name).inc()
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        DB_POOL_INVALIDATIONS.labels(pool=name, kind="hard").inc()
+
+    @event.listens_for(pool, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+        DB_POOL_INVALIDATIONS.labels(pool=name, kind="soft").inc()
@@ -0,0 +1,127 @@
+# metrics/db_statements.py
+import contextvars
+import time
+from collections import Counter as StatementCounter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import structlog
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import DB_N_PLUS_ONE_THRESHOLD
+from core.context import request_id
+from metrics.registry import registry
+
+logger = structlog.get_logger(__name__)
+
+DB_STATEMENTS_PER_UPDATE = Histogram(
+    "db_statements_per_update",
+    "SQL statements executed while handling one update",
+    ["handler"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 64, 128),
+    registry=registry,
+)
+DB_TIME_PER_UPDATE = Histogram(
+    "db_time_per_update_seconds",
+    "Total time spent in SQL statements while handling one update",
+    ["handler"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    registry=registry,
+)
+DB_N_PLUS_ONE_TOTAL = Counter(
+    "db_n_plus_one_total",
+    "Updates where one statement repeated at least DB_N_PLUS_ONE_THRESHOLD times",
+    ["handler"],
+    registry=registry,
+)
+
+
+class StatementStats:
+    """
+    Счётчик SQL одного апдейта (или блока в тесте).
+    Вложенные блоки отдают свои запросы и родителю.
+    """
+
+    __slots__ = ("handler", "count", "duration", "statements", "parent")
+
+    def __init__(self, handler: str, parent: Optional["StatementStats"] = None):
+        self.handler = handler
+        self.count = 0
+        self.duration = 0.0
+        self.statements: StatementCounter[str] = StatementCounter()
+        self.parent = parent
+
+    def record(self, statement: str, duration: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += duration
+            stats.statements[statement] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: int = DB_N_PLUS_ONE_THRESHOLD) -> list[tuple]:
+        """Запросы, выполненные >= threshold раз (типичный N+1)."""
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        lines = [f"{self.count} statement(s), {self.duration * 1000:.1f} ms"]
+        for statement, n in self.statements.most_common():
+            lines.append(f"  {n:>4} × {' '.join(statement.split())[:200]}")
+        return "\n".join(lines)
+
+
+_current: contextvars.ContextVar[Optional[StatementStats]] = contextvars.ContextVar(
+    "db_statement_stats", default=None
+)
+
+
+# Слушатели на классе Engine — работают для всех engine процесса (primary,
+# реплика, тестовые). Пока блок track_statements не открыт, это одна проверка contextvar.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._stats_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_stats_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+@contextmanager
+def track_statements(handler: str = "unknown") -> Iterator[StatementStats]:
+    """Считает SQL, выполненные внутри блока (в том числе в дочерних задачах)."""
+    stats = StatementStats(handler, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def observe_statements(stats: StatementStats) -> None:
+    """Метрики апдейта; request_id уходит в exemplar и в лог N+1."""
+    exemplar = {"request_id": rid} if (rid := request_id.get()) else None
+    DB_STATEMENTS_PER_UPDATE.labels(handler=stats.handler).observe(
+        stats.count, exemplar=exemplar
+    )
+    DB_TIME_PER_UPDATE.labels(handler=stats.handler).observe(
+        stats.duration, exemplar=exemplar
+    )
+
+    repeated = stats.repeated()
+    if repeated:
+        DB_N_PLUS_ONE_TOTAL.labels(handler=stats.handler).inc()
+        statement, times = repeated[0]
+        logger.warning(
+            "possible N+1 query",
+            handler=stats.handler,
+            times=times,
+            statements=stats.count,
+            statement=" ".join(statement.split())[:300],
+        )
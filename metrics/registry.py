@@ -0,0 +1,6 @@
+# metrics/registry.py
+from prometheus_client import CollectorRegistry
+
+# Общий реестр, который отдаёт /metrics в main.py.
+# Отдельный от default REGISTRY, чтобы избежать дубликатов при повторных импортах.
+registry = CollectorRegistry()
@@ -6,6 +6,7 @@ from aiogram.types import Message, CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from models import User
+from services.principal import Principal
 
 logger = logging.getLogger(__name__)
 
@@ -17,16 +18,17 @@ class CompanyMiddleware(BaseMiddleware):
         event: Message | CallbackQuery,
         data: Dict[str, Any],
     ) -> Any:
-        user: User = data.get("user")
+        principal: Principal = data.get("principal")
         session: AsyncSession = data.get("session")
-        if not user:
+        if not principal:
             raise RuntimeError(
                 "CompanyMiddleware must run after RoleCheckerMiddleware."
             )
         if not session:
             raise RuntimeError("DbSessionMiddleware must run before CompanyMiddleware.")
 
-        data["has_company"] = user.company_id is not None
+        user: User = principal.user
+        data["has_company"] = principal.has_company
         logger.info(
             "CompanyMiddleware: tg_id=%s has_company=%s company_id=%s",
             user.tg_id,
@@ -35,7 +37,18 @@ class CompanyMiddleware(BaseMiddleware):
         )
 
         cid = user.company_id if user.company_id is not None else -1
-        # имя настройки синхронизировано: app.company_id
-        await session.execute(text(f"SET LOCAL app.company_id = {cid}"))
+        # имя настройки синхронизировано: app.company_id.
+        # Новые транзакции получат его в database.mark_session_used.
+        # Если соединение уже взято (только что созданный пользователь),
+        # а resolve_principal его не выставлял — выставляем сейчас.
+        session.info["company_id"] = cid
+        read_session = data.get("read_session")
+        if read_session is not None:
+            read_session.info["company_id"] = cid
+        if not principal.tenant_applied and session.info.get("db_used"):
+            await session.execute(
+                text("SELECT set_config('app.company_id', :cid, true)"),
+                {"cid": str(cid)},
+            )
 
         return await handler(event, data)
@@ -1,40 +1,122 @@
 # middlewares/db_middleware.py
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from typing import Callable, Dict, Any
 import time
 import structlog
 from prometheus_client import Counter, Histogram
 
+from metrics.db_statements import observe_statements, track_statements
+from metrics.registry import registry
+from middlewares.metrics_middleware import handler_name
+
 logger = structlog.get_logger()
 
-DB_REQUESTS_TOTAL = Counter("db_requests_total", "Total DB session usages", ["status"])
+# session: used — апдейт хотя бы раз ходил в БД, unused — соединение из пула не брали
+DB_REQUESTS_TOTAL = Counter(
+    "db_requests_total",
+    "Total DB session usages",
+    ["status", "session"],
+    registry=registry,
+)
 DB_REQUEST_DURATION = Histogram(
-    "db_request_duration_seconds", "DB session duration in seconds", ["status"]
+    "db_request_duration_seconds",
+    "DB session duration in seconds",
+    ["status", "session"],
+    registry=registry,
+)
+# Исход транзакции апдейта; исключения из хэндлера видны в db_requests_total{status="error"}
+DB_TRANSACTIONS_TOTAL = Counter(
+    "db_update_transactions_total",
+    "Update transactions finished by DbSessionMiddleware",
+    ["outcome"],
+    registry=registry,
 )
 
 
 class DbSessionMiddleware(BaseMiddleware):
-    """Best-practice: чистая работа с БД + метрики, без зависимости от Hawk."""
+    """
+    Best-practice: чистая работа с БД + метрики, без зависимости от Hawk.
+
+    AsyncSession ленивая: соединение из пула берётся только на первом запросе
+    (см. database.mark_session_used), поэтому апдейты без запросов к БД
+    не занимают слот пула и не делают round trip.
+
+    data["read_session"] — сессия для чтения. У хэндлеров с flags={"read_only": True}
+    это сессия реплики (если она настроена и не отстаёт), у остальных — та же
+    data["session"]. Записи всегда идут через data["session"] (primary).
 
-    def __init__(self, session_pool):
+    Unit of work: апдейт — одна транзакция. Сервисы и хэндлеры только добавляют
+    объекты и делают flush, когда нужен id; commit один — здесь, после хэндлера.
+    Исключение из хэндлера — rollback (его делает закрытие сессии). Если хэндлер
+    сам поймал ошибку flush, транзакция уже неактивна — тоже rollback, не commit.
+    Побочные эффекты «после записи» — через database.on_commit.
+
+    Все SQL апдейта (включая commit/rollback и запросы других middleware ниже
+    по цепочке) считаются в metrics.db_statements с меткой handler.
+    """
+
+    def __init__(self, session_pool, replica=None):
         super().__init__()
         self.session_pool = session_pool
+        self.replica = replica
 
     async def __call__(self, handler: Callable, event, data: Dict[str, Any]) -> Any:
+        with track_statements(handler_name(data)) as stats:
+            try:
+                return await self._handle(handler, event, data, stats)
+            finally:
+                observe_statements(stats)
+
+    async def _handle(self, handler: Callable, event, data, stats) -> Any:
         start = time.monotonic()
         status = "ok"
+        used = False
         try:
             async with self.session_pool() as session:
                 data["session"] = session
-                result = await handler(event, data)
-                return result
+                data["read_session"] = session
+                try:
+                    read_pool = None
+                    if self.replica and get_flag(data, "read_only"):
+                        read_pool = self.replica.read_pool()
+                    if read_pool is None:
+                        result = await handler(event, data)
+                    else:
+                        async with read_pool() as read_session:
+                            data["read_session"] = read_session
+                            result = await handler(event, data)
+                    await self._finish(session)
+                    return result
+                finally:
+                    used = session.info.get("db_used", False)
         except Exception:
             status = "error"
             raise
         finally:
             duration = time.monotonic() - start
-            DB_REQUESTS_TOTAL.labels(status=status).inc()
-            DB_REQUEST_DURATION.labels(status=status).observe(duration)
+            usage = "used" if used else "unused"
+            DB_REQUESTS_TOTAL.labels(status=status, session=usage).inc()
+            DB_REQUEST_DURATION.labels(status=status, session=usage).observe(duration)
             logger.info(
-                "DB session finished", duration=f"{duration:.3f}s", status=status
+                "DB session finished",
+                duration=f"{duration:.3f}s",
+                status=status,
+                session=usage,
+                statements=stats.count,
+                db_time=f"{stats.duration:.3f}s",
             )
+
+    @staticmethod
+    async def _finish(session) -> None:
+        """Единственный commit апдейта; без транзакции (в БД не ходили) — ничего."""
+        transaction = session.get_transaction()
+        if transaction is None:
+            return
+        if not transaction.is_active:
+            # хэндлер поймал ошибку flush и ответил пользователю сам
+            await session.rollback()
+            DB_TRANSACTIONS_TOTAL.labels(outcome="rollback").inc()
+            return
+        await session.commit()
+        DB_TRANSACTIONS_TOTAL.labels(outcome="commit").inc()
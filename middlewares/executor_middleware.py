@@ -0,0 +1,49 @@
+# middlewares/executor_middleware.py
+from typing import Any, Awaitable, Callable, Dict
+
+import structlog
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import Update
+
+from core.update_executor import ChatPartitionedExecutor
+
+logger = structlog.get_logger(__name__)
+
+
+class UpdateExecutorMiddleware(BaseMiddleware):
+    """
+    Outer-middleware для dp.update: пропускает апдейт через ChatPartitionedExecutor.
+    Ключ партиции — chat_id (или tg_id, если чата нет), поэтому два быстрых
+    нажатия одного пользователя не гоняются за одно FSM-состояние.
+    """
+
+    def __init__(self, executor: ChatPartitionedExecutor):
+        super().__init__()
+        self.executor = executor
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        chat = data.get("event_chat")
+        usr = data.get("event_from_user")
+        key = chat.id if chat else (usr.id if usr else None)
+
+        if key is None:
+            # служебные апдейты без чата/пользователя — без очереди
+            return await handler(event, data)
+
+        future = self.executor.submit(key, lambda: handler(event, data))
+        if future is None:
+            logger.warning(
+                "update shed: executor queue is full",
+                update_id=event.update_id,
+                chat_id=key,
+                pending=self.executor.pending,
+            )
+            return UNHANDLED
+
+        return await future
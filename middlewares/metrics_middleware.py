@@ -9,6 +9,12 @@ ERRORS = None
 LATENCY = None
 
 
+def handler_name(data: dict) -> str:
+    """Имя функции-хэндлера апдейта (aiogram кладёт HandlerObject в data["handler"])."""
+    callback = getattr(data.get("handler"), "callback", None)
+    return getattr(callback, "__name__", "unknown")
+
+
 def init_metrics(registry: CollectorRegistry):
     global REQUESTS, ERRORS, LATENCY
     REQUESTS = Counter(
@@ -33,7 +39,7 @@ class MetricsMiddleware:
         pass
 
     async def __call__(self, handler, event, data):
-        handler_name = getattr(handler, "__name__", "unknown")
+        name = handler_name(data)
 
         # ✅ Добавляем вот этот блок:
         if REQUESTS is None:
@@ -42,11 +48,11 @@ class MetricsMiddleware:
 
         start = time.time()
         try:
-            REQUESTS.labels(handler=handler_name).inc()
+            REQUESTS.labels(handler=name).inc()
             result = await handler(event, data)
             return result
         except Exception:
-            ERRORS.labels(handler=handler_name).inc()
+            ERRORS.labels(handler=name).inc()
             raise
         finally:
-            LATENCY.labels(handler=handler_name).observe(time.time() - start)
+            LATENCY.labels(handler=name).observe(time.time() - start)
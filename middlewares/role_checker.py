@@ -1,10 +1,12 @@
 import logging
+from functools import partial
 from typing import Callable, Awaitable, Any, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from database import on_commit
 from models.user import User
+from services.principal import Principal, get_principal, invalidate_principal
 from utils.enums import UserRole
 
 logger = logging.getLogger(__name__)
@@ -32,11 +34,11 @@ class RoleCheckerMiddleware(BaseMiddleware):
         if tg_id is None:
             return await handler(event, data)
 
-        # ищем по tg_id, а не по id
-        result = await session.execute(select(User).where(User.tg_id == tg_id))
-        user = result.scalar_one_or_none()
+        # ищем по tg_id, а не по id; сначала в кэше, иначе одним запросом
+        # вместе с компанией, trial и подпиской
+        principal = await get_principal(session, tg_id)
 
-        if not user:
+        if not principal:
             user = User(
                 tg_id=tg_id,
                 role=UserRole.worker,  # или UserRole.WORKER.value, если нужно строковое значение
@@ -44,7 +46,14 @@ class RoleCheckerMiddleware(BaseMiddleware):
             )
             session.add(user)
             await session.flush()
+            on_commit(session, partial(invalidate_principal, tg_id))
             logger.info("Новый пользователь %s создан.", tg_id)
+            principal = Principal(user)
 
-        data["user"] = user
+        if principal.user.is_deleted:
+            logger.info("Апдейт удалённого пользователя %s пропущен.", tg_id)
+            return None
+
+        data["principal"] = principal
+        data["user"] = principal.user
         return await handler(event, data)
@@ -0,0 +1,35 @@
+"""telegram file_id on files
+
+Revision ID: 0a6d3f9b8e21
+Revises: f2c84e0b6d17
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0a6d3f9b8e21"
+down_revision: Union[str, Sequence[str], None] = "f2c84e0b6d17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # nullable без default — только каталог, без перезаписи files
+    op.add_column("files", sa.Column("tg_file_id", sa.String(), nullable=True))
+    op.add_column("files", sa.Column("tg_file_unique_id", sa.String(), nullable=True))
+    op.add_column(
+        "files", sa.Column("tg_file_type", sa.String(length=16), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("files", "tg_file_type")
+    op.drop_column("files", "tg_file_unique_id")
+    op.drop_column("files", "tg_file_id")
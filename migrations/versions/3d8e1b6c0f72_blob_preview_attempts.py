@@ -0,0 +1,34 @@
+"""blob preview attempts
+
+Revision ID: 3d8e1b6c0f72
+Revises: 8b3f6d0e4a57
+Create Date: 2026-10-19 02:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3d8e1b6c0f72"
+down_revision: Union[str, Sequence[str], None] = "8b3f6d0e4a57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # константный default в PostgreSQL 11+ пишется в каталог, blobs не переписывается
+    op.add_column(
+        "blobs",
+        sa.Column(
+            "preview_attempts", sa.SmallInteger(), nullable=False, server_default="0"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("blobs", "preview_attempts")
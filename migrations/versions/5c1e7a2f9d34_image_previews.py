@@ -0,0 +1,33 @@
+"""image preview and thumbnail keys
+
+Revision ID: 5c1e7a2f9d34
+Revises: 0a6d3f9b8e21
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5c1e7a2f9d34"
+down_revision: Union[str, Sequence[str], None] = "0a6d3f9b8e21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # nullable без default — только каталог, без перезаписи таблиц
+    for table in ("blobs", "files"):
+        op.add_column(table, sa.Column("preview_s3_key", sa.String(), nullable=True))
+        op.add_column(table, sa.Column("thumbnail_s3_key", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("files", "blobs"):
+        op.drop_column(table, "thumbnail_s3_key")
+        op.drop_column(table, "preview_s3_key")
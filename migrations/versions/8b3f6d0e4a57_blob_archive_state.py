@@ -0,0 +1,35 @@
+"""blob archive state
+
+Revision ID: 8b3f6d0e4a57
+Revises: 5c1e7a2f9d34
+Create Date: 2026-10-19 00:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8b3f6d0e4a57"
+down_revision: Union[str, Sequence[str], None] = "5c1e7a2f9d34"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # nullable без default — только каталог, без перезаписи blobs
+    op.add_column(
+        "blobs", sa.Column("archived_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column(
+        "blobs", sa.Column("storage_class", sa.String(length=32), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("blobs", "storage_class")
+    op.drop_column("blobs", "archived_at")
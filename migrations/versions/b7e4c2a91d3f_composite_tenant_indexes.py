@@ -0,0 +1,112 @@
+"""composite tenant indexes
+
+Revision ID: b7e4c2a91d3f
+Revises: 711c8b8f6276
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e4c2a91d3f"
+down_revision: Union[str, Sequence[str], None] = "711c8b8f6276"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY нельзя внутри транзакции — строим индексы без блокировки записи
+    with op.get_context().autocommit_block():
+        # задачи компании по id (ключ пагинации); заменяет ix_tasks_company_id
+        op.create_index(
+            "ix_tasks_company_id_id",
+            "tasks",
+            ["company_id", "id"],
+            postgresql_concurrently=True,
+        )
+        # последняя подписка компании: ORDER BY expires_at DESC LIMIT 1
+        op.create_index(
+            "ix_subscriptions_company_id_expires_at",
+            "subscriptions",
+            ["company_id", sa.text("expires_at DESC")],
+            postgresql_include=["id", "status"],
+            postgresql_concurrently=True,
+        )
+        # напоминания/enforce_expirations по активным подпискам
+        op.create_index(
+            "ix_subscriptions_active_expires_at",
+            "subscriptions",
+            ["expires_at"],
+            postgresql_where=sa.text("status = 'active'"),
+            postgresql_concurrently=True,
+        )
+        # trial компании (последний по id) — раньше индекса не было вовсе
+        op.create_index(
+            "ix_trials_company_id_id",
+            "trials",
+            ["company_id", "id"],
+            postgresql_include=["is_active", "expires_at"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_trials_active_expires_at",
+            "trials",
+            ["expires_at"],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+        # руководители/админы компании (notify_jobs)
+        op.create_index(
+            "ix_users_company_id_role",
+            "users",
+            ["company_id", "role"],
+            postgresql_concurrently=True,
+        )
+        # файлы задачи (и каскадное удаление задач)
+        op.create_index(
+            "ix_files_task_id",
+            "files",
+            ["task_id"],
+            postgresql_concurrently=True,
+        )
+
+        # одноколоночные индексы стали префиксами составных
+        op.drop_index(
+            "ix_tasks_company_id", table_name="tasks", postgresql_concurrently=True
+        )
+        op.drop_index(
+            "ix_subscriptions_company_id",
+            table_name="subscriptions",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_subscriptions_company_id",
+            "subscriptions",
+            ["company_id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tasks_company_id",
+            "tasks",
+            ["company_id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_files_task_id", table_name="files")
+        op.drop_index("ix_users_company_id_role", table_name="users")
+        op.drop_index("ix_trials_active_expires_at", table_name="trials")
+        op.drop_index("ix_trials_company_id_id", table_name="trials")
+        op.drop_index("ix_subscriptions_active_expires_at", table_name="subscriptions")
+        op.drop_index(
+            "ix_subscriptions_company_id_expires_at", table_name="subscriptions"
+        )
+        op.drop_index("ix_tasks_company_id_id", table_name="tasks")
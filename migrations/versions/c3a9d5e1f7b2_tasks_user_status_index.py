@@ -0,0 +1,45 @@
+"""tasks keyset index for /my_tasks
+
+Revision ID: c3a9d5e1f7b2
+Revises: b7e4c2a91d3f
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3a9d5e1f7b2"
+down_revision: Union[str, Sequence[str], None] = "b7e4c2a91d3f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        # keyset-пагинация /my_tasks: WHERE user_id = ? AND (status, id) > (?, ?)
+        op.create_index(
+            "ix_tasks_user_id_status_id",
+            "tasks",
+            ["user_id", "status", "id"],
+            postgresql_concurrently=True,
+        )
+        # одиночный индекс — префикс нового
+        op.drop_index(
+            "ix_tasks_user_id", table_name="tasks", postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_user_id",
+            "tasks",
+            ["user_id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_tasks_user_id_status_id", table_name="tasks")
@@ -0,0 +1,86 @@
+"""picker keyset and trigram search indexes
+
+Revision ID: d41f8a6b2c90
+Revises: c3a9d5e1f7b2
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d41f8a6b2c90"
+down_revision: Union[str, Sequence[str], None] = "c3a9d5e1f7b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ILIKE '%...%' по индексу — только через триграммы
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        # keyset-пагинация пикеров /upload: WHERE <parent> = ? AND id > ? ORDER BY id
+        op.create_index(
+            "ix_projects_company_id_id",
+            "projects",
+            ["company_id", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tasks_project_id_id",
+            "tasks",
+            ["project_id", "id"],
+            postgresql_concurrently=True,
+        )
+        # поиск по подстроке названия
+        op.create_index(
+            "ix_projects_name_trgm",
+            "projects",
+            ["name"],
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tasks_title_trgm",
+            "tasks",
+            ["title"],
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+        )
+
+        op.drop_index(
+            "ix_projects_company_id",
+            table_name="projects",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_tasks_project_id", table_name="tasks", postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_project_id",
+            "tasks",
+            ["project_id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_projects_company_id",
+            "projects",
+            ["company_id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_tasks_title_trgm", table_name="tasks")
+        op.drop_index("ix_projects_name_trgm", table_name="projects")
+        op.drop_index("ix_tasks_project_id_id", table_name="tasks")
+        op.drop_index("ix_projects_company_id_id", table_name="projects")
+    # расширение оставляем: его могут использовать и другие объекты
@@ -0,0 +1,110 @@
+"""soft delete: partial live-row indexes and storage deletion queue
+
+Revision ID: e5b17c3d9a42
+Revises: d41f8a6b2c90
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b17c3d9a42"
+down_revision: Union[str, Sequence[str], None] = "d41f8a6b2c90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE = sa.text("deleted_at IS NULL")
+DELETED = sa.text("deleted_at IS NOT NULL")
+
+# (индекс, таблица, колонки, доп. параметры create_index) — горячие списки
+# читают только живые строки, поэтому индексы становятся частичными
+HOT_INDEXES = [
+    ("ix_tasks_user_id_status_id", "tasks", ["user_id", "status", "id"], {}),
+    (
+        "ix_tasks_title_trgm",
+        "tasks",
+        ["title"],
+        {"postgresql_using": "gin", "postgresql_ops": {"title": "gin_trgm_ops"}},
+    ),
+    (
+        "ix_projects_company_id_id",
+        "projects",
+        ["company_id", "id"],
+        {"postgresql_include": ["name"]},
+    ),
+    (
+        "ix_projects_name_trgm",
+        "projects",
+        ["name"],
+        {"postgresql_using": "gin", "postgresql_ops": {"name": "gin_trgm_ops"}},
+    ),
+    ("ix_users_company_id_role", "users", ["company_id", "role"], {}),
+]
+
+
+def _swap_index(name, table, columns, **kw) -> None:
+    """Пересоздаёт индекс без окна, когда его нет: новый рядом, старый долой, rename."""
+    op.create_index(f"{name}_new", table, columns, postgresql_concurrently=True, **kw)
+    op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    op.execute(f"ALTER INDEX {name}_new RENAME TO {name}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "storage_deletions",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("s3_key", sa.String(), nullable=False),
+        sa.Column(
+            "attempts", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+        sa.Column(
+            "queued_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    with op.get_context().autocommit_block():
+        for name, table, columns, kw in HOT_INDEXES:
+            _swap_index(name, table, columns, postgresql_where=LIVE, **kw)
+
+        # очередь purge: WHERE deleted_at < cutoff ORDER BY deleted_at
+        op.create_index(
+            "ix_tasks_deleted_at",
+            "tasks",
+            ["deleted_at"],
+            postgresql_where=DELETED,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_projects_deleted_at",
+            "projects",
+            ["deleted_at"],
+            postgresql_where=DELETED,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_projects_deleted_at",
+            table_name="projects",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_tasks_deleted_at", table_name="tasks", postgresql_concurrently=True
+        )
+        for name, table, columns, kw in HOT_INDEXES:
+            kw = {k: v for k, v in kw.items() if k != "postgresql_include"}
+            _swap_index(name, table, columns, **kw)
+
+    op.drop_table("storage_deletions")
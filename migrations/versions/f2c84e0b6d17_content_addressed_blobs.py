@@ -0,0 +1,91 @@
+"""content-addressed blobs with reference counting
+
+Revision ID: f2c84e0b6d17
+Revises: e5b17c3d9a42
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c84e0b6d17"
+down_revision: Union[str, Sequence[str], None] = "e5b17c3d9a42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "blobs",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("company_id", sa.BigInteger(), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("s3_key", sa.String(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("mime_type", sa.String(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("file_unique_id", sa.String(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("company_id", "sha256", name="uq_blobs_company_id_sha256"),
+        sa.UniqueConstraint("s3_key"),
+    )
+    op.create_index(
+        "ix_blobs_company_id_file_unique_id",
+        "blobs",
+        ["company_id", "file_unique_id"],
+        postgresql_where=sa.text("file_unique_id IS NOT NULL"),
+    )
+
+    # nullable без default — ALTER только меняет каталог, таблицу не переписывает
+    op.add_column("files", sa.Column("blob_id", sa.BigInteger(), nullable=True))
+    # NOT VALID: существующие строки не проверяются (у них blob_id NULL)
+    op.create_foreign_key(
+        "files_blob_id_fkey",
+        "files",
+        "blobs",
+        ["blob_id"],
+        ["id"],
+        postgresql_not_valid=True,
+    )
+    # один s3_key теперь у всех File, ссылающихся на общий blob
+    op.drop_constraint("files_s3_key_key", "files", type_="unique")
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_files_blob_id",
+            "files",
+            ["blob_id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_files_blob_id", table_name="files", postgresql_concurrently=True
+        )
+    # до отката дубликаты s3_key нужно развести вручную, иначе уникальность не встанет
+    op.create_unique_constraint("files_s3_key_key", "files", ["s3_key"])
+    op.drop_constraint("files_blob_id_fkey", "files", type_="foreignkey")
+    op.drop_column("files", "blob_id")
+    op.drop_index("ix_blobs_company_id_file_unique_id", table_name="blobs")
+    op.drop_table("blobs")
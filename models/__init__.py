@@ -5,6 +5,7 @@ from .company import Company
 from .project import Project
 from .task import Task
 from .file import File
+from .blob import Blob
 from .trial import Trial
 from .plan import Plan
 from .subscription import Subscription
@@ -12,6 +13,7 @@ from .session import Session
 from .invoice import Invoice
 from .payment import Payment
 from .audit_log import AuditLog
+from .storage_deletion import StorageDeletion
 
 __all__ = [
     "Base",
@@ -20,6 +22,7 @@ __all__ = [
     "Project",
     "Task",
     "File",
+    "Blob",
     "Trial",
     "Plan",
     "Subscription",
@@ -27,4 +30,5 @@ __all__ = [
     "Invoice",
     "Payment",
     "AuditLog",
+    "StorageDeletion",
 ]
@@ -15,4 +15,17 @@ class TimestampMixin:
     )
 
 
+class SoftDeleteMixin:
+    """
+    Мягкое удаление: строка помечается deleted_at и пропадает из ORM-запросов
+    (см. database.filter_soft_deleted). Физически её удаляет services.purge.
+    """
+
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def is_deleted(self) -> bool:
+        return self.deleted_at is not None
+
+
 Base = declarative_base()
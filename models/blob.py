@@ -0,0 +1,59 @@
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    String,
+    Integer,
+    SmallInteger,
+    ForeignKey,
+    DateTime,
+    Index,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import relationship
+from .base import Base, TimestampMixin
+
+
+class Blob(Base, TimestampMixin):
+    """
+    Содержимое файла в S3, общее для всех File компании с тем же sha256.
+    ref_count — число File, ссылающихся на blob; на нуле объект уходит
+    в storage_deletions (services.blobs.release_blobs).
+    """
+
+    __tablename__ = "blobs"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    company_id = Column(
+        BigInteger,
+        ForeignKey("companies.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    sha256 = Column(String(64), nullable=False)
+    s3_key = Column(String, unique=True, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    mime_type = Column(String, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=1)
+    # file_unique_id Telegram: повторная отправка того же файла находит blob
+    # без скачивания и хэширования
+    file_unique_id = Column(String, nullable=True)
+    # уменьшенные JPEG для картинок (services.previews); пока не готовы — None
+    preview_s3_key = Column(String, nullable=True)
+    thumbnail_s3_key = Column(String, nullable=True)
+    # попытки фонового добора превью (worker.py), чтобы не мучить битые картинки
+    preview_attempts = Column(SmallInteger, nullable=False, server_default="0")
+    # services.archive: когда объект переложен в архив (s3_key тогда — <ключ>.gz
+    # или прежний, если формат уже сжат) и в какой класс хранения
+    archived_at = Column(DateTime(timezone=True), nullable=True)
+    storage_class = Column(String(32), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("company_id", "sha256", name="uq_blobs_company_id_sha256"),
+        Index(
+            "ix_blobs_company_id_file_unique_id",
+            company_id,
+            file_unique_id,
+            postgresql_where=file_unique_id.isnot(None),
+        ),
+    )
+
+    files = relationship("File", back_populates="blob")
@@ -9,7 +9,10 @@ class File(Base, TimestampMixin):
     id = Column(BigInteger, primary_key=True, autoincrement=True)
 
     task_id = Column(
-        BigInteger, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False
+        BigInteger,
+        ForeignKey("tasks.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
     )
     company_id = Column(
         BigInteger,
@@ -21,12 +24,25 @@ class File(Base, TimestampMixin):
         BigInteger, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
     )
 
-    s3_key = Column(String, unique=True, nullable=False)
+    # содержимое — общий blob компании (None у файлов, загруженных до дедупликации);
+    # s3_key дублирует blob.s3_key, чтобы /get_file обходился без join
+    blob_id = Column(BigInteger, ForeignKey("blobs.id"), nullable=True, index=True)
+    s3_key = Column(String, nullable=False)
     original_name = Column(String, nullable=False)
     size = Column(BigInteger, nullable=False)
     mime_type = Column(String, nullable=False)
+    # превью и миниатюра — копия ключей blob (services.previews), тоже без join
+    preview_s3_key = Column(String, nullable=True)
+    thumbnail_s3_key = Column(String, nullable=True)
+
+    # Telegram уже хранит файл: /get_file пересылает его по file_id без S3.
+    # file_id привязан к боту и типу отправки (photo/document)
+    tg_file_id = Column(String, nullable=True)
+    tg_file_unique_id = Column(String, nullable=True)
+    tg_file_type = Column(String(16), nullable=True)
 
     # Связи
     task = relationship("Task", back_populates="files")
+    blob = relationship("Blob", back_populates="files")
     uploader = relationship("User", back_populates="files")
     company = relationship("Company", back_populates="files")
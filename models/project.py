@@ -1,9 +1,11 @@
-from sqlalchemy import Column, BigInteger, String, ForeignKey, DateTime
+from sqlalchemy import Column, BigInteger, String, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
-from .base import Base, TimestampMixin
+from .base import Base, SoftDeleteMixin, TimestampMixin
 
+LIVE = text("deleted_at IS NULL")
 
-class Project(Base, TimestampMixin):
+
+class Project(Base, TimestampMixin, SoftDeleteMixin):
     __tablename__ = "projects"
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -12,10 +14,35 @@ class Project(Base, TimestampMixin):
         BigInteger,
         ForeignKey("companies.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
 
-    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    __table_args__ = (
+        # пикер проектов в /upload: keyset по id внутри компании (index-only
+        # благодаря INCLUDE name) + поиск по названию; только живые строки
+        Index(
+            "ix_projects_company_id_id",
+            company_id,
+            id,
+            postgresql_include=["name"],
+            postgresql_where=LIVE,
+        ),
+        Index(
+            "ix_projects_name_trgm",
+            name,
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            postgresql_where=LIVE,
+        ),
+        # очередь services.purge
+        Index(
+            "ix_projects_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
+
+    # created_at/updated_at приходят в RETURNING того же INSERT
+    __mapper_args__ = {"eager_defaults": True}
 
     company = relationship("Company", back_populates="projects")
     tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, Integer, text
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class StorageDeletion(Base):
+    """
+    Очередь объектов S3 на удаление. Строки пишутся в той же транзакции,
+    что и удаление записей files (services.purge), поэтому ключ не теряется
+    при падении между БД и S3; разбирает её services.purge.drain_storage_deletions.
+    """
+
+    __tablename__ = "storage_deletions"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    s3_key = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    queued_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -14,7 +14,6 @@ class Subscription(Base):
         BigInteger,
         ForeignKey("companies.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     plan_id = Column(
         BigInteger, ForeignKey("plans.id", ondelete="CASCADE"), nullable=False
@@ -41,6 +40,22 @@ class Subscription(Base):
     created_by = Column(BigInteger, nullable=True)
     updated_by = Column(BigInteger, nullable=True)
 
+    __table_args__ = (
+        # последняя подписка компании (ORDER BY expires_at DESC) без обращения к heap
+        Index(
+            "ix_subscriptions_company_id_expires_at",
+            company_id,
+            expires_at.desc(),
+            postgresql_include=["id", "status"],
+        ),
+        # активные подписки с близким сроком (notify_jobs)
+        Index(
+            "ix_subscriptions_active_expires_at",
+            expires_at,
+            postgresql_where=text("status = 'active'"),
+        ),
+    )
+
     # Связи
     company = relationship("Company", back_populates="subscriptions")
     plan = relationship("Plan", back_populates="subscriptions")
@@ -1,10 +1,21 @@
-from sqlalchemy import Column, BigInteger, String, ForeignKey, Enum, Text, DateTime
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    String,
+    ForeignKey,
+    Enum,
+    Text,
+    Index,
+    text,
+)
 from sqlalchemy.orm import relationship
-from .base import Base, TimestampMixin
+from .base import Base, SoftDeleteMixin, TimestampMixin
 from utils.enums import TaskStatus
 
+LIVE = text("deleted_at IS NULL")
 
-class Task(Base, TimestampMixin):
+
+class Task(Base, TimestampMixin, SoftDeleteMixin):
     __tablename__ = "tasks"
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -21,22 +32,44 @@ class Task(Base, TimestampMixin):
         BigInteger,
         ForeignKey("projects.id", ondelete="CASCADE"),
         nullable=True,
-        index=True,
     )
     company_id = Column(
         BigInteger,
         ForeignKey("companies.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     user_id = Column(
         BigInteger,
         ForeignKey("users.id", ondelete="SET NULL"),
         nullable=True,
-        index=True,
     )
 
-    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    __table_args__ = (
+        # задачи компании по id — заменяет одиночный индекс по company_id
+        Index("ix_tasks_company_id_id", company_id, id),
+        # keyset-пагинация задач пользователя по (status, id), только живые
+        Index("ix_tasks_user_id_status_id", user_id, status, id, postgresql_where=LIVE),
+        # пикер задач в /upload: keyset по id внутри проекта + поиск по заголовку.
+        # Индекс полный: по нему же идёт каскад FK при удалении проекта
+        Index("ix_tasks_project_id_id", project_id, id),
+        Index(
+            "ix_tasks_title_trgm",
+            title,
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+            postgresql_where=LIVE,
+        ),
+        # очередь services.purge
+        Index(
+            "ix_tasks_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
+
+    # status/created_at/updated_at приходят в RETURNING того же INSERT —
+    # после flush без refresh (commit только в конце апдейта)
+    __mapper_args__ = {"eager_defaults": True}
 
     # Связи
     files = relationship("File", back_populates="task", cascade="all, delete-orphan")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, BigInteger, DateTime, Boolean, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import Base
@@ -31,4 +31,18 @@ class Trial(Base):
     created_by = Column(BigInteger, nullable=True)
     updated_by = Column(BigInteger, nullable=True)
 
+    __table_args__ = (
+        Index(
+            "ix_trials_company_id_id",
+            company_id,
+            id,
+            postgresql_include=["is_active", "expires_at"],
+        ),
+        Index(
+            "ix_trials_active_expires_at",
+            expires_at,
+            postgresql_where=text("is_active"),
+        ),
+    )
+
     company = relationship("Company", back_populates="trials")
@@ -1,11 +1,20 @@
-from sqlalchemy import Column, BigInteger, ForeignKey, DateTime, Enum, Boolean, text
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    ForeignKey,
+    DateTime,
+    Enum,
+    Boolean,
+    Index,
+    text,
+)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from .base import Base
+from .base import Base, SoftDeleteMixin
 from utils.enums import UserRole
 
 
-class User(Base):
+class User(Base, SoftDeleteMixin):
     __tablename__ = "users"
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -18,7 +27,6 @@ class User(Base):
     phone_number = Column(BigInteger, nullable=True)
 
     is_active = Column(Boolean, server_default=text("true"), nullable=False)
-    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -30,6 +38,16 @@ class User(Base):
         nullable=False,
     )
 
+    __table_args__ = (
+        # руководители/админы компании (notify_jobs), удалённые не нужны
+        Index(
+            "ix_users_company_id_role",
+            company_id,
+            role,
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+    )
+
     # Связи
     company = relationship("Company", back_populates="users")
     tasks = relationship("Task", back_populates="user")
@@ -0,0 +1,246 @@
+# scripts/bench_updates.py
+# -*- coding: utf-8 -*-
+"""
+Нагрузочный прогон апдейтов через настоящий Dispatcher.
+
+Собирает Dispatcher через core.dispatcher.build_dispatcher (все middleware:
+DbSession, RoleChecker, Company, SubscriptionChecker, Audit, Context, Metrics),
+подменяет сессию Bot заглушкой (в Telegram ничего не уходит) и кормит
+синтетические Message/CallbackQuery через dp.feed_update на локальном Postgres.
+
+Отчёт: p50/p95/p99 по сценариям, SQL-запросов на апдейт и общий throughput.
+
+Пример:
+    python -m scripts.bench_updates --updates 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.types import CallbackQuery, Chat, Message, Update
+from aiogram.types import User as TgUser
+
+from database import async_engine, async_session_maker
+from core.dispatcher import build_dispatcher
+from metrics.db_statements import track_statements
+from handlers.file_upload import FileUploadState
+from models import Company
+from services.companies import create_company, join_company
+from services.projects import create_project, get_projects_by_company_id
+from services.tasks import create_task
+from services.users import get_or_create_user
+from utils.enums import UserRole
+
+UTC = timezone.utc
+
+# tg_id синтетических пользователей — отдельный диапазон, чтобы не пересекаться с живыми
+BENCH_TG_ID_BASE = 9_000_000_000
+SCENARIOS = ("my_tasks", "add_task", "show_projects", "upload_project")
+
+
+class StubSession(BaseSession):
+    """Сессия Bot без сети: на send/edit отвечает фейковым Message, на прочее — True."""
+
+    def __init__(self):
+        super().__init__()
+        self._ids = itertools.count(1)
+
+    async def close(self) -> None:
+        pass
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None
+    ) -> Any:
+        returning = getattr(method, "__returning__", None)
+        if returning is Message or "Message" in str(returning):
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message(
+                message_id=next(self._ids),
+                date=datetime.now(UTC),
+                chat=Chat(id=int(chat_id), type="private"),
+                text=getattr(method, "text", None),
+            )
+        return True
+
+    async def stream_content(
+        self,
+        url: str,
+        headers=None,
+        timeout=30,
+        chunk_size=65536,
+        raise_for_status=True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+
+async def seed(users: int, tasks_per_user: int) -> dict:
+    """Компания с триалом, менеджер, проект и рабочие с задачами."""
+    async with async_session_maker() as session:
+        manager, created = await get_or_create_user(session, BENCH_TG_ID_BASE)
+        await session.commit()
+        if created or not manager.company_id:
+            company = await create_company(session, "BenchCo", created_by=manager.id)
+            await session.commit()
+            company_id = company.id
+        else:
+            company_id = manager.company_id
+
+        projects = await get_projects_by_company_id(session, company_id)
+        project = next((p for p in projects if p.name == "Bench Project"), None)
+        if project is None:
+            project = await create_project(session, "Bench Project", company_id)
+
+        company = await session.get(Company, company_id)
+        workers = []
+        for i in range(1, users + 1):
+            worker, created = await get_or_create_user(session, BENCH_TG_ID_BASE + i)
+            if created or worker.company_id != company_id:
+                await join_company(session, worker, company, UserRole.worker)
+                for n in range(tasks_per_user):
+                    await create_task(
+                        session,
+                        f"Bench task {n}",
+                        "",
+                        project.id,
+                        company_id,
+                        worker.id,
+                    )
+            workers.append(worker.tg_id)
+        await session.commit()
+
+    return {"manager": manager.tg_id, "workers": workers, "project_id": project.id}
+
+
+_update_ids = itertools.count(1)
+
+
+def _tg_user(tg_id: int) -> TgUser:
+    return TgUser(id=tg_id, is_bot=False, first_name="Bench")
+
+
+def _message(tg_id: int, text: str) -> Message:
+    return Message(
+        message_id=next(_update_ids),
+        date=datetime.now(UTC),
+        chat=Chat(id=tg_id, type="private"),
+        from_user=_tg_user(tg_id),
+        text=text,
+    )
+
+
+def build_update(scenario: str, fixtures: dict, n: int) -> Update:
+    manager = fixtures["manager"]
+    worker = fixtures["workers"][n % len(fixtures["workers"])]
+    update_id = next(_update_ids)
+
+    if scenario == "my_tasks":
+        return Update(update_id=update_id, message=_message(worker, "/my_tasks"))
+    if scenario == "add_task":
+        text = f"/add_task {fixtures['project_id']} Bench task {n}"
+        return Update(update_id=update_id, message=_message(manager, text))
+    if scenario == "show_projects":
+        return Update(update_id=update_id, message=_message(manager, "/show_projects"))
+    if scenario == "upload_project":
+        return Update(
+            update_id=update_id,
+            callback_query=CallbackQuery(
+                id=str(update_id),
+                from_user=_tg_user(worker),
+                chat_instance="bench",
+                data=f"upload_project:{fixtures['project_id']}",
+                message=_message(worker, "Выберите проект"),
+            ),
+        )
+    raise ValueError(f"Неизвестный сценарий: {scenario}")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+async def run(args) -> None:
+    fixtures = await seed(args.users, args.tasks_per_user)
+    bot = Bot("42:BENCH", session=StubSession())
+    dp = build_dispatcher(async_session_maker)
+
+    latencies: Dict[str, list[float]] = defaultdict(list)
+    statements: Dict[str, list[int]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    scenarios = args.scenarios or SCENARIOS
+
+    async def feed(scenario: str, n: int):
+        update = build_update(scenario, fixtures, n)
+
+        async with semaphore:
+            if scenario == "upload_project":
+                # callback выбора проекта обрабатывается только в нужном FSM-состоянии
+                tg_id = update.callback_query.from_user.id
+                state = dp.fsm.get_context(bot, tg_id, tg_id)
+                await state.set_state(FileUploadState.waiting_for_project)
+
+            start = time.perf_counter()
+            # SQL считаются и здесь, и в DbSessionMiddleware (вложенный блок)
+            with track_statements(scenario) as stats:
+                try:
+                    await dp.feed_update(bot, update)
+                except Exception:
+                    errors[scenario] += 1
+            latencies[scenario].append(time.perf_counter() - start)
+            statements[scenario].append(stats.count)
+
+    jobs = [feed(scenarios[n % len(scenarios)], n) for n in range(args.updates)]
+    started = time.perf_counter()
+    await asyncio.gather(*jobs)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"\n{'scenario':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'sql/upd':>10}{'errors':>8}"
+    )
+    for scenario in scenarios:
+        values = sorted(latencies[scenario])
+        if not values:
+            continue
+        print(
+            f"{scenario:<16}{len(values):>7}"
+            f"{_percentile(values, 50) * 1000:>10.2f}"
+            f"{_percentile(values, 95) * 1000:>10.2f}"
+            f"{_percentile(values, 99) * 1000:>10.2f}"
+            f"{statistics.mean(statements[scenario]):>10.1f}"
+            f"{errors[scenario]:>8}"
+        )
+    print(
+        f"\nupdates={args.updates} concurrency={args.concurrency} "
+        f"elapsed={elapsed:.2f}s throughput={args.updates / elapsed:.1f} upd/s"
+    )
+
+    await bot.session.close()
+    await async_engine.dispose()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк Dispatcher.feed_update")
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=20, help="число рабочих")
+    parser.add_argument("--tasks-per-user", type=int, default=10)
+    parser.add_argument(
+        "--scenarios", nargs="*", choices=SCENARIOS, help="по умолчанию — все"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
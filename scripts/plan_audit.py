@@ -0,0 +1,667 @@
+# scripts/plan_audit.py
+# -*- coding: utf-8 -*-
+"""
+Аудит планов запросов сервисного слоя.
+
+Прогоняет запросы из services/ на большом наборе данных, перехватывает
+каждый SQL (before_cursor_execute), делает для него EXPLAIN (FORMAT JSON)
+и отмечает Seq Scan по таблицам, где строк >= --min-rows. Все вызовы идут
+внутри внешней транзакции, которая в конце откатывается, — данные не меняются.
+
+--seed один раз наполняет БД синтетикой через generate_series
+(компании «plan-audit N», пользователи с tg_id от 8_000_000_000) и делает ANALYZE.
+
+Пример:
+    python -m scripts.plan_audit --seed --companies 2000
+    python -m scripts.plan_audit --min-rows 5000
+
+Код выхода 1 — найден хотя бы один Seq Scan по большой таблице или в services/
+есть функция с session, которой нет ни в service_calls(), ни в NOT_AUDITED.
+"""
+
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import pkgutil
+import sys
+from datetime import datetime, timedelta, UTC
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+import services
+from database import async_engine, async_session_maker
+from services import audit as audit_log
+from services import (
+    archive,
+    blobs,
+    companies,
+    notify_jobs,
+    previews,
+    principal,
+    projects,
+    purge,
+    reports,
+    subscriptions,
+    tasks,
+    users,
+)
+from services.files import create_file, delete_file, get_file_by_id
+from services.plans import get_plan_by_code, plan_catalog
+from services.seed import seed_plans
+from utils.enums import TaskStatus, UserRole
+
+AUDIT_TG_ID_BASE = 8_000_000_000
+
+SEED_SQL = [
+    """
+    INSERT INTO companies (name)
+    SELECT 'plan-audit ' || n FROM generate_series(1, :companies) AS n
+    """,
+    # первый пользователь компании — manager, остальные — worker
+    """
+    INSERT INTO users (tg_id, role, company_id)
+    SELECT :tg_base + c.id * 1000 + u,
+           (CASE WHEN u = 1 THEN 'manager' ELSE 'worker' END)::user_role,
+           c.id
+    FROM companies c, generate_series(1, :users) AS u
+    WHERE c.id > :first_id
+    """,
+    """
+    INSERT INTO projects (name, company_id)
+    SELECT 'project ' || p, c.id
+    FROM companies c, generate_series(1, :projects) AS p
+    WHERE c.id > :first_id
+    """,
+    """
+    INSERT INTO tasks (title, status, project_id, company_id, user_id)
+    SELECT 'task ' || t,
+           (ARRAY['todo', 'new', 'in_progress', 'ready'])[1 + t % 4]::taskstatus,
+           (SELECT min(p.id) FROM projects p WHERE p.company_id = u.company_id),
+           u.company_id,
+           u.id
+    FROM users u, generate_series(1, :tasks) AS t
+    WHERE u.company_id > :first_id
+    """,
+    """
+    INSERT INTO files (task_id, company_id, uploader_id, s3_key,
+                       original_name, size, mime_type)
+    SELECT t.id, t.company_id, t.user_id, 'plan-audit/' || t.id || '.jpg',
+           'photo.jpg', 1024, 'image/jpeg'
+    FROM tasks t
+    WHERE t.company_id > :first_id AND t.id % 2 = 0
+    """,
+    # blob на каждый файл; sha256 — 64 hex-символа из двух md5
+    """
+    INSERT INTO blobs (company_id, sha256, s3_key, size, mime_type, ref_count,
+                       file_unique_id, created_at, updated_at)
+    SELECT f.company_id, md5(f.s3_key) || md5(f.id::text), f.s3_key, f.size,
+           f.mime_type, 1, 'plan-audit-' || f.id,
+           now() - (f.id % 90) * interval '1 day', now()
+    FROM files f
+    WHERE f.company_id > :first_id
+    """,
+    """
+    UPDATE files f SET blob_id = b.id
+    FROM blobs b
+    WHERE b.s3_key = f.s3_key AND f.company_id > :first_id
+    """,
+    # мягко удалённые задачи и проекты для purge
+    """
+    UPDATE tasks SET deleted_at = now() - (id % 60) * interval '1 day'
+    WHERE company_id > :first_id AND id % 50 = 0
+    """,
+    """
+    UPDATE projects SET deleted_at = now() - (id % 60) * interval '1 day'
+    WHERE company_id > :first_id AND id % 20 = 0
+    """,
+    # триалы: у части компаний заканчиваются в ближайшие дни
+    """
+    INSERT INTO trials (company_id, starts_at, expires_at, is_active)
+    SELECT c.id, now() - interval '30 days',
+           now() - interval '16 days' + (c.id % 20) * interval '1 day',
+           c.id % 20 > 16
+    FROM companies c WHERE c.id > :first_id
+    """,
+    """
+    INSERT INTO subscriptions (company_id, plan_id, status, starts_at, expires_at)
+    SELECT c.id, (SELECT id FROM plans WHERE code = 'pro'),
+           (CASE WHEN m = 0 AND c.id % 3 = 0 THEN 'active' ELSE 'expired' END)
+               ::subscription_status,
+           now() - (m + 1) * interval '30 days',
+           now() - m * interval '30 days' + (c.id % 30) * interval '1 day'
+    FROM companies c, generate_series(0, :months - 1) AS m
+    WHERE c.id > :first_id
+    """,
+]
+
+
+async def seed(args) -> None:
+    """Наполняет БД синтетикой (каждый прогон добавляет ещё --companies компаний)."""
+    async with async_session_maker() as session:
+        await seed_plans(session)
+    params = {
+        "companies": args.companies,
+        "users": args.users,
+        "projects": args.projects,
+        "tasks": args.tasks,
+        "months": args.months,
+        "tg_base": AUDIT_TG_ID_BASE,
+    }
+    async with async_engine.begin() as conn:
+        # новые строки — только у компаний, созданных этим прогоном
+        params["first_id"] = (
+            await conn.execute(text("SELECT coalesce(max(id), 0) FROM companies"))
+        ).scalar()
+        for sql in SEED_SQL:
+            # в каждом запросе только нужные ему параметры
+            used = {k: v for k, v in params.items() if f":{k}" in sql}
+            await conn.execute(text(sql), used)
+        await conn.execute(text("ANALYZE"))
+    print(f"seeded {args.companies} companies")
+
+
+async def fixtures(conn: AsyncConnection) -> dict:
+    """id для вызовов: самая «тяжёлая» компания, её менеджер, задача, файл."""
+    heaviest = text(
+        "SELECT company_id, count(*) AS n FROM tasks"
+        " GROUP BY company_id ORDER BY n DESC LIMIT 1"
+    )
+    row = (await conn.execute(heaviest)).first()
+    if row is None:
+        raise SystemExit("В БД нет задач — запустите с --seed")
+    company_id = row.company_id
+
+    async def scalar(sql: str):
+        return (await conn.execute(text(sql), {"cid": company_id})).scalar()
+
+    return {
+        "company_id": company_id,
+        "company_name": await scalar("SELECT name FROM companies WHERE id = :cid"),
+        "user_id": await scalar(
+            "SELECT id FROM users WHERE company_id = :cid ORDER BY role, id LIMIT 1"
+        ),
+        "tg_id": await scalar(
+            "SELECT tg_id FROM users WHERE company_id = :cid ORDER BY role, id LIMIT 1"
+        ),
+        "project_id": await scalar(
+            "SELECT id FROM projects WHERE company_id = :cid LIMIT 1"
+        ),
+        "task_id": await scalar(
+            "SELECT id FROM tasks WHERE company_id = :cid ORDER BY id DESC LIMIT 1"
+        ),
+        "file_id": await scalar(
+            "SELECT id FROM files WHERE company_id = :cid ORDER BY id DESC LIMIT 1"
+        ),
+        "blob_id": await scalar(
+            "SELECT id FROM blobs WHERE company_id = :cid ORDER BY id DESC LIMIT 1"
+        ),
+        "sha256": await scalar(
+            "SELECT sha256 FROM blobs WHERE company_id = :cid ORDER BY id DESC LIMIT 1"
+        ),
+        "file_unique_id": await scalar(
+            "SELECT file_unique_id FROM blobs WHERE company_id = :cid"
+            " ORDER BY id DESC LIMIT 1"
+        ),
+        "cutoff": datetime.now(UTC) - timedelta(days=30),
+    }
+
+
+class StubBot:
+    """Bot для notify_jobs: сообщения никуда не уходят."""
+
+    async def send_message(self, chat_id, text, **kwargs):
+        return None
+
+
+Call = Callable[[AsyncSession, dict], Awaitable]
+
+# Функции services/ с session, которые аудит не вызывает, и почему.
+# Всё остальное обязано быть в service_calls() — иначе audit() падает.
+NOT_AUDITED = {
+    "blobs.store_blob": "качает из Telegram и пишет в S3; SQL — acquire_*/register_blob",
+    "purge.drain_storage_deletions": "удаляет объекты в S3",
+    "notify_jobs.run_all": "только вызывает notify_*/enforce_expirations",
+    "import_export.export_users": "пишет файл; SQL — get_projects/tasks",
+    "import_export.import_users": "читает файл",
+    "seed.seed_plans": "однократный сид тарифов",
+    "payments.handle_payment_webhook": "обёртка над set_plan_for_company",
+    "companies.join_company": "обёртка над set_user_role_and_company",
+    "pagination.keyset_page": "общий движок; SQL — через get_*_page ниже",
+}
+
+
+async def _with_user(session: AsyncSession, f: dict, call):
+    """Для функций, которым нужна ORM-модель пользователя, а не id."""
+    user = await users.get_user_by_tg_id(session, f["tg_id"])
+    return await call(user)
+
+
+def service_calls() -> List[Tuple[str, Call]]:
+    """Каталог сервисных функций, которые ходят в БД."""
+    bot = StubBot()
+    return [
+        (
+            "users.get_user_by_tg_id",
+            lambda s, f: users.get_user_by_tg_id(s, f["tg_id"]),
+        ),
+        (
+            "users.get_or_create_user",
+            lambda s, f: users.get_or_create_user(s, f["tg_id"]),
+        ),
+        (
+            "principal.resolve_principal",
+            lambda s, f: principal.resolve_principal(s, f["tg_id"]),
+        ),
+        (
+            "companies.get_company_by_id",
+            lambda s, f: companies.get_company_by_id(s, f["company_id"]),
+        ),
+        (
+            "companies.get_company_by_name",
+            lambda s, f: companies.get_company_by_name(s, f["company_name"]),
+        ),
+        (
+            "projects.get_projects_by_company_id",
+            lambda s, f: projects.get_projects_by_company_id(s, f["company_id"]),
+        ),
+        (
+            "projects.get_project_by_id_and_company",
+            lambda s, f: projects.get_project_by_id_and_company(
+                s, f["project_id"], f["company_id"]
+            ),
+        ),
+        (
+            "projects.get_projects_page",
+            lambda s, f: projects.get_projects_page(
+                s, f["company_id"], query="project", limit=8
+            ),
+        ),
+        (
+            "tasks.get_project_tasks_page",
+            lambda s, f: tasks.get_project_tasks_page(
+                s, f["project_id"], f["company_id"], after=0, limit=8
+            ),
+        ),
+        (
+            "tasks.get_task_by_id_and_company",
+            lambda s, f: tasks.get_task_by_id_and_company(
+                s, f["task_id"], f["company_id"]
+            ),
+        ),
+        ("tasks.get_my_tasks", lambda s, f: tasks.get_my_tasks(s, f["user_id"])),
+        (
+            "tasks.get_my_tasks_page",
+            lambda s, f: tasks.get_my_tasks_page(
+                s, f["user_id"], after=(TaskStatus.new, f["task_id"])
+            ),
+        ),
+        (
+            "tasks.set_task_status",
+            lambda s, f: tasks.set_task_status(
+                s, f["task_id"], "in_progress", f["company_id"]
+            ),
+        ),
+        ("files.get_file_by_id", lambda s, f: get_file_by_id(s, f["file_id"])),
+        (
+            "subscriptions.get_company_subscription_status",
+            lambda s, f: subscriptions.get_company_subscription_status(
+                s, f["company_id"]
+            ),
+        ),
+        (
+            "subscriptions.has_active_subscription_for_user",
+            lambda s, f: subscriptions.has_active_subscription_for_user(
+                s, f["user_id"]
+            ),
+        ),
+        (
+            "subscriptions.is_trial_active",
+            lambda s, f: subscriptions.is_trial_active(s, f["company_id"]),
+        ),
+        (
+            "subscriptions.mark_expired_if_needed",
+            lambda s, f: subscriptions.mark_expired_if_needed(s, f["company_id"]),
+        ),
+        ("plans.catalog_load", lambda s, f: plan_catalog.load(s)),
+        (
+            "notify_jobs.notify_expiring_trials",
+            lambda s, f: notify_jobs.notify_expiring_trials(s, bot),
+        ),
+        (
+            "notify_jobs.notify_expiring_subscriptions",
+            lambda s, f: notify_jobs.notify_expiring_subscriptions(s, bot),
+        ),
+        (
+            "notify_jobs.enforce_expirations",
+            lambda s, f: notify_jobs.enforce_expirations(s, bot),
+        ),
+        # keyset-страницы в обе стороны
+        (
+            "projects.get_projects_page",
+            lambda s, f: projects.get_projects_page(
+                s, f["company_id"], before=f["project_id"], limit=8
+            ),
+        ),
+        (
+            "tasks.get_project_tasks_page",
+            lambda s, f: tasks.get_project_tasks_page(
+                s, f["project_id"], f["company_id"], query="task", limit=8
+            ),
+        ),
+        (
+            "tasks.get_my_tasks_page",
+            lambda s, f: tasks.get_my_tasks_page(
+                s, f["user_id"], before=(TaskStatus.ready, f["task_id"])
+            ),
+        ),
+        (
+            "tasks.create_task",
+            lambda s, f: tasks.create_task(
+                s, "audit", None, f["project_id"], f["company_id"], f["user_id"]
+            ),
+        ),
+        (
+            "tasks.reassign_task",
+            lambda s, f: tasks.reassign_task(
+                s, f["task_id"], f["user_id"], f["company_id"]
+            ),
+        ),
+        (
+            "projects.create_project",
+            lambda s, f: projects.create_project(s, "audit", f["company_id"]),
+        ),
+        (
+            "companies.create_company",
+            lambda s, f: companies.create_company(
+                s, f"plan-audit new {f['company_id']}", f["user_id"]
+            ),
+        ),
+        (
+            "users.set_user_role_and_company",
+            lambda s, f: users.set_user_role_and_company(
+                s, f["user_id"], UserRole.manager, f["company_id"]
+            ),
+        ),
+        (
+            "reports.get_user_report",
+            lambda s, f: _with_user(s, f, partial(reports.get_user_report, s)),
+        ),
+        (
+            "files.create_file",
+            lambda s, f: create_file(
+                s,
+                f["task_id"],
+                f["company_id"],
+                f["user_id"],
+                "audit.jpg",
+                "image/jpeg",
+                1024,
+                "plan-audit/new.jpg",
+                blob_id=f["blob_id"],
+            ),
+        ),
+        (
+            "audit.log_action",
+            lambda s, f: audit_log.log_action(
+                s, f["user_id"], f["tg_id"], "plan_audit", "task", f["task_id"]
+            ),
+        ),
+        ("plans.get_plan_by_code", lambda s, f: get_plan_by_code(s, "pro")),
+        (
+            "subscriptions.get_active_subscription",
+            lambda s, f: subscriptions.get_active_subscription(s, f["company_id"]),
+        ),
+        (
+            "subscriptions.get_company_plan",
+            lambda s, f: subscriptions.get_company_plan(s, f["company_id"]),
+        ),
+        (
+            "subscriptions.extend_trial",
+            lambda s, f: subscriptions.extend_trial(s, f["company_id"], 1),
+        ),
+        (
+            "subscriptions.pause_subscription",
+            lambda s, f: subscriptions.pause_subscription(s, f["company_id"]),
+        ),
+        (
+            "subscriptions.resume_subscription",
+            lambda s, f: subscriptions.resume_subscription(s, f["company_id"]),
+        ),
+        (
+            "subscriptions.cancel_subscription",
+            lambda s, f: subscriptions.cancel_subscription(s, f["company_id"]),
+        ),
+        (
+            "subscriptions.start_paid_subscription",
+            lambda s, f: subscriptions.start_paid_subscription(
+                s, f["company_id"], "pro"
+            ),
+        ),
+        (
+            "subscriptions.set_plan_for_company",
+            lambda s, f: subscriptions.set_plan_for_company(s, f["company_id"], "pro"),
+        ),
+        (
+            "subscriptions.create_subscription",
+            lambda s, f: subscriptions.create_subscription(
+                s, f["company_id"], "pro", f["user_id"], commit=False
+            ),
+        ),
+        (
+            "principal.get_principal",
+            lambda s, f: principal.get_principal(s, f["tg_id"]),
+        ),
+        # blob: счётчики ссылок, дедупликация, освобождение
+        (
+            "blobs.acquire_blob_by_unique_id",
+            lambda s, f: blobs.acquire_blob_by_unique_id(
+                s, f["company_id"], f["file_unique_id"]
+            ),
+        ),
+        (
+            "blobs.acquire_blob_by_hash",
+            lambda s, f: blobs.acquire_blob_by_hash(s, f["company_id"], f["sha256"]),
+        ),
+        (
+            "blobs.register_blob",
+            lambda s, f: blobs.register_blob(
+                s,
+                f["company_id"],
+                f["sha256"],
+                "plan-audit/dup.jpg",
+                1024,
+                "image/jpeg",
+            ),
+        ),
+        (
+            "blobs.release_blobs",
+            lambda s, f: blobs.release_blobs(s, [f["blob_id"], f["blob_id"]]),
+        ),
+        (
+            "previews._attach",
+            lambda s, f: previews._attach(
+                s, f["blob_id"], {"preview": "p.jpg", "thumb": "t.jpg"}
+            ),
+        ),
+        # разрушающие — в конце, чтобы не выбить fixtures у остальных
+        (
+            "tasks.soft_delete_task",
+            lambda s, f: tasks.soft_delete_task(s, f["task_id"], f["company_id"]),
+        ),
+        (
+            "projects.soft_delete_project",
+            lambda s, f: projects.soft_delete_project(
+                s, f["project_id"], f["company_id"]
+            ),
+        ),
+        (
+            "users.soft_delete_user",
+            lambda s, f: _with_user(s, f, partial(users.soft_delete_user, s)),
+        ),
+        ("files.delete_file", lambda s, f: delete_file(s, f["file_id"])),
+        # фоновые пачки: purge и архивация
+        (
+            "purge.purge_tasks_batch",
+            lambda s, f: purge.purge_tasks_batch(s, f["cutoff"], 500),
+        ),
+        (
+            "purge.purge_projects_batch",
+            lambda s, f: purge.purge_projects_batch(s, f["cutoff"], 500),
+        ),
+        (
+            "archive.select_candidates",
+            lambda s, f: archive.select_candidates(s, f["cutoff"], 0, 200),
+        ),
+        (
+            "previews.claim_missing_previews",
+            lambda s, f: previews.claim_missing_previews(s, 0, 50),
+        ),
+        (
+            "archive.apply_batch",
+            lambda s, f: archive.apply_batch(
+                s,
+                [
+                    archive.ArchivedBlob(
+                        f["blob_id"], "plan-audit/a", "plan-audit/a.gz", 1, 1
+                    )
+                ],
+                "STANDARD_IA",
+            ),
+        ),
+    ]
+
+
+def unaudited(calls: List[Tuple[str, Call]]) -> List[str]:
+    """
+    Публичные корутины services/ с первым параметром session, которых нет
+    ни в calls, ни в NOT_AUDITED: новый сервис не проскочит аудит молча.
+    """
+    covered = {name for name, _ in calls} | set(NOT_AUDITED)
+    missing = []
+    for module_info in pkgutil.iter_modules(services.__path__):
+        module = importlib.import_module(f"services.{module_info.name}")
+        for name, fn in inspect.getmembers(module, inspect.iscoroutinefunction):
+            if name.startswith("_") or fn.__module__ != module.__name__:
+                continue
+            params = list(inspect.signature(fn).parameters)
+            qualified = f"{module_info.name}.{name}"
+            if params[:1] == ["session"] and qualified not in covered:
+                missing.append(qualified)
+    return missing
+
+
+LARGE_TABLES_SQL = text("""
+    SELECT relname, reltuples FROM pg_class
+    WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace
+      AND reltuples >= :min_rows
+    """)
+
+
+def seq_scans(plan: dict, big: Dict[str, float]) -> List[Tuple[str, float]]:
+    """Seq Scan-узлы плана по таблицам из big (relname -> reltuples)."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in big:
+        found.append((plan["Relation Name"], big[plan["Relation Name"]]))
+    for child in plan.get("Plans", ()):
+        found.extend(seq_scans(child, big))
+    return found
+
+
+def _explainable(statement: str) -> bool:
+    head = statement.lstrip().split(None, 1)[0].upper()
+    return head in ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+async def audit(args) -> int:
+    calls = service_calls()
+    missing = unaudited(calls)
+    for name in missing:
+        print(f"[NOT AUDITED] {name}: добавьте в service_calls() или NOT_AUDITED")
+    flagged = len(missing)
+    async with async_engine.connect() as conn:
+        await conn.begin()
+        rows = await conn.execute(LARGE_TABLES_SQL, {"min_rows": args.min_rows})
+        big = {row.relname: row.reltuples for row in rows}
+        f = await fixtures(conn)
+        print(f"fixtures: {f}")
+        print(f"large tables (>= {args.min_rows} rows): {sorted(big)}\n")
+
+        captured: List[Tuple[str, tuple]] = []
+
+        def capture(conn_, cursor, statement, parameters, context, executemany):
+            # flush UPDATE по нескольким строкам — executemany со списком наборов
+            # параметров; для EXPLAIN хватает первого (план у всех один)
+            captured.append((statement, parameters[0] if executemany else parameters))
+
+        # изменения сервисов пишутся в savepoint'ы и откатываются вместе с conn
+        session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+        for name, call in calls:
+            subscriptions.subscription_status_cache.clear()
+            captured.clear()
+            event.listen(conn.sync_connection, "before_cursor_execute", capture)
+            try:
+                await call(session, f)
+                await session.flush()
+            finally:
+                event.remove(conn.sync_connection, "before_cursor_execute", capture)
+
+            seen = set()
+            for statement, parameters in captured:
+                if statement in seen or not _explainable(statement):
+                    continue
+                seen.add(statement)
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN (FORMAT JSON) " + statement, parameters
+                )
+                plan = result.scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                scans = seq_scans(plan[0]["Plan"], big)
+                status = "SEQ SCAN" if scans else "ok"
+                flagged += bool(scans)
+                print(f"[{status:>8}] {name}")
+                for relname, rows in scans:
+                    print(f"           Seq Scan on {relname} (~{int(rows)} rows)")
+                if scans or args.verbose:
+                    print("           " + " ".join(statement.split())[:300])
+        await session.close()
+        await conn.rollback()
+
+    print(f"\n{flagged} statement(s) with Seq Scan on large tables")
+    return 1 if flagged else 0
+
+
+async def run(args) -> int:
+    try:
+        if args.seed:
+            await seed(args)
+        return await audit(args)
+    finally:
+        await async_engine.dispose()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="EXPLAIN всех запросов services/")
+    parser.add_argument("--seed", action="store_true", help="сначала наполнить БД")
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=20, help="на компанию")
+    parser.add_argument("--projects", type=int, default=5, help="на компанию")
+    parser.add_argument("--tasks", type=int, default=10, help="на пользователя")
+    parser.add_argument("--months", type=int, default=6, help="подписок на компанию")
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=10_000,
+        help="Seq Scan по таблицам меньше этого размера не считается проблемой",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="печатать SQL")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,315 @@
+# services/archive.py
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+import zlib
+from datetime import datetime, timedelta, UTC
+
+from prometheus_client import Counter
+from sqlalchemy import exists, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import (
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_CHECKPOINT_PATH,
+    ARCHIVE_CONCURRENCY,
+    ARCHIVE_STORAGE_CLASS,
+)
+from metrics.registry import registry
+from models import Blob, File, StorageDeletion
+from storage.s3 import S3Storage, storage as default_storage
+from storage.upload import stream_to_s3
+
+logger = logging.getLogger(__name__)
+
+# compressed — перепаковано в <key>.gz; reclassed — только сменён класс хранения
+# (уже сжатые форматы); failed — ошибка S3, blob остаётся на следующий прогон;
+# vanished — blob удалили, пока шла архивация
+ARCHIVE_OBJECTS_TOTAL = Counter(
+    "archive_objects_total",
+    "Blobs processed by the archival engine",
+    ["result"],
+    registry=registry,
+)
+# пропускная способность — rate() по direction=read
+ARCHIVE_BYTES_TOTAL = Counter(
+    "archive_bytes_total",
+    "Bytes read from and written to S3 by the archival engine",
+    ["direction"],
+    registry=registry,
+)
+
+# gzip такие форматы не уменьшит — только класс хранения
+INCOMPRESSIBLE_PREFIXES = ("image/", "video/", "audio/")
+INCOMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/zip",
+        "application/gzip",
+        "application/x-7z-compressed",
+        "application/x-rar-compressed",
+        "application/vnd.rar",
+        "application/pdf",
+    }
+)
+
+# Архивируется blob целиком (его делят все File компании с тем же содержимым):
+# старше cutoff и ни одного File на него, созданного после cutoff.
+# Сжатый объект лежит в <key>.gz с Content-Encoding: gzip — ссылки /get_file
+# отдают его как раньше, клиент распаковывает сам. Старый ключ удаляется
+# через storage_deletions после commit пачки, а не сразу.
+
+
+def archive_cutoff(days: int = ARCHIVE_AFTER_DAYS) -> datetime:
+    return datetime.now(UTC) - timedelta(days=days)
+
+
+def is_compressible(mime_type: str) -> bool:
+    return not (
+        mime_type.startswith(INCOMPRESSIBLE_PREFIXES)
+        or mime_type in INCOMPRESSIBLE_TYPES
+        or mime_type.startswith("application/vnd.openxmlformats-officedocument.")
+    )
+
+
+class ArchivedBlob:
+    __slots__ = ("blob_id", "old_key", "new_key", "read", "written")
+
+    def __init__(
+        self, blob_id: int, old_key: str, new_key: str, read: int, written: int
+    ):
+        self.blob_id = blob_id
+        self.old_key = old_key
+        self.new_key = new_key
+        self.read = read
+        self.written = written
+
+
+class ArchiveStats:
+    """Итоги прогона для лога: объекты, байты, скорость, степень сжатия."""
+
+    __slots__ = ("archived", "failed", "read", "written", "started")
+
+    def __init__(self):
+        self.archived = 0
+        self.failed = 0
+        self.read = 0
+        self.written = 0
+        self.started = time.perf_counter()
+
+    def add(self, archived: list[ArchivedBlob], failed: int) -> None:
+        self.archived += len(archived)
+        self.failed += failed
+        self.read += sum(a.read for a in archived)
+        self.written += sum(a.written for a in archived)
+
+    def summary(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        ratio = self.written / self.read if self.read else 1.0
+        return (
+            f"{self.archived} объектов ({self.failed} с ошибкой) за {elapsed:.0f} с: "
+            f"{self.archived / elapsed:.1f} об/с, {self.read / elapsed / 2**20:.1f} МБ/с, "
+            f"сжатие {ratio:.2f}"
+        )
+
+
+async def select_candidates(
+    session: AsyncSession, cutoff: datetime, after_id: int, limit: int
+) -> list:
+    """Следующие limit неархивированных blob после after_id (keyset по id)."""
+    recent_file = exists().where(File.blob_id == Blob.id, File.created_at >= cutoff)
+    result = await session.execute(
+        select(Blob.id, Blob.s3_key, Blob.mime_type)
+        .where(
+            Blob.id > after_id,
+            Blob.archived_at.is_(None),
+            Blob.created_at < cutoff,
+            ~recent_file,
+        )
+        .order_by(Blob.id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def archive_blob(
+    blob_id: int,
+    s3_key: str,
+    mime_type: str,
+    *,
+    storage: S3Storage = default_storage,
+    storage_class: str = ARCHIVE_STORAGE_CLASS,
+) -> ArchivedBlob:
+    """
+    Перекладывает объект blob в архивный вид, не читая его в память целиком.
+    Ключ результата детерминирован, так что повтор после сбоя просто
+    перезапишет недоделанный объект.
+    """
+    if not is_compressible(mime_type):
+        if storage_class:
+            await storage.set_storage_class(s3_key, storage_class)
+        ARCHIVE_OBJECTS_TOTAL.labels(result="reclassed").inc()
+        return ArchivedBlob(blob_id, s3_key, s3_key, 0, 0)
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 — формат gzip
+    read = 0
+
+    async def gzip_chunks():
+        nonlocal read
+        async for chunk in storage.iter_object(s3_key):
+            read += len(chunk)
+            # zlib отпускает GIL — сжатие в потоке, мимо event loop
+            out = await asyncio.to_thread(compressor.compress, chunk)
+            if out:
+                yield out
+        yield compressor.flush()
+
+    params = {"ContentEncoding": "gzip"}
+    if storage_class:
+        params["StorageClass"] = storage_class
+    new_key = f"{s3_key}.gz"
+    uploaded = await stream_to_s3(
+        gzip_chunks(), new_key, mime_type, storage=storage, params=params
+    )
+    ARCHIVE_OBJECTS_TOTAL.labels(result="compressed").inc()
+    ARCHIVE_BYTES_TOTAL.labels(direction="read").inc(read)
+    ARCHIVE_BYTES_TOTAL.labels(direction="written").inc(uploaded.size)
+    return ArchivedBlob(blob_id, s3_key, new_key, read, uploaded.size)
+
+
+async def apply_batch(
+    session: AsyncSession, archived: list[ArchivedBlob], storage_class: str
+) -> int:
+    """
+    Записывает пачку в БД одной транзакцией: новые ключи и archived_at в blobs,
+    копии ключей в files, старые объекты — в storage_deletions. Строки blob
+    блокируются: загрузка, которая прямо сейчас ссылается на blob, успеет
+    закоммитить свой File до обновления files. Возвращает число записанных blob.
+    """
+    if not archived:
+        return 0
+    alive = set(
+        (
+            await session.execute(
+                select(Blob.id)
+                .where(Blob.id.in_([a.blob_id for a in archived]))
+                .with_for_update()
+            )
+        )
+        .scalars()
+        .all()
+    )
+    done = [a for a in archived if a.blob_id in alive]
+    if done:
+        now = datetime.now(UTC)
+        await session.execute(
+            update(Blob),
+            [
+                {
+                    "id": a.blob_id,
+                    "s3_key": a.new_key,
+                    "archived_at": now,
+                    "storage_class": storage_class or None,
+                }
+                for a in done
+            ],
+        )
+        await session.execute(
+            update(File)
+            .where(File.blob_id == Blob.id, Blob.id.in_([a.blob_id for a in done]))
+            .values(s3_key=Blob.s3_key)
+            .execution_options(synchronize_session=False)
+        )
+
+    # заменённые оригиналы и архивы blob, удалённых по ходу дела
+    stale = [a.old_key for a in done if a.new_key != a.old_key]
+    stale += [a.new_key for a in archived if a.blob_id not in alive]
+    if stale:
+        await session.execute(insert(StorageDeletion), [{"s3_key": k} for k in stale])
+    ARCHIVE_OBJECTS_TOTAL.labels(result="vanished").inc(len(archived) - len(done))
+    return len(done)
+
+
+def load_checkpoint(path: str) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path: str, cutoff: datetime, last_id: int) -> None:
+    """Атомарно (через rename): оборванная запись не испортит прошлую точку."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"cutoff": cutoff.isoformat(), "last_id": last_id}, f)
+    os.replace(tmp, path)
+
+
+async def run_archive(
+    session_maker,
+    *,
+    storage: S3Storage = default_storage,
+    storage_class: str = ARCHIVE_STORAGE_CLASS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    concurrency: int = ARCHIVE_CONCURRENCY,
+    checkpoint_path: str = ARCHIVE_CHECKPOINT_PATH,
+) -> ArchiveStats:
+    """
+    Архивирует все подходящие blob пачками по batch_size, не больше concurrency
+    объектов одновременно. После commit каждой пачки в checkpoint_path пишется
+    последний id и cutoff: прерванный прогон продолжается с того же места
+    и с той же границей. Неудачные blob подхватит следующий полный прогон.
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint:
+        cutoff = datetime.fromisoformat(checkpoint["cutoff"])
+        after_id = checkpoint["last_id"]
+        logger.info("Архивация продолжается после blob %s", after_id)
+    else:
+        cutoff, after_id = archive_cutoff(), 0
+
+    stats = ArchiveStats()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def archive_one(row) -> ArchivedBlob | None:
+        async with slots:
+            try:
+                return await archive_blob(
+                    row.id,
+                    row.s3_key,
+                    row.mime_type,
+                    storage=storage,
+                    storage_class=storage_class,
+                )
+            except Exception:
+                logger.exception(
+                    "Не удалось архивировать blob %s (%s)", row.id, row.s3_key
+                )
+                ARCHIVE_OBJECTS_TOTAL.labels(result="failed").inc()
+                return None
+
+    while True:
+        async with session_maker() as session:
+            rows = await select_candidates(session, cutoff, after_id, batch_size)
+        if not rows:
+            break
+
+        results = await asyncio.gather(*(archive_one(row) for row in rows))
+        archived = [r for r in results if r is not None]
+        async with session_maker() as session:
+            await apply_batch(session, archived, storage_class)
+            await session.commit()
+
+        after_id = rows[-1].id
+        save_checkpoint(checkpoint_path, cutoff, after_id)
+        stats.add(archived, len(results) - len(archived))
+        logger.info("Архивация до blob %s: %s", after_id, stats.summary())
+
+    # прогон завершён — следующий начнётся с начала и с новой границей
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(checkpoint_path)
+    return stats
@@ -31,11 +31,10 @@ async def log_action(
             entity_id=entity_id,
             payload=payload,
         )
+        # без flush: INSERT уйдёт тем же flush'ем, что и commit апдейта,
+        # в одной транзакции с изменением, которое он описывает
         session.add(log)
-        await session.flush()
-        logger.info(
-            f"Успешно записано действие: {action} для пользователя {actor_user_id}"
-        )
+        logger.info(f"Действие {action} пользователя {actor_user_id} добавлено в аудит")
     except Exception as e:
         logger.error(f"Ошибка при логировании: {str(e)}")
         raise
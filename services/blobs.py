@@ -0,0 +1,209 @@
+# services/blobs.py
+from collections import Counter as RefCounter
+from datetime import timedelta
+
+from prometheus_client import Counter
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import UPLOAD_PENDING_GRACE_SEC
+from database import async_session_maker
+from metrics.registry import registry
+from models import Blob, StorageDeletion
+from storage.upload import stream_to_s3
+
+# hit_unique_id — тот же файл Telegram, не скачивали; hit_hash — совпал sha256
+# до PUT; hit_after_upload — совпал после multipart, лишний объект удалён; miss — новый blob
+BLOB_LOOKUPS_TOTAL = Counter(
+    "blob_dedup_total",
+    "Upload deduplication outcomes",
+    ["result"],
+    registry=registry,
+)
+
+# Счётчики ссылок меняются одним UPDATE ... RETURNING: строка blob блокируется
+# до конца транзакции апдейта, так что purge (release_blobs) и загрузка
+# не могут одновременно «воскресить» и удалить один blob.
+
+
+async def acquire_blob_by_unique_id(
+    session: AsyncSession, company_id: int, file_unique_id: str
+) -> Blob | None:
+    """+1 ссылка на blob с тем же file_unique_id Telegram; None — такого нет."""
+    blob = await _acquire(
+        session, Blob.company_id == company_id, Blob.file_unique_id == file_unique_id
+    )
+    if blob is not None:
+        BLOB_LOOKUPS_TOTAL.labels(result="hit_unique_id").inc()
+    return blob
+
+
+async def acquire_blob_by_hash(
+    session: AsyncSession, company_id: int, sha256: str
+) -> Blob | None:
+    """+1 ссылка на blob компании с тем же sha256; None — такого нет."""
+    blob = await _acquire(session, Blob.company_id == company_id, Blob.sha256 == sha256)
+    if blob is not None:
+        BLOB_LOOKUPS_TOTAL.labels(result="hit_hash").inc()
+    return blob
+
+
+async def _acquire(session: AsyncSession, *criteria) -> Blob | None:
+    # populate_existing: blob уже может быть в identity map со старым ref_count
+    result = await session.execute(
+        update(Blob)
+        .where(*criteria)
+        .values(ref_count=Blob.ref_count + 1)
+        .returning(Blob)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+async def register_blob(
+    session: AsyncSession,
+    company_id: int,
+    sha256: str,
+    s3_key: str,
+    size: int,
+    mime_type: str,
+    file_unique_id: str | None = None,
+) -> Blob:
+    """
+    Регистрирует только что загруженный объект s3_key как blob с одной ссылкой.
+    Если blob с этим sha256 уже есть (файл был больше одной части и хэш стал
+    известен только после загрузки, или параллельная загрузка), берётся ссылка
+    на него, а s3_key ставится в очередь на удаление в той же транзакции.
+    """
+    stmt = pg_insert(Blob).values(
+        company_id=company_id,
+        sha256=sha256,
+        s3_key=s3_key,
+        size=size,
+        mime_type=mime_type,
+        ref_count=1,
+        file_unique_id=file_unique_id,
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_blobs_company_id_sha256",
+        set_={"ref_count": Blob.ref_count + 1},
+    ).returning(Blob)
+    blob = (
+        await session.execute(stmt, execution_options={"populate_existing": True})
+    ).scalar_one()
+
+    if blob.s3_key != s3_key:
+        await session.execute(insert(StorageDeletion).values(s3_key=s3_key))
+        BLOB_LOOKUPS_TOTAL.labels(result="hit_after_upload").inc()
+    else:
+        BLOB_LOOKUPS_TOTAL.labels(result="miss").inc()
+    return blob
+
+
+async def release_blobs(session: AsyncSession, blob_ids: list[int]) -> int:
+    """
+    Снимает по ссылке за каждый элемент blob_ids (id может повторяться).
+    Blob без ссылок удаляется, его объект и превью уходят в storage_deletions.
+    Возвращает число удалённых blob.
+    """
+    refs = RefCounter(i for i in blob_ids if i is not None)
+    if not refs:
+        return 0
+
+    # обычно каждый blob встречается один раз — один UPDATE на всю пачку
+    by_count: dict[int, list[int]] = {}
+    for blob_id, n in refs.items():
+        by_count.setdefault(n, []).append(blob_id)
+    for n, ids in by_count.items():
+        await session.execute(
+            update(Blob)
+            .where(Blob.id.in_(ids))
+            .values(ref_count=Blob.ref_count - n)
+            .execution_options(synchronize_session=False)
+        )
+
+    orphans = (
+        await session.execute(
+            delete(Blob)
+            .where(Blob.id.in_(list(refs)), Blob.ref_count <= 0)
+            .returning(Blob.s3_key, Blob.preview_s3_key, Blob.thumbnail_s3_key)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    keys = [key for row in orphans for key in row if key is not None]
+    if keys:
+        await session.execute(
+            insert(StorageDeletion), [{"s3_key": key} for key in keys]
+        )
+    return len(orphans)
+
+
+async def reserve_upload_key(s3_key: str, session_maker=async_session_maker) -> int:
+    """
+    Заранее ставит s3_key в storage_deletions отдельной закоммиченной транзакцией,
+    с queued_at через UPLOAD_PENDING_GRACE_SEC (раньше drain его не тронет).
+    Основная транзакция снимает резерв вместе с регистрацией blob; если она
+    откатится или процесс упадёт, загруженный объект не останется в бакете навсегда.
+    """
+    async with session_maker() as pending:
+        pending_id = (
+            await pending.execute(
+                insert(StorageDeletion)
+                .values(
+                    s3_key=s3_key,
+                    queued_at=func.now() + timedelta(seconds=UPLOAD_PENDING_GRACE_SEC),
+                )
+                .returning(StorageDeletion.id)
+            )
+        ).scalar_one()
+        await pending.commit()
+    return pending_id
+
+
+async def store_blob(
+    session: AsyncSession,
+    company_id: int,
+    open_stream,
+    s3_key: str,
+    mime_type: str,
+    file_unique_id: str | None = None,
+) -> Blob:
+    """
+    Ссылка на blob с содержимым файла, с загрузкой в S3 только при необходимости:
+    1) тот же file_unique_id Telegram — ни скачивания, ни загрузки;
+    2) файл в одну часть и sha256 уже есть у компании — скачали, но без PUT;
+    3) иначе поток уходит в s3_key и регистрируется новый blob.
+    open_stream() — асинхронный итератор чанков; вызывается только если нужен.
+    """
+    if file_unique_id:
+        blob = await acquire_blob_by_unique_id(session, company_id, file_unique_id)
+        if blob is not None:
+            return blob
+
+    pending_id = await reserve_upload_key(s3_key)
+    # резерв снимается в той же транзакции, что и ссылка на blob
+    await session.execute(
+        delete(StorageDeletion).where(StorageDeletion.id == pending_id)
+    )
+    found: list[Blob] = []
+
+    async def dedup(sha256: str) -> str | None:
+        blob = await acquire_blob_by_hash(session, company_id, sha256)
+        if blob is None:
+            return None
+        found.append(blob)
+        return blob.s3_key
+
+    uploaded = await stream_to_s3(open_stream(), s3_key, mime_type, dedup=dedup)
+    if not uploaded.uploaded:
+        return found[0]
+    return await register_blob(
+        session,
+        company_id,
+        uploaded.sha256,
+        s3_key,
+        uploaded.size,
+        mime_type,
+        file_unique_id,
+    )
@@ -1,10 +1,13 @@
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from database import on_commit
 from models.company import Company
 from models.user import User
 from models.trial import Trial
+from services.principal import invalidate_principal
 from utils.enums import UserRole
 from config import TRIAL_DAYS_DEFAULT
 
@@ -35,6 +38,9 @@ async def create_company(session: AsyncSession, name: str, created_by: int) -> C
         session.add(user)
 
     await session.flush()
+    if user:
+        # сброс кэша — после commit, иначе параллельный апдейт закэширует старое
+        on_commit(session, partial(invalidate_principal, user.tg_id))
     return company
 
 
@@ -58,4 +64,5 @@ async def join_company(
     user.role = role
     session.add(user)
     await session.flush()
+    on_commit(session, partial(invalidate_principal, user.tg_id))
     return user
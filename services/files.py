@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.file import File
-import uuid
+from services.blobs import release_blobs
 from typing import Optional
 import logging
 
@@ -16,6 +16,12 @@ async def create_file(
     mime_type: str,
     size: int,
     s3_key: str,
+    blob_id: int | None = None,
+    tg_file_id: str | None = None,
+    tg_file_unique_id: str | None = None,
+    tg_file_type: str | None = None,
+    preview_s3_key: str | None = None,
+    thumbnail_s3_key: str | None = None,
 ) -> File:
     """Создает новую запись о файле в базе данных.
     Args:
@@ -27,6 +33,12 @@ async def create_file(
         mime_type: MIME-тип файла.
         size: Размер файла в байтах.
         s3_key: Ключ файла в S3-хранилище.
+        blob_id: Общий blob с содержимым (services.blobs), если есть.
+        tg_file_id: file_id Telegram для повторной отправки без S3.
+        tg_file_unique_id: file_unique_id Telegram.
+        tg_file_type: Как отправлять tg_file_id: "photo" или "document".
+        preview_s3_key: Превью картинки, если у blob оно уже есть.
+        thumbnail_s3_key: Миниатюра картинки, если у blob она уже есть.
     """
     new_file = File(
         task_id=task_id,
@@ -36,20 +48,26 @@ async def create_file(
         mime_type=mime_type,
         size=size,
         s3_key=s3_key,
+        blob_id=blob_id,
+        tg_file_id=tg_file_id,
+        tg_file_unique_id=tg_file_unique_id,
+        tg_file_type=tg_file_type,
+        preview_s3_key=preview_s3_key,
+        thumbnail_s3_key=thumbnail_s3_key,
     )
     session.add(new_file)
     # commit/flush будет сделан в DbSessionMiddleware
     return new_file
 
 
-async def get_file_by_id(session: AsyncSession, file_id: uuid.UUID) -> Optional[File]:
+async def get_file_by_id(session: AsyncSession, file_id: int) -> Optional[File]:
     """
-    Получает файл по его UUID.
+    Получает файл по его ID.
     """
     return await session.get(File, file_id)
 
 
-async def delete_file(session: AsyncSession, file_id: uuid.UUID) -> bool:
+async def delete_file(session: AsyncSession, file_id: int) -> bool:
     """
     Удаляет запись о файле из базы данных.
 
@@ -59,7 +77,11 @@ async def delete_file(session: AsyncSession, file_id: uuid.UUID) -> bool:
     file_to_delete = await get_file_by_id(session, file_id)
     if file_to_delete:
         await session.delete(file_to_delete)
-        await session.commit()
+        # flush до release_blobs: blob без ссылок удаляется, а FK files.blob_id
+        # не даст сделать это, пока строка файла на месте
+        await session.flush()
+        # blob общий: объект S3 удаляется только с последней ссылкой
+        await release_blobs(session, [file_to_delete.blob_id])
         logger.info(f"File {file_id} deleted from database.")
         return True
     logger.warning(f"File {file_id} not found for deletion.")
@@ -31,4 +31,5 @@ async def import_users(session, filepath: str):
         for row in reader:
             user = User(**row)
             session.add(user)
-    await session.commit()
+    # commit — на стороне вызывающего (DbSessionMiddleware или скрипт)
+    await session.flush()
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -5,6 +6,7 @@ from aiogram import Bot
 from models import Trial, Subscription, User
 from utils.enums import UserRole, SubscriptionStatus
 from config import BILLING_REMIND_DAYS
+from services.subscriptions import invalidate_subscription_status_on_commit
 
 import logging
 
@@ -12,15 +14,23 @@ UTC = timezone.utc
 logger = logging.getLogger(__name__)
 
 
-async def _company_admins_and_managers(session: AsyncSession, company_id: int):
-    """Получаем всех админов и менеджеров компании"""
+async def _admins_and_managers_by_company(
+    session: AsyncSession, company_ids
+) -> dict[int, list[User]]:
+    """Админы и менеджеры сразу нескольких компаний — один запрос вместо N."""
+    by_company = defaultdict(list)
+    company_ids = sorted(set(company_ids))
+    if not company_ids:
+        return by_company
     q = await session.execute(
         select(User).where(
-            User.company_id == company_id,
-            User.role.in_([UserRole.ADMIN.value, UserRole.MANAGER.value]),
+            User.company_id.in_(company_ids),
+            User.role.in_([UserRole.admin, UserRole.manager]),
         )
     )
-    return q.scalars().all()
+    for u in q.scalars().all():
+        by_company[u.company_id].append(u)
+    return by_company
 
 
 async def notify_expiring_trials(session: AsyncSession, bot: Bot):
@@ -32,9 +42,12 @@ async def notify_expiring_trials(session: AsyncSession, bot: Bot):
         select(Trial).where(Trial.is_active, Trial.expires_at.between(now, target))
     )
 
-    for trial in q.scalars().all():
-        managers = await _company_admins_and_managers(session, trial.company_id)
-        for u in managers:
+    trials = q.scalars().all()
+    admins = await _admins_and_managers_by_company(
+        session, (t.company_id for t in trials)
+    )
+    for trial in trials:
+        for u in admins[trial.company_id]:
             try:
                 await bot.send_message(
                     u.tg_id,
@@ -59,9 +72,12 @@ async def notify_expiring_subscriptions(session: AsyncSession, bot: Bot):
         )
     )
 
-    for sub in q.scalars().all():
-        managers = await _company_admins_and_managers(session, sub.company_id)
-        for u in managers:
+    subs = q.scalars().all()
+    admins = await _admins_and_managers_by_company(
+        session, (s.company_id for s in subs)
+    )
+    for sub in subs:
+        for u in admins[sub.company_id]:
             try:
                 await bot.send_message(
                     u.tg_id,
@@ -75,17 +91,21 @@ async def notify_expiring_subscriptions(session: AsyncSession, bot: Bot):
 
 
 async def enforce_expirations(session: AsyncSession, bot: Bot):
-    """В день окончания: отключаем триал и подписку"""
+    """В день окончания: отключаем триал и подписку (commit — за вызывающим)"""
     now = datetime.now(UTC)
 
     # триалы
     q_t = await session.execute(
         select(Trial).where(Trial.is_active, Trial.expires_at <= now)
     )
-    for t in q_t.scalars().all():
+    trials = q_t.scalars().all()
+    admins = await _admins_and_managers_by_company(
+        session, (t.company_id for t in trials)
+    )
+    for t in trials:
         t.is_active = False
-        managers = await _company_admins_and_managers(session, t.company_id)
-        for u in managers:
+        invalidate_subscription_status_on_commit(session, t.company_id)
+        for u in admins[t.company_id]:
             try:
                 await bot.send_message(
                     u.tg_id,
@@ -103,10 +123,14 @@ async def enforce_expirations(session: AsyncSession, bot: Bot):
             Subscription.expires_at <= now,
         )
     )
-    for s in q_s.scalars().all():
+    subs = q_s.scalars().all()
+    admins = await _admins_and_managers_by_company(
+        session, (s.company_id for s in subs)
+    )
+    for s in subs:
         s.status = SubscriptionStatus.expired.value
-        managers = await _company_admins_and_managers(session, s.company_id)
-        for u in managers:
+        invalidate_subscription_status_on_commit(session, s.company_id)
+        for u in admins[s.company_id]:
             try:
                 await bot.send_message(
                     u.tg_id,
@@ -0,0 +1,63 @@
+# services/pagination.py
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class IdPage:
+    """
+    Страница keyset-пагинации по id: items — строки (id, подпись).
+    Хранится в FSM как есть, поэтому только простые типы.
+    """
+
+    __slots__ = ("items", "has_prev", "has_next")
+
+    def __init__(self, items: list[tuple[int, str]], has_prev: bool, has_next: bool):
+        self.items = items
+        self.has_prev = has_prev
+        self.has_next = has_next
+
+    @property
+    def first_id(self) -> int | None:
+        return self.items[0][0] if self.items else None
+
+    @property
+    def last_id(self) -> int | None:
+        return self.items[-1][0] if self.items else None
+
+    def as_dict(self) -> dict:
+        return {"items": self.items, "prev": self.has_prev, "next": self.has_next}
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "IdPage":
+        return cls([tuple(i) for i in raw["items"]], raw["prev"], raw["next"])
+
+
+def like_pattern(query: str) -> str:
+    """Подстрока для ILIKE с экранированием %, _ и \\ (escape='\\')."""
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def keyset_page(
+    session: AsyncSession,
+    stmt: Select,
+    key,
+    *,
+    after: int | None = None,
+    before: int | None = None,
+    limit: int,
+) -> IdPage:
+    """
+    Выполняет stmt (SELECT id, label ...) страницей по колонке key.
+    after — следующая страница за курсором, before — предыдущая; LIMIT limit + 1.
+    """
+    stmt = stmt.limit(limit + 1)
+    if before is not None:
+        rows = await session.execute(stmt.where(key < before).order_by(key.desc()))
+        rows = [tuple(r) for r in rows.all()]
+        return IdPage(rows[:limit][::-1], has_prev=len(rows) > limit, has_next=True)
+
+    if after is not None:
+        stmt = stmt.where(key > after)
+    rows = [tuple(r) for r in (await session.execute(stmt.order_by(key))).all()]
+    return IdPage(rows[:limit], has_prev=after is not None, has_next=len(rows) > limit)
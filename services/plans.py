@@ -0,0 +1,149 @@
+# services/plans.py
+import hashlib
+import json
+import logging
+from types import MappingProxyType
+from typing import Any, Mapping
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.plan import Plan
+
+logger = logging.getLogger(__name__)
+
+
+class PlanFeatures:
+    """
+    Типизированный доступ к Plan.features (JSONB).
+    Поддерживает оба формата сида: {"files": true, "max_users": 10}
+    и {"features": ["задачи", "файлы"]}.
+    """
+
+    def __init__(self, raw: Mapping[str, Any] | None):
+        raw = dict(raw or {})
+        listed = raw.pop("features", None)
+        flags = {name: True for name in listed or ()}
+        flags.update(raw)
+        self._flags = MappingProxyType(flags)
+
+    def has(self, name: str) -> bool:
+        """Фича включена (True или положительный лимит)."""
+        return bool(self._flags.get(name))
+
+    def limit(self, name: str, default: int | None = None) -> int | None:
+        """Числовой лимит фичи (None — без ограничения / не задан)."""
+        value = self._flags.get(name)
+        if isinstance(value, bool) or not isinstance(value, int):
+            return default
+        return value
+
+    def as_dict(self) -> dict:
+        return dict(self._flags)
+
+
+class PlanInfo:
+    """Неизменяемый снимок строки plans — безопасно держать между сессиями."""
+
+    __slots__ = ("id", "code", "name", "monthly_price", "period_days", "features")
+
+    def __init__(self, plan: Plan):
+        self.id = plan.id
+        self.code = plan.code
+        self.name = plan.name
+        self.monthly_price = plan.monthly_price
+        self.period_days = plan.period_days
+        self.features = PlanFeatures(plan.features)
+
+    def __repr__(self) -> str:
+        return f"<PlanInfo {self.code} id={self.id}>"
+
+
+class PlanCatalog:
+    """
+    Каталог тарифов в памяти процесса.
+    Загружается при старте (после seed_plans) и по админ-команде;
+    version растёт при каждой перезагрузке, checksum — отпечаток содержимого.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.checksum: str | None = None
+        self._by_code: dict[str, PlanInfo] = {}
+        self._by_id: dict[int, PlanInfo] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self.version > 0
+
+    async def load(self, session: AsyncSession) -> int:
+        """Перечитывает plans одним запросом. Возвращает новую версию."""
+        rows, checksum = await self._fetch(session)
+        return self._apply(rows, checksum)
+
+    async def refresh(self, session: AsyncSession) -> bool:
+        """
+        Сверяет каталог с БД и перечитывает, только если тарифы изменились
+        (их правили в другом процессе). True — каталог обновлён.
+        """
+        rows, checksum = await self._fetch(session)
+        if checksum == self.checksum:
+            return False
+        self._apply(rows, checksum)
+        return True
+
+    async def _fetch(self, session: AsyncSession) -> tuple[list[Plan], str]:
+        rows = (await session.execute(select(Plan).order_by(Plan.id))).scalars().all()
+        checksum = plans_checksum({c: getattr(p, c) for c in SEED_FIELDS} for p in rows)
+        return rows, checksum
+
+    def _apply(self, rows: list[Plan], checksum: str) -> int:
+        plans = [PlanInfo(p) for p in rows]
+        self._by_code = {p.code: p for p in plans}
+        self._by_id = {p.id: p for p in plans}
+        self.checksum = checksum
+        self.version += 1
+        logger.info(
+            "Каталог тарифов загружен: version=%s plans=%s checksum=%s",
+            self.version,
+            len(plans),
+            self.checksum[:8],
+        )
+        return self.version
+
+    def by_code(self, code: str) -> PlanInfo | None:
+        return self._by_code.get(code)
+
+    def by_id(self, plan_id: int | None) -> PlanInfo | None:
+        if plan_id is None:
+            return None
+        return self._by_id.get(plan_id)
+
+    def all(self) -> list[PlanInfo]:
+        return list(self._by_id.values())
+
+
+# поля, которыми управляет seed_plans
+SEED_FIELDS = ("code", "name", "monthly_price", "period_days", "features")
+
+
+def plans_checksum(plans) -> str:
+    """Отпечаток набора тарифов (по SEED_FIELDS), не зависящий от порядка."""
+    payload = []
+    for p in plans:
+        row = {c: p.get(c) for c in SEED_FIELDS}
+        row["features"] = row["features"] or {}
+        payload.append(row)
+    payload.sort(key=lambda row: row["code"])
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+plan_catalog = PlanCatalog()
+
+
+async def get_plan_by_code(session: AsyncSession, code: str) -> PlanInfo | None:
+    """Тариф из каталога; если его там нет — перечитываем каталог из БД."""
+    plan = plan_catalog.by_code(code)
+    if plan is None:
+        await plan_catalog.load(session)
+        plan = plan_catalog.by_code(code)
+    return plan
@@ -0,0 +1,226 @@
+# services/previews.py
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import (
+    PREVIEW_MAX_ATTEMPTS,
+    PREVIEW_MAX_SIDE,
+    PREVIEW_MAX_SOURCE_BYTES,
+    PREVIEW_SWEEP_BATCH_SIZE,
+    PREVIEW_SWEEP_GRACE_SEC,
+    PREVIEW_WORKERS,
+    THUMBNAIL_MAX_SIDE,
+)
+from database import async_session_maker
+from metrics.registry import registry
+from models import Blob, File, StorageDeletion
+from storage.s3 import storage
+from utils.images import render_previews
+
+logger = logging.getLogger(__name__)
+
+# (вид, максимальная сторона, качество JPEG) — от большего к меньшему
+PREVIEW_SPECS = (
+    ("preview", PREVIEW_MAX_SIDE, 82),
+    ("thumb", THUMBNAIL_MAX_SIDE, 75),
+)
+
+# что Pillow декодирует без плагинов (HEIC и т.п. остаются без превью)
+PREVIEW_MIME_TYPES = frozenset(
+    {"image/jpeg", "image/png", "image/webp", "image/gif", "image/bmp", "image/tiff"}
+)
+
+PREVIEWS_TOTAL = Counter(
+    "previews_total",
+    "Preview generation outcomes",
+    ["result"],
+    registry=registry,
+)
+PREVIEW_RENDER_SECONDS = Histogram(
+    "preview_render_seconds",
+    "Time to decode and resize one image in the process pool",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=registry,
+)
+
+# Декодирование и ресайз — CPU: в отдельных процессах, чтобы не держать GIL
+# и event loop. spawn, а не fork: в процессе бота уже живут потоки (S3, БД).
+_pool: ProcessPoolExecutor | None = None
+# не больше PREVIEW_WORKERS картинок в обработке (и оригиналов в памяти)
+_slots = asyncio.Semaphore(PREVIEW_WORKERS)
+# ссылки на фоновые задачи, чтобы их не собрал GC до завершения
+_tasks: set[asyncio.Task] = set()
+
+
+def derived_key(s3_key: str, kind: str) -> str:
+    """company_1/blobs/<uuid>.png -> company_1/blobs/<uuid>.<kind>.jpg"""
+    return f"{os.path.splitext(s3_key)[0]}.{kind}.jpg"
+
+
+def wants_previews(mime_type: str, size: int) -> bool:
+    return mime_type in PREVIEW_MIME_TYPES and size <= PREVIEW_MAX_SOURCE_BYTES
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PREVIEW_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def _drop_pool(pool: ProcessPoolExecutor) -> None:
+    """Сломанный пул (умер процесс) не оживает — следующий вызов создаст новый."""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def schedule_previews(blob_id: int, s3_key: str) -> None:
+    """
+    Ставит генерацию превью blob в фон (вызывать через database.on_commit —
+    после commit, когда объект и строка blob уже есть). Ошибка только
+    логируется: без превью показывается оригинал.
+    """
+    task = asyncio.get_running_loop().create_task(build_previews(blob_id, s3_key))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def build_previews(
+    blob_id: int, s3_key: str, session_maker=async_session_maker
+) -> None:
+    async with _slots:
+        try:
+            keys = await _render_and_store(s3_key)
+            async with session_maker() as session:
+                result = await _attach(session, blob_id, keys)
+                await session.commit()
+        except Exception:
+            logger.exception("Не удалось сделать превью для %s", s3_key)
+            result = "error"
+    PREVIEWS_TOTAL.labels(result=result).inc()
+
+
+async def _render_and_store(s3_key: str) -> dict[str, str]:
+    data = await storage.get_object(s3_key)
+    started = time.perf_counter()
+    pool = _get_pool()
+    try:
+        rendered = await asyncio.get_running_loop().run_in_executor(
+            pool, render_previews, data, PREVIEW_SPECS
+        )
+    except BrokenProcessPool:
+        _drop_pool(pool)
+        raise
+    PREVIEW_RENDER_SECONDS.observe(time.perf_counter() - started)
+    del data
+
+    keys = {}
+    for kind, body in rendered.items():
+        keys[kind] = derived_key(s3_key, kind)
+        await storage.put_object(keys[kind], body, "image/jpeg")
+    return keys
+
+
+async def _attach(session: AsyncSession, blob_id: int, keys: dict[str, str]) -> str:
+    """
+    Записывает ключи в blob и во все его File (commit — за вызывающим). Если blob
+    успели удалить, пока шла генерация, объекты превью сразу уходят в storage_deletions.
+    """
+    values = {"preview_s3_key": keys["preview"], "thumbnail_s3_key": keys["thumb"]}
+    updated = await session.execute(
+        update(Blob)
+        .where(Blob.id == blob_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if not updated.rowcount:
+        await session.execute(
+            insert(StorageDeletion), [{"s3_key": key} for key in keys.values()]
+        )
+        return "orphaned"
+    await session.execute(
+        update(File)
+        .where(File.blob_id == blob_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return "ok"
+
+
+async def claim_missing_previews(
+    session: AsyncSession, after_id: int, limit: int
+) -> list:
+    """
+    Следующие limit картинок без превью после after_id (keyset по id): загрузка
+    старше PREVIEW_SWEEP_GRACE_SEC (свежие доделывает сам бот), не в архиве и с
+    попытками меньше PREVIEW_MAX_ATTEMPTS. Попытка засчитывается сразу при
+    выборе (commit — за вызывающим), так что битая картинка выпадет из добора.
+    """
+    candidates = (
+        select(Blob.id)
+        .where(
+            Blob.id > after_id,
+            Blob.preview_s3_key.is_(None),
+            Blob.mime_type.in_(PREVIEW_MIME_TYPES),
+            Blob.size <= PREVIEW_MAX_SOURCE_BYTES,
+            Blob.archived_at.is_(None),
+            Blob.preview_attempts < PREVIEW_MAX_ATTEMPTS,
+            Blob.created_at < func.now() - timedelta(seconds=PREVIEW_SWEEP_GRACE_SEC),
+        )
+        .order_by(Blob.id)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        update(Blob)
+        .where(Blob.id.in_(candidates))
+        .values(preview_attempts=Blob.preview_attempts + 1)
+        .returning(Blob.id, Blob.s3_key)
+        .execution_options(synchronize_session=False)
+    )
+    return sorted(result.all())
+
+
+async def backfill_previews(
+    session_maker=async_session_maker, batch_size: int = PREVIEW_SWEEP_BATCH_SIZE
+) -> int:
+    """
+    Добирает превью, которые не сделались после загрузки (бот упал или
+    перезапустился, ошибка S3). Пачка рендерится параллельно в пределах
+    PREVIEW_WORKERS. Возвращает число обработанных blob.
+    """
+    total, after_id = 0, 0
+    while True:
+        async with session_maker() as session:
+            rows = await claim_missing_previews(session, after_id, batch_size)
+            await session.commit()
+        if not rows:
+            return total
+        await asyncio.gather(
+            *(build_previews(row.id, row.s3_key, session_maker) for row in rows)
+        )
+        total += len(rows)
+        after_id = rows[-1].id
+
+
+def shutdown_previews() -> None:
+    """Останавливает пул процессов при завершении бота."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,164 @@
+# services/principal.py
+import logging
+from sqlalchemy import String, cast, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, make_transient_to_detached
+from config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SEC
+from models import User, Company, Trial, Subscription
+from services.subscriptions import build_subscription_status, cache_subscription_status
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class Principal:
+    """
+    Пользователь апдейта вместе с компанией, trial и последней подпиской.
+    Кладётся в data["principal"] и читается middleware, хэндлерами и декораторами
+    вместо отдельных запросов.
+    """
+
+    def __init__(
+        self,
+        user: User,
+        company: Company | None = None,
+        trial: Trial | None = None,
+        subscription: Subscription | None = None,
+        tenant_applied: bool = False,
+        billing_loaded: bool = False,
+    ):
+        self.user = user
+        self.company = company
+        self.trial = trial
+        self.subscription = subscription
+        # app.company_id уже выставлен в текущей транзакции
+        self.tenant_applied = tenant_applied
+        # trial/subscription загружены (из кэша principal берутся только user и company)
+        self.billing_loaded = billing_loaded
+
+    @property
+    def tg_id(self) -> int:
+        return self.user.tg_id
+
+    @property
+    def company_id(self) -> int | None:
+        return self.user.company_id
+
+    @property
+    def has_company(self) -> bool:
+        return self.user.company_id is not None
+
+    @property
+    def subscription_status(self) -> dict:
+        """То же, что get_company_subscription_status, но без запросов."""
+        return build_subscription_status(self.trial, self.subscription)
+
+
+def principal_query(tg_id: int):
+    """
+    Один SELECT: user + company + trial + последняя подписка.
+    В том же выражении set_config(..., true) выставляет app.company_id
+    на текущую транзакцию (то же, что SET LOCAL).
+    """
+    last_trial = aliased(Trial)
+    last_sub = aliased(Subscription)
+
+    trial_id = (
+        select(last_trial.id)
+        .where(last_trial.company_id == User.company_id)
+        .order_by(last_trial.id.desc())
+        .limit(1)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    subscription_id = (
+        select(last_sub.id)
+        .where(last_sub.company_id == User.company_id)
+        .order_by(last_sub.expires_at.desc())
+        .limit(1)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    tenant = func.set_config(
+        "app.company_id",
+        func.coalesce(cast(User.company_id, String), "-1"),
+        True,
+    )
+
+    return (
+        select(User, Company, Trial, Subscription, tenant.label("tenant"))
+        .outerjoin(Company, Company.id == User.company_id)
+        .outerjoin(Trial, Trial.id == trial_id)
+        .outerjoin(Subscription, Subscription.id == subscription_id)
+        .where(User.tg_id == tg_id)
+        # удалённого пользователя тоже находим: его апдейты отбрасывает
+        # RoleCheckerMiddleware, а не пересоздаёт учётку с тем же tg_id
+        .execution_options(include_deleted=True)
+    )
+
+
+async def resolve_principal(session: AsyncSession, tg_id: int) -> Principal | None:
+    """Principal по tg_id за один round trip (None — пользователя ещё нет)."""
+    row = (await session.execute(principal_query(tg_id))).first()
+    if row is None:
+        return None
+    user, company, trial, subscription, _ = row
+    return Principal(
+        user, company, trial, subscription, tenant_applied=True, billing_loaded=True
+    )
+
+
+# ---------- Кэш principal по tg_id ----------
+
+# Храним снимки колонок, а не ORM-объекты: объекты привязаны к сессии апдейта
+# и после rollback становятся expired.
+principal_cache = TTLCache(
+    "principal", maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SEC
+)
+
+
+def _snapshot(obj) -> dict | None:
+    if obj is None:
+        return None
+    return {a.key: getattr(obj, a.key) for a in inspect(obj).mapper.column_attrs}
+
+
+def _restore(model, snapshot: dict | None):
+    """Detached-объект из снимка, как будто только что загружен запросом."""
+    if snapshot is None:
+        return None
+    obj = model(**snapshot)
+    make_transient_to_detached(obj)
+    return obj
+
+
+def invalidate_principal(tg_id: int | None) -> None:
+    """Вызывать из всех мест, где меняются user.role / user.company_id."""
+    if tg_id is not None:
+        principal_cache.invalidate(tg_id)
+
+
+async def get_principal(session: AsyncSession, tg_id: int) -> Principal | None:
+    """
+    Principal из кэша без обращения к БД, при промахе — resolve_principal.
+    Статус подписки при попадании берётся из кэша get_company_subscription_status.
+    User из кэша подключается к сессии без запроса (merge load=False),
+    так что хэндлеры могут его менять как обычно.
+    """
+    cached = principal_cache.get(tg_id)
+    if cached is not None:
+        user_snapshot, company_snapshot = cached
+        user = await session.merge(_restore(User, user_snapshot), load=False)
+        return Principal(user, _restore(Company, company_snapshot))
+
+    principal = await resolve_principal(session, tg_id)
+    if principal is not None:
+        principal_cache.set(
+            tg_id, (_snapshot(principal.user), _snapshot(principal.company))
+        )
+        # статус уже посчитан по загруженным trial/подписке — прогреваем его кэш
+        if principal.has_company:
+            cache_subscription_status(
+                principal.company_id, principal.subscription_status
+            )
+    return principal
@@ -1,19 +1,17 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from datetime import datetime, UTC
+from sqlalchemy import select, update
 from models.project import Project
+from models.task import Task
+from services.pagination import IdPage, keyset_page, like_pattern
 
 
 async def create_project(session: AsyncSession, name: str, company_id: int) -> Project:
-    try:
-        new_project = Project(name=name, company_id=company_id)
-        session.add(new_project)
-        await session.flush()
-        await session.commit()  # Добавлен коммит
-        await session.refresh(new_project)  # Добавлено обновление объекта
-        return new_project
-    except Exception as e:
-        await session.rollback()  # Добавлен откат при ошибке
-        raise e
+    """Добавляет проект; flush ради id, commit — в DbSessionMiddleware."""
+    new_project = Project(name=name, company_id=company_id)
+    session.add(new_project)
+    await session.flush()
+    return new_project
 
 
 async def get_projects_by_company_id(
@@ -40,3 +38,53 @@ async def get_project_by_id_and_company(
         )
     )
     return result.scalar_one_or_none()
+
+
+async def get_projects_page(
+    session: AsyncSession,
+    company_id: int,
+    *,
+    query: str | None = None,
+    after: int | None = None,
+    before: int | None = None,
+    limit: int,
+) -> IdPage:
+    """
+    Страница (id, name) проектов компании для пикеров.
+    query — поиск по подстроке названия (trigram-индекс ix_projects_name_trgm).
+    """
+    stmt = select(Project.id, Project.name).where(Project.company_id == company_id)
+    if query:
+        stmt = stmt.where(Project.name.ilike(like_pattern(query), escape="\\"))
+    return await keyset_page(
+        session, stmt, Project.id, after=after, before=before, limit=limit
+    )
+
+
+async def soft_delete_project(
+    session: AsyncSession, project_id: int, company_id: int
+) -> bool:
+    """
+    Мягко удаляет проект вместе с его живыми задачами — одним временем deleted_at,
+    чтобы purge удалил их в одном проходе. Никаких каскадов и блокировок files.
+    """
+    now = datetime.now(UTC)
+    result = await session.execute(
+        update(Project)
+        .where(
+            Project.id == project_id,
+            Project.company_id == company_id,
+            Project.deleted_at.is_(None),
+        )
+        .values(deleted_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return False
+    await session.execute(
+        update(Task)
+        .where(Task.project_id == project_id, Task.deleted_at.is_(None))
+        .values(deleted_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    return True
@@ -0,0 +1,165 @@
+# services/purge.py
+import logging
+from datetime import datetime, timedelta, UTC
+
+from prometheus_client import Counter
+from sqlalchemy import delete, exists, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import SOFT_DELETE_RETENTION_DAYS
+from metrics.registry import registry
+from models import File, Project, StorageDeletion, Task
+from services.blobs import release_blobs
+from storage.s3 import storage
+
+logger = logging.getLogger(__name__)
+
+PURGED_ROWS_TOTAL = Counter(
+    "purged_rows_total",
+    "Soft-deleted rows physically removed by the purge job",
+    ["table"],
+    registry=registry,
+)
+STORAGE_DELETIONS_TOTAL = Counter(
+    "storage_deletions_total",
+    "S3 objects processed from the storage deletion queue",
+    ["status"],
+    registry=registry,
+)
+
+# Каждая функция — одна пачка в одной транзакции: commit и паузы между пачками
+# делает вызывающий (worker.py), чтобы блокировки держались недолго.
+# Пользователей не удаляем физически: на них ссылаются задачи, файлы и аудит.
+
+
+def purge_cutoff(retention_days: int = SOFT_DELETE_RETENTION_DAYS) -> datetime:
+    return datetime.now(UTC) - timedelta(days=retention_days)
+
+
+async def purge_tasks_batch(session: AsyncSession, cutoff: datetime, limit: int) -> int:
+    """
+    Удаляет до limit задач, мягко удалённых раньше cutoff, вместе с записями files.
+    Объекты S3, на которые больше никто не ссылается, ставятся в storage_deletions
+    в той же транзакции.
+    """
+    ids = (
+        (
+            await session.execute(
+                select(Task.id)
+                .where(Task.deleted_at < cutoff)
+                .order_by(Task.deleted_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .execution_options(include_deleted=True)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if not ids:
+        return 0
+
+    # старые файлы без blob — сразу в очередь S3; у остальных снимаем ссылки
+    # на blob после удаления строк files (объект удаляется с последней ссылкой)
+    await session.execute(
+        insert(StorageDeletion).from_select(
+            ["s3_key"],
+            select(File.s3_key).where(File.task_id.in_(ids), File.blob_id.is_(None)),
+        )
+    )
+    blob_ids = (
+        (
+            await session.execute(
+                delete(File)
+                .where(File.task_id.in_(ids))
+                .returning(File.blob_id)
+                .execution_options(synchronize_session=False)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    await release_blobs(session, blob_ids)
+    await session.execute(
+        delete(Task)
+        .where(Task.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    PURGED_ROWS_TOTAL.labels(table="tasks").inc(len(ids))
+    PURGED_ROWS_TOTAL.labels(table="files").inc(len(blob_ids))
+    return len(ids)
+
+
+async def purge_projects_batch(
+    session: AsyncSession, cutoff: datetime, limit: int
+) -> int:
+    """
+    Удаляет до limit проектов, мягко удалённых раньше cutoff, у которых
+    уже не осталось задач (их убирает purge_tasks_batch) — каскад FK ничего не делает.
+    """
+    no_tasks = ~exists().where(Task.project_id == Project.id)
+    ids = (
+        (
+            await session.execute(
+                select(Project.id)
+                .where(Project.deleted_at < cutoff, no_tasks)
+                .order_by(Project.deleted_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .execution_options(include_deleted=True)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if not ids:
+        return 0
+
+    await session.execute(
+        delete(Project)
+        .where(Project.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    PURGED_ROWS_TOTAL.labels(table="projects").inc(len(ids))
+    return len(ids)
+
+
+async def drain_storage_deletions(session: AsyncSession, limit: int) -> int:
+    """
+    Удаляет из S3 до limit объектов из очереди. Удалённые строки убираются
+    из очереди, неудачные остаются с attempts + 1 и будут повторены в следующий
+    запуск — после свежих, чтобы пачка вечно падающих ключей (AccessDenied)
+    не загораживала остальную очередь. Возвращает число удалённых (неполная
+    пачка останавливает run_batches).
+    """
+    rows = (
+        await session.execute(
+            select(StorageDeletion.id, StorageDeletion.s3_key)
+            # резервы идущих загрузок (services.blobs.reserve_upload_key) ждут своего срока
+            .where(StorageDeletion.queued_at <= func.now())
+            .order_by(StorageDeletion.attempts, StorageDeletion.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    ).all()
+    if not rows:
+        return 0
+
+    failed = set(await storage.delete_objects([key for _, key in rows]))
+    done = [row_id for row_id, key in rows if key not in failed]
+    retry = [row_id for row_id, key in rows if key in failed]
+
+    if done:
+        await session.execute(
+            delete(StorageDeletion).where(StorageDeletion.id.in_(done))
+        )
+    if retry:
+        logger.warning("Не удалось удалить из S3 %s объект(ов)", len(retry))
+        await session.execute(
+            update(StorageDeletion)
+            .where(StorageDeletion.id.in_(retry))
+            .values(attempts=StorageDeletion.attempts + 1)
+        )
+    STORAGE_DELETIONS_TOTAL.labels(status="deleted").inc(len(done))
+    STORAGE_DELETIONS_TOTAL.labels(status="failed").inc(len(retry))
+    return len(done)
@@ -4,6 +4,7 @@ import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
 from models.plan import Plan
+from services.plans import plan_catalog, plans_checksum
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +36,7 @@ DEFAULT_PLANS = [
 async def seed_plans(session: AsyncSession) -> None:
     """
     UPSERT тарифов: обновляет поля, если тариф уже существует.
+    После коммита перечитывает каталог тарифов, если сид с ним расходится.
     """
     for plan in DEFAULT_PLANS:
         stmt = insert(Plan).values(**plan)
@@ -63,3 +65,6 @@ async def seed_plans(session: AsyncSession) -> None:
 
     await session.commit()
     logger.info("✅ Синхронизация тарифов завершена (созданы/обновлены)")
+
+    if plan_catalog.checksum != plans_checksum(DEFAULT_PLANS):
+        await plan_catalog.load(session)
@@ -1,12 +1,19 @@
 # services/subscription.py
 import logging
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from utils.enums import SubscriptionStatus
-from config import TRIAL_DAYS_DEFAULT
-from models import Trial, Subscription, Plan, User
-
+from config import (
+    TRIAL_DAYS_DEFAULT,
+    SUBSCRIPTION_STATUS_CACHE_SIZE,
+    SUBSCRIPTION_STATUS_CACHE_TTL_SEC,
+)
+from database import on_commit
+from models import Trial, Subscription, User
+from services.plans import PlanInfo, get_plan_by_code, plan_catalog
+from utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +24,53 @@ class PermissionDenied(Exception):
     """Ошибка доступа при отсутствии подписки."""
 
 
+# ---------- Кэш статуса подписки ----------
+
+subscription_status_cache = TTLCache(
+    "subscription_status",
+    maxsize=SUBSCRIPTION_STATUS_CACHE_SIZE,
+    ttl=SUBSCRIPTION_STATUS_CACHE_TTL_SEC,
+)
+
+
+def invalidate_subscription_status(company_id: int | None) -> None:
+    """Вызывать из всех мест, где меняются Trial/Subscription компании."""
+    if company_id is not None:
+        subscription_status_cache.invalidate(company_id)
+
+
+def invalidate_subscription_status_on_commit(session, company_id: int | None) -> None:
+    """
+    Сброс после commit сессии: иначе параллельный читатель успеет закэшировать
+    ещё не закоммиченный (старый) статус до конца TTL.
+    """
+    on_commit(session, partial(invalidate_subscription_status, company_id))
+
+
+def cache_subscription_status(company_id: int, status: dict) -> None:
+    """
+    Кладёт статус в кэш до ближайшей границы: активные сейчас trial/подписка
+    перестают быть активными в свой expires_at, поэтому запись живёт
+    не дольше min(TTL, expires_at). Неактивные со временем активными не станут.
+    """
+    now = datetime.now(UTC)
+    boundaries = []
+    if status["trial"]["is_active"]:
+        boundaries.append(status["trial"]["expires_at"])
+    sub = status["subscription"]
+    if (
+        sub["status"] == SubscriptionStatus.active.value
+        and sub["expires_at"]
+        and sub["expires_at"] > now
+    ):
+        boundaries.append(sub["expires_at"])
+
+    ttl = SUBSCRIPTION_STATUS_CACHE_TTL_SEC
+    for expires_at in boundaries:
+        ttl = min(ttl, (expires_at - now).total_seconds())
+    subscription_status_cache.set(company_id, status, ttl=ttl)
+
+
 # ---------- Trial ----------
 
 
@@ -65,15 +119,16 @@ async def extend_trial(
         trial.expires_at = base + timedelta(days=extra_days)
         trial.is_active = True
         await session.flush()
+    invalidate_subscription_status_on_commit(session, company_id)
     return trial
 
 
 # ---------- Subscriptions ----------
 
 
-async def _get_plan(session: AsyncSession, plan_code: str) -> Plan | None:
-    q = await session.execute(select(Plan).where(Plan.code == plan_code))
-    return q.scalar_one_or_none()
+async def _get_plan(session: AsyncSession, plan_code: str) -> PlanInfo | None:
+    # из каталога в памяти; в БД идём, только если такого кода там нет
+    return await get_plan_by_code(session, plan_code)
 
 
 async def start_paid_subscription(
@@ -103,6 +158,7 @@ async def start_paid_subscription(
         t.is_active = False
 
     await session.flush()
+    invalidate_subscription_status_on_commit(session, company_id)
     logger.info(
         "Подписка: company_id=%s, plan=%s, months=%s, expires_at=%s",
         company_id,
@@ -124,6 +180,7 @@ async def pause_subscription(session: AsyncSession, company_id: int) -> bool:
         return False
     sub.status = SubscriptionStatus.paused.value
     await session.flush()
+    invalidate_subscription_status_on_commit(session, company_id)
     return True
 
 
@@ -138,6 +195,7 @@ async def resume_subscription(session: AsyncSession, company_id: int) -> bool:
         return False
     sub.status = SubscriptionStatus.active.value
     await session.flush()
+    invalidate_subscription_status_on_commit(session, company_id)
     return True
 
 
@@ -152,6 +210,7 @@ async def cancel_subscription(session: AsyncSession, company_id: int) -> bool:
         return False
     sub.status = SubscriptionStatus.canceled.value
     await session.flush()
+    invalidate_subscription_status_on_commit(session, company_id)
     return True
 
 
@@ -169,6 +228,7 @@ async def mark_expired_if_needed(session: AsyncSession, company_id: int) -> bool
     if sub.status == SubscriptionStatus.active.value and sub.expires_at <= now:
         sub.status = SubscriptionStatus.expired.value
         await session.flush()
+        invalidate_subscription_status_on_commit(session, company_id)
         return True
     return False
 
@@ -183,29 +243,9 @@ async def has_active_subscription_for_user(session: AsyncSession, user_id: int)
     if not user or not user.company_id:
         return False
 
-    company_id = user.company_id
-
-    # Проверяем trial
-    q_trial = await session.execute(select(Trial).where(Trial.company_id == company_id))
-    trial = q_trial.scalar_one_or_none()
-    if trial and trial.is_active and trial.expires_at > datetime.now(UTC):
-        return True
-
-    # Проверяем подписку
-    q_sub = await session.execute(
-        select(Subscription)
-        .where(Subscription.company_id == company_id)
-        .order_by(Subscription.expires_at.desc())
-    )
-    sub = q_sub.scalars().first()
-    if (
-        sub
-        and sub.status == SubscriptionStatus.active.value
-        and sub.expires_at > datetime.now(UTC)
-    ):
-        return True
-
-    return False
+    # trial и подписка — через кэшируемый статус компании
+    status = await get_company_subscription_status(session, user.company_id)
+    return status["available"]
 
 
 # ---------- Helpers ----------
@@ -223,7 +263,15 @@ async def set_plan_for_company(
 async def get_company_subscription_status(
     session: AsyncSession, company_id: int
 ) -> dict:
-    """Сводный статус доступа: trial/subscription/available."""
+    """
+    Сводный статус доступа: trial/subscription/available.
+    Результат кэшируется по company_id (см. cache_subscription_status);
+    возвращаемый dict общий — не изменяйте его.
+    """
+    cached = subscription_status_cache.get(company_id)
+    if cached is not None:
+        return cached
+
     # trial
     q_t = await session.execute(select(Trial).where(Trial.company_id == company_id))
     t = q_t.scalar_one_or_none()
@@ -236,11 +284,19 @@ async def get_company_subscription_status(
     )
     s = q_s.scalars().first()
 
-    trial_active = bool(t and t.is_active and t.expires_at > datetime.now(UTC))
+    status = build_subscription_status(t, s)
+    # прочитанное с реплики может отставать — в кэш не кладём
+    if not session.info.get("replica"):
+        cache_subscription_status(company_id, status)
+    return status
+
+
+def build_subscription_status(t: Trial | None, s: Subscription | None) -> dict:
+    """Статус доступа по уже загруженным trial и последней подписке."""
+    now = datetime.now(UTC)
+    trial_active = bool(t and t.is_active and t.expires_at > now)
     sub_active = bool(
-        s
-        and s.status == SubscriptionStatus.active.value
-        and s.expires_at > datetime.now(UTC)
+        s and s.status == SubscriptionStatus.active.value and s.expires_at > now
     )
 
     return {
@@ -261,6 +317,18 @@ async def get_company_subscription_status(
     }
 
 
+async def get_company_plan(session: AsyncSession, company_id: int) -> PlanInfo | None:
+    """
+    Тариф активной платной подписки компании (None — trial или нет подписки).
+    Статус берётся из кэша, тариф — из каталога, так что проверка
+    plan.features.has(...) в хэндлерах обычно не делает запросов.
+    """
+    sub = (await get_company_subscription_status(session, company_id))["subscription"]
+    if sub["status"] != SubscriptionStatus.active.value:
+        return None
+    return plan_catalog.by_id(sub["plan_id"])
+
+
 # Алиас для обратной совместимости
 async def create_subscription(
     session, company_id, plan_code, actor_id=None, commit=True
@@ -1,8 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.orm import joinedload
 from models.task import Task
 from datetime import datetime, UTC
 from typing import Optional
+from config import TASKS_PAGE_SIZE
+from services.pagination import IdPage, keyset_page, like_pattern
+from utils.enums import TaskStatus
 
 
 async def create_task(
@@ -13,23 +17,18 @@ async def create_task(
     company_id: int,
     user_id: int,
 ) -> Task:
-    try:
-        new_task = Task(
-            title=title,
-            description=description,
-            project_id=project_id,
-            company_id=company_id,
-            user_id=user_id,
-            created_at=datetime.now(UTC),
-        )
-        session.add(new_task)
-        await session.flush()
-        await session.commit()  # Добавляем коммит
-        await session.refresh(new_task)  # Обновляем объект
-        return new_task
-    except Exception as e:
-        await session.rollback()
-        raise e
+    """Добавляет задачу; flush ради id, commit — в DbSessionMiddleware."""
+    new_task = Task(
+        title=title,
+        description=description,
+        project_id=project_id,
+        company_id=company_id,
+        user_id=user_id,
+        created_at=datetime.now(UTC),
+    )
+    session.add(new_task)
+    await session.flush()
+    return new_task
 
 
 async def get_task_by_id_and_company(
@@ -46,12 +45,103 @@ async def get_task_by_id_and_company(
 
 async def get_my_tasks(session: AsyncSession, user_id: int) -> list[Task]:
     """
-    Получает все задачи, назначенные текущему пользователю.
+    Получает все задачи, назначенные текущему пользователю (вместе с проектом).
     """
-    result = await session.execute(select(Task).where(Task.user_id == user_id))
+    result = await session.execute(
+        select(Task).options(joinedload(Task.project)).where(Task.user_id == user_id)
+    )
     return result.scalars().all()
 
 
+class TaskPage:
+    """
+    Страница задач для keyset-пагинации по (status, id).
+    Ключи first/last — курсоры для кнопок «назад»/«вперёд».
+    """
+
+    __slots__ = ("tasks", "has_prev", "has_next")
+
+    def __init__(self, tasks: list[Task], has_prev: bool, has_next: bool):
+        self.tasks = tasks
+        self.has_prev = has_prev
+        self.has_next = has_next
+
+    @property
+    def first(self) -> tuple[TaskStatus, int] | None:
+        return (self.tasks[0].status, self.tasks[0].id) if self.tasks else None
+
+    @property
+    def last(self) -> tuple[TaskStatus, int] | None:
+        return (self.tasks[-1].status, self.tasks[-1].id) if self.tasks else None
+
+
+async def get_my_tasks_page(
+    session: AsyncSession,
+    user_id: int,
+    *,
+    status: TaskStatus | None = None,
+    project_id: int | None = None,
+    after: tuple[TaskStatus, int] | None = None,
+    before: tuple[TaskStatus, int] | None = None,
+    limit: int = TASKS_PAGE_SIZE,
+) -> TaskPage:
+    """
+    Страница задач пользователя, упорядоченных по (status, id), вместе с проектами.
+    after — следующая страница за курсором, before — предыдущая перед ним.
+    Один запрос (LIMIT limit + 1) по индексу ix_tasks_user_id_status_id.
+    """
+    key = tuple_(Task.status, Task.id)
+    stmt = (
+        select(Task)
+        .options(joinedload(Task.project))
+        .where(Task.user_id == user_id)
+        .limit(limit + 1)
+    )
+    if status is not None:
+        stmt = stmt.where(Task.status == status)
+    if project_id is not None:
+        stmt = stmt.where(Task.project_id == project_id)
+
+    if before is not None:
+        # идём назад: берём ближайшие к курсору и разворачиваем
+        stmt = stmt.where(key < before).order_by(Task.status.desc(), Task.id.desc())
+        tasks = list((await session.execute(stmt)).scalars().all())
+        has_prev = len(tasks) > limit
+        return TaskPage(tasks[:limit][::-1], has_prev=has_prev, has_next=True)
+
+    if after is not None:
+        stmt = stmt.where(key > after)
+    stmt = stmt.order_by(Task.status, Task.id)
+    tasks = list((await session.execute(stmt)).scalars().all())
+    return TaskPage(
+        tasks[:limit], has_prev=after is not None, has_next=len(tasks) > limit
+    )
+
+
+async def get_project_tasks_page(
+    session: AsyncSession,
+    project_id: int,
+    company_id: int,
+    *,
+    query: str | None = None,
+    after: int | None = None,
+    before: int | None = None,
+    limit: int,
+) -> IdPage:
+    """
+    Страница (id, title) задач проекта для пикеров; чужая компания — пустая страница.
+    query — поиск по подстроке заголовка (trigram-индекс ix_tasks_title_trgm).
+    """
+    stmt = select(Task.id, Task.title).where(
+        Task.project_id == project_id, Task.company_id == company_id
+    )
+    if query:
+        stmt = stmt.where(Task.title.ilike(like_pattern(query), escape="\\"))
+    return await keyset_page(
+        session, stmt, Task.id, after=after, before=before, limit=limit
+    )
+
+
 # --- ИЗМЕНЕНИЕ: reassign_task ---
 # Вместо get_task_by_id (уязвимой) используем get_task_by_id_and_company (безопасную)
 async def reassign_task(
@@ -84,3 +174,23 @@ async def set_task_status(
         task.status = status
         session.add(task)
     return task
+
+
+async def soft_delete_task(
+    session: AsyncSession, task_id: int, company_id: int
+) -> bool:
+    """
+    Мягко удаляет задачу компании: только deleted_at, файлы остаются до purge.
+    Возвращает False, если задачи нет (или она уже удалена).
+    """
+    result = await session.execute(
+        update(Task)
+        .where(
+            Task.id == task_id,
+            Task.company_id == company_id,
+            Task.deleted_at.is_(None),
+        )
+        .values(deleted_at=datetime.now(UTC))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
@@ -1,6 +1,6 @@
 # scripts/test_s3.py
 import asyncio
-from storage.s3 import generate_presigned_put_url, generate_presigned_get_url
+from storage.s3 import storage
 import aiohttp
 import uuid
 
@@ -10,7 +10,7 @@ async def main():
     object_name = f"test/{uuid.uuid4()}.txt"
 
     # Получаем URL для загрузки
-    put_url = await generate_presigned_put_url(object_name)
+    put_url = storage.presign_put(object_name)
     print("PUT URL:", put_url)
 
     # Загружаем файл через aiohttp
@@ -19,7 +19,7 @@ async def main():
             print("Upload status:", resp.status)
 
     # Получаем URL для скачивания
-    get_url = await generate_presigned_get_url(object_name)
+    get_url = storage.presign_get(object_name)
     print("GET URL:", get_url)
 
     # Скачиваем файл
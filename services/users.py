@@ -1,17 +1,21 @@
 # services/users.py
 import logging
+from functools import partial
 from datetime import datetime, UTC
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from database import on_commit
 from models.user import User
+from services.principal import invalidate_principal
 from utils.enums import UserRole
 
 logger = logging.getLogger(__name__)
 
 
 async def get_or_create_user(session: AsyncSession, tg_id: int):
+    # tg_id уникален и среди удалённых — ищем с ними, чтобы не создать дубль
     q = select(User).where(User.tg_id == tg_id)
-    res = await session.execute(q)
+    res = await session.execute(q, execution_options={"include_deleted": True})
     user = res.scalar_one_or_none()
     if user:
         return user, False
@@ -26,6 +30,8 @@ async def get_or_create_user(session: AsyncSession, tg_id: int):
     )
     session.add(user)
     await session.flush()  # получаем ID
+    # сброс кэша — после commit, иначе параллельный апдейт закэширует старое
+    on_commit(session, partial(invalidate_principal, tg_id))
     return user, True
 
 
@@ -53,4 +59,18 @@ async def set_user_role_and_company(
 
     user.role = role
     await session.flush()
+    on_commit(session, partial(invalidate_principal, user.tg_id))
+    return user
+
+
+async def soft_delete_user(session: AsyncSession, user: User) -> User:
+    """
+    Мягко удаляет пользователя. Строка остаётся навсегда (на неё ссылаются задачи,
+    файлы и аудит), апдейты такого пользователя отбрасывает RoleCheckerMiddleware.
+    """
+    user.deleted_at = datetime.now(UTC)
+    user.is_active = False
+    session.add(user)
+    await session.flush()
+    on_commit(session, partial(invalidate_principal, user.tg_id))
     return user
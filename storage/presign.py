@@ -0,0 +1,111 @@
+import time
+from urllib.parse import quote
+
+from botocore.auth import S3SigV4QueryAuth
+from botocore.awsrequest import AWSRequest
+
+from utils.cache import TTLCache
+
+# S3 не принимает presign дольше 7 дней
+MAX_PRESIGN_EXPIRES_SEC = 7 * 24 * 3600
+
+# операция boto3 -> HTTP-метод подписываемого запроса
+PRESIGN_METHODS = {"get_object": "GET", "put_object": "PUT"}
+
+
+class PresignedUrl:
+    """Подписанная ссылка и момент (time.time()), после которого S3 её отвергнет."""
+
+    __slots__ = ("url", "expires_at")
+
+    def __init__(self, url: str, expires_at: float):
+        self.url = url
+        self.expires_at = expires_at
+
+    @property
+    def minutes_left(self) -> int:
+        return max(int((self.expires_at - time.time()) // 60), 0)
+
+
+def bucket_base_url(bucket: str, region: str, endpoint_url: str | None) -> str:
+    """Как boto3: свой endpoint (MinIO) — path-style, AWS — virtual host региона."""
+    if endpoint_url:
+        return f"{endpoint_url.rstrip('/')}/{bucket}"
+    return f"https://{bucket}.s3.{region}.amazonaws.com"
+
+
+def credentials_expiry(credentials) -> float | None:
+    """
+    Когда истекают временные ключи (time.time()); None — у статических.
+    botocore хранит срок только в RefreshableCredentials._expiry_time.
+    """
+    expiry = getattr(credentials, "_expiry_time", None)
+    return expiry.timestamp() if expiry is not None else None
+
+
+class LocalPresigner:
+    """
+    SigV4 query-подпись без boto3-клиента и без сети: HMAC над каноническим
+    запросом (botocore.auth). Учётные данные разрешаются один раз снаружи;
+    у временных (IAM-роль) берётся актуальный снимок на каждую подпись.
+
+    Подписанные ссылки кэшируются по (операция, ключ) до expires_at − margin,
+    так что повторная ссылка на тот же объект в течение часа — попадание в кэш.
+    Ссылка на временных ключах живёт не дольше их сессии — expires_at
+    ограничивается сроком снимка.
+    """
+
+    __slots__ = ("base_url", "region", "credentials", "margin", "cache")
+
+    def __init__(
+        self,
+        base_url: str,
+        region: str,
+        credentials,
+        *,
+        cache_size: int,
+        margin: float,
+    ):
+        self.base_url = base_url
+        self.region = region
+        self.credentials = credentials
+        self.margin = margin
+        self.cache = TTLCache(
+            "presign", maxsize=cache_size, ttl=MAX_PRESIGN_EXPIRES_SEC
+        )
+
+    def sign(self, operation: str, key: str, expires_in: int) -> PresignedUrl:
+        """Ссылка из кэша, если она проживёт ещё не меньше margin, иначе новая подпись."""
+        cached = self.cache.get((operation, key))
+        if cached is not None:
+            return cached
+
+        expires_in = min(expires_in, MAX_PRESIGN_EXPIRES_SEC)
+        signed_at = time.time()
+        request = AWSRequest(
+            method=PRESIGN_METHODS[operation],
+            url=f"{self.base_url}/{quote(key, safe='/~')}",
+        )
+        # снимок берётся до чтения срока: get_frozen_credentials может обновить ключи
+        frozen = self.credentials.get_frozen_credentials()
+        expires_at = signed_at + expires_in
+        credentials_expire_at = credentials_expiry(self.credentials)
+        if credentials_expire_at is not None:
+            expires_at = min(expires_at, credentials_expire_at)
+        S3SigV4QueryAuth(frozen, "s3", self.region, expires=expires_in).add_auth(
+            request
+        )
+        presigned = PresignedUrl(request.prepare().url, expires_at)
+        # запись живёт, пока до истечения ссылки больше margin; короткие не кэшируем
+        ttl = expires_at - signed_at - self.margin
+        if ttl > 0:
+            self.cache.set((operation, key), presigned, ttl=ttl)
+        return presigned
+
+    def sign_many(
+        self, operation: str, keys: list[str], expires_in: int
+    ) -> dict[str, PresignedUrl]:
+        """Подписи для списка объектов (листинги): повторы ключей подписываются раз."""
+        return {
+            key: self.sign(operation, key, expires_in) for key in dict.fromkeys(keys)
+        }
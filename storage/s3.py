@@ -1,27 +1,67 @@
+import asyncio
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import boto3
 from botocore.client import Config
+from botocore.credentials import Credentials
 from botocore.exceptions import ClientError
-from uuid import uuid4
+from prometheus_client import Gauge, Histogram
+
+from metrics.registry import registry
+from storage.presign import LocalPresigner, PresignedUrl, bucket_base_url
 
 S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID")
 S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY")
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 S3_REGION = os.getenv("S3_REGION", "us-east-1")
 S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "http://minio:9000")
+# Одновременных запросов к S3 на процесс: столько же потоков в executor
+# и keep-alive соединений в пуле клиента
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", 16))
+# Кэш подписанных ссылок: число записей и запас до истечения, после которого
+# ссылка уже не выдаётся повторно (секунды)
+PRESIGN_CACHE_SIZE = int(os.getenv("PRESIGN_CACHE_SIZE", 10000))
+PRESIGN_CACHE_MARGIN_SEC = float(os.getenv("PRESIGN_CACHE_MARGIN_SEC", 300))
 
+S3_OPERATION_DURATION = Histogram(
+    "s3_operation_duration_seconds",
+    "S3 operation latency including executor queueing",
+    ["operation", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    registry=registry,
+)
+S3_INFLIGHT = Gauge(
+    "s3_operations_inflight",
+    "S3 operations submitted to the executor and not finished yet",
+    registry=registry,
+)
 
-def get_s3_client():
+
+def build_s3_client():
+    """boto3-клиент с пулом keep-alive соединений под S3_MAX_CONCURRENCY потоков."""
     return boto3.client(
         "s3",
         endpoint_url=S3_ENDPOINT_URL,
         aws_access_key_id=S3_ACCESS_KEY_ID,
         aws_secret_access_key=S3_SECRET_ACCESS_KEY,
         region_name=S3_REGION,
-        config=Config(signature_version="s3v4"),
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=S3_MAX_CONCURRENCY,
+            tcp_keepalive=True,
+            retries={"mode": "standard"},
+        ),
     )
 
 
+def get_s3_client():
+    """Общий клиент процесса (для скриптов); в async-коде — storage."""
+    return storage.client
+
+
 def ensure_bucket_exists(bucket_name: str = S3_BUCKET_NAME):
     """
     Проверяет, что bucket существует. Если нет — создаёт.
@@ -62,28 +102,237 @@ def ensure_bucket_exists(bucket_name: str = S3_BUCKET_NAME):
             return False
 
 
-def generate_presigned_put_url(key: str = None, expires_in: int = 3600) -> str:
+class S3Storage:
     """
-    Генерация временной ссылки для загрузки файла (PUT).
+    Асинхронный доступ к бакету через один долгоживущий boto3-клиент.
+
+    Клиент строится один раз (лениво, в потоке executor) и потокобезопасен;
+    соединения переиспользуются из его пула. Блокирующие вызовы boto3 идут
+    в ThreadPoolExecutor на S3_MAX_CONCURRENCY потоков, так что event loop
+    не ждёт сеть, а число одновременных запросов ограничено.
     """
-    if key is None:
-        key = f"uploads/{uuid4()}.bin"
 
-    client = get_s3_client()
-    return client.generate_presigned_url(
-        "put_object",
-        Params={"Bucket": S3_BUCKET_NAME, "Key": key},
-        ExpiresIn=expires_in,
-    )
+    __slots__ = ("bucket", "_client", "_lock", "_executor", "_presigner")
 
+    def __init__(
+        self, bucket: str | None = S3_BUCKET_NAME, max_workers: int = S3_MAX_CONCURRENCY
+    ):
+        self.bucket = bucket
+        self._client = None
+        self._presigner: LocalPresigner | None = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="s3"
+        )
 
-def generate_presigned_get_url(key: str, expires_in: int = 3600) -> str:
-    """
-    Генерация временной ссылки для скачивания файла (GET).
-    """
-    client = get_s3_client()
-    return client.generate_presigned_url(
-        "get_object",
-        Params={"Bucket": S3_BUCKET_NAME, "Key": key},
-        ExpiresIn=expires_in,
-    )
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = build_s3_client()
+        return self._client
+
+    async def _call(self, operation: str, method: str, **params):
+        """Вызов метода клиента в executor с метрикой латентности."""
+
+        def run():
+            return getattr(self.client, method)(**params)
+
+        return await self._run(operation, run)
+
+    async def _run(self, operation: str, fn):
+        loop = asyncio.get_running_loop()
+        status = "ok"
+        started = time.perf_counter()
+        S3_INFLIGHT.inc()
+        try:
+            return await loop.run_in_executor(self._executor, fn)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            S3_INFLIGHT.dec()
+            S3_OPERATION_DURATION.labels(operation=operation, status=status).observe(
+                time.perf_counter() - started
+            )
+
+    # ---------- объекты ----------
+
+    async def put_object(
+        self, key: str, body, content_type: str | None = None, **extra
+    ) -> dict:
+        """
+        body — bytes или файлоподобный объект (читается в потоке executor).
+        extra — прочие параметры PutObject (StorageClass, ContentEncoding, ...).
+        """
+        params = {"Bucket": self.bucket, "Key": key, "Body": body, **extra}
+        if content_type:
+            params["ContentType"] = content_type
+        return await self._call("put", "put_object", **params)
+
+    async def get_object(self, key: str) -> bytes:
+        def run():
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+            with response["Body"] as stream:
+                return stream.read()
+
+        return await self._run("get", run)
+
+    async def iter_object(self, key: str, chunk_size: int = 1024 * 1024):
+        """Содержимое объекта чанками, без чтения целиком в память."""
+        response = await self._call("get", "get_object", Bucket=self.bucket, Key=key)
+        loop = asyncio.get_running_loop()
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await loop.run_in_executor(
+                    self._executor, body.read, chunk_size
+                )
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            body.close()
+
+    async def set_storage_class(self, key: str, storage_class: str) -> None:
+        """Меняет класс хранения на месте (CopyObject в себя, без скачивания; до 5 ГБ)."""
+        await self._call(
+            "copy",
+            "copy_object",
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": self.bucket, "Key": key},
+            StorageClass=storage_class,
+            MetadataDirective="COPY",
+        )
+
+    async def head_object(self, key: str) -> dict | None:
+        """Метаданные объекта или None, если его нет."""
+        try:
+            return await self._call("head", "head_object", Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in (
+                "404",
+                "NoSuchKey",
+                "NotFound",
+            ):
+                return None
+            raise
+
+    async def delete_object(self, key: str) -> None:
+        await self._call("delete", "delete_object", Bucket=self.bucket, Key=key)
+
+    async def delete_objects(self, keys: list[str]) -> list[str]:
+        """
+        Удаляет объекты пачками по 1000 (лимит DeleteObjects).
+        Возвращает ключи, которые удалить не удалось.
+        """
+        failed = []
+        while keys:
+            chunk, keys = keys[:1000], keys[1000:]
+            response = await self._call(
+                "delete_many",
+                "delete_objects",
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": k} for k in chunk], "Quiet": True},
+            )
+            failed.extend(e["Key"] for e in response.get("Errors", []))
+        return failed
+
+    # ---------- multipart ----------
+
+    async def create_multipart_upload(
+        self, key: str, content_type: str | None = None, **extra
+    ) -> str:
+        params = {"Bucket": self.bucket, "Key": key, **extra}
+        if content_type:
+            params["ContentType"] = content_type
+        response = await self._call(
+            "multipart_create", "create_multipart_upload", **params
+        )
+        return response["UploadId"]
+
+    async def upload_part(
+        self, key: str, upload_id: str, part_number: int, body: bytes
+    ) -> str:
+        """Загружает часть (>= 5 МБ, кроме последней); возвращает ETag."""
+        response = await self._call(
+            "multipart_part",
+            "upload_part",
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return response["ETag"]
+
+    async def complete_multipart_upload(
+        self, key: str, upload_id: str, etags: list[str]
+    ) -> dict:
+        """etags — по порядку частей, начиная с PartNumber=1."""
+        parts = [{"PartNumber": n, "ETag": etag} for n, etag in enumerate(etags, 1)]
+        return await self._call(
+            "multipart_complete",
+            "complete_multipart_upload",
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+    async def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        await self._call(
+            "multipart_abort",
+            "abort_multipart_upload",
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+        )
+
+    # ---------- presign ----------
+    # Подпись — чистый HMAC без сети и без клиента (storage.presign), поэтому
+    # синхронно и прямо на event loop, с кэшем по (операция, ключ).
+
+    @property
+    def presigner(self) -> LocalPresigner:
+        if self._presigner is None:
+            if S3_ACCESS_KEY_ID and S3_SECRET_ACCESS_KEY:
+                credentials = Credentials(S3_ACCESS_KEY_ID, S3_SECRET_ACCESS_KEY)
+            else:
+                # цепочка boto3 (env, профиль, IAM-роль) — разрешается один раз
+                credentials = boto3.Session().get_credentials()
+            self._presigner = LocalPresigner(
+                bucket_base_url(self.bucket, S3_REGION, S3_ENDPOINT_URL),
+                S3_REGION,
+                credentials,
+                cache_size=PRESIGN_CACHE_SIZE,
+                margin=PRESIGN_CACHE_MARGIN_SEC,
+            )
+        return self._presigner
+
+    def presign(self, operation: str, key: str, expires_in: int = 3600) -> PresignedUrl:
+        """operation — get_object или put_object; ссылка живёт не меньше margin."""
+        return self.presigner.sign(operation, key, expires_in)
+
+    def presign_many(
+        self, keys: list[str], expires_in: int = 3600
+    ) -> dict[str, PresignedUrl]:
+        """GET-ссылки на много объектов разом — для листингов файлов."""
+        return self.presigner.sign_many("get_object", keys, expires_in)
+
+    def presign_get(self, key: str, expires_in: int = 3600) -> str:
+        """Временная ссылка на скачивание (GET)."""
+        return self.presign("get_object", key, expires_in).url
+
+    def presign_put(self, key: str, expires_in: int = 3600) -> str:
+        """Временная ссылка на загрузку (PUT)."""
+        return self.presign("put_object", key, expires_in).url
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Один экземпляр на процесс
+storage = S3Storage()
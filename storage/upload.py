@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import logging
+import os
+from typing import AsyncIterator, Awaitable, Callable
+
+from storage.s3 import S3Storage, storage as default_storage
+
+logger = logging.getLogger(__name__)
+
+# Размер части multipart (S3: не меньше 5 МБ, кроме последней). Файл меньше
+# одной части уходит одним PUT. Памяти на загрузку — не больше двух частей:
+# одна копится, предыдущая в это время отправляется.
+UPLOAD_PART_SIZE = max(
+    int(os.getenv("UPLOAD_PART_SIZE", 8 * 1024 * 1024)), 5 * 1024 * 1024
+)
+
+
+# sha256 -> ключ уже существующего объекта с тем же содержимым (или None)
+Dedup = Callable[[str], Awaitable[str | None]]
+
+
+class UploadResult:
+    """uploaded=False — содержимое уже было в хранилище, key указывает на него."""
+
+    __slots__ = ("key", "size", "sha256", "parts", "uploaded")
+
+    def __init__(
+        self, key: str, size: int, sha256: str, parts: int, uploaded: bool = True
+    ):
+        self.key = key
+        self.size = size
+        self.sha256 = sha256
+        self.parts = parts
+        self.uploaded = uploaded
+
+
+class StreamingUpload:
+    """
+    Потоковая загрузка в S3 с постоянной памятью: чанки копятся в буфер
+    размером в часть, полная часть уходит через upload_part, пока читается
+    следующая. Размер и sha256 считаются в том же проходе.
+    """
+
+    __slots__ = (
+        "storage",
+        "key",
+        "content_type",
+        "part_size",
+        "params",
+        "size",
+        "_hash",
+        "_buffer",
+        "_upload_id",
+        "_etags",
+        "_pending",
+    )
+
+    def __init__(
+        self,
+        key: str,
+        content_type: str | None = None,
+        *,
+        storage: S3Storage = default_storage,
+        part_size: int = UPLOAD_PART_SIZE,
+        params: dict | None = None,
+    ):
+        self.storage = storage
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        # доп. параметры PutObject/CreateMultipartUpload (StorageClass, ContentEncoding)
+        self.params = params or {}
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._buffer = bytearray()
+        self._upload_id: str | None = None
+        self._etags: list[str] = []
+        self._pending: asyncio.Task | None = None
+
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        self._buffer += chunk
+        while len(self._buffer) >= self.part_size:
+            with memoryview(self._buffer) as view:
+                part = bytes(view[: self.part_size])
+            del self._buffer[: self.part_size]
+            await self._send_part(part)
+
+    async def _send_part(self, part: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = await self.storage.create_multipart_upload(
+                self.key, self.content_type, **self.params
+            )
+        # не больше одной части в полёте: ждём предыдущую, прежде чем отдать новую
+        await self._wait_pending()
+        self._etags.append(None)
+        self._pending = asyncio.create_task(self._upload_part(len(self._etags), part))
+
+    async def _upload_part(self, number: int, part: bytes) -> None:
+        etag = await self.storage.upload_part(self.key, self._upload_id, number, part)
+        self._etags[number - 1] = etag
+
+    async def _wait_pending(self) -> None:
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            await pending
+
+    async def finish(self, dedup: Dedup | None = None) -> UploadResult:
+        """
+        Дописывает остаток. Если файл уместился в одну часть, хэш известен
+        до PUT: dedup может вернуть ключ существующего объекта, и PUT не нужен.
+        """
+        tail = bytes(self._buffer)
+        self._buffer.clear()
+        if self._upload_id is None:
+            sha256 = self._hash.hexdigest()
+            existing = await dedup(sha256) if dedup is not None else None
+            if existing is not None:
+                return UploadResult(existing, self.size, sha256, 0, uploaded=False)
+            # весь файл меньше одной части — один PUT, без multipart
+            await self.storage.put_object(
+                self.key, tail, self.content_type, **self.params
+            )
+        else:
+            if tail:
+                await self._send_part(tail)
+            await self._wait_pending()
+            await self.storage.complete_multipart_upload(
+                self.key, self._upload_id, self._etags
+            )
+        return UploadResult(
+            self.key, self.size, self._hash.hexdigest(), max(len(self._etags), 1)
+        )
+
+    async def abort(self) -> None:
+        """Отменяет незавершённую загрузку, чтобы части не копились в бакете."""
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        if self._upload_id is not None:
+            await self.storage.abort_multipart_upload(self.key, self._upload_id)
+            self._upload_id = None
+
+
+async def stream_to_s3(
+    chunks: AsyncIterator[bytes],
+    key: str,
+    content_type: str | None = None,
+    *,
+    storage: S3Storage = default_storage,
+    part_size: int = UPLOAD_PART_SIZE,
+    dedup: Dedup | None = None,
+    params: dict | None = None,
+) -> UploadResult:
+    """
+    Перекладывает поток чанков в объект key; при ошибке multipart отменяется.
+    dedup — см. StreamingUpload.finish; params — доп. параметры PutObject.
+    """
+    upload = StreamingUpload(
+        key, content_type, storage=storage, part_size=part_size, params=params
+    )
+    try:
+        async for chunk in chunks:
+            await upload.write(chunk)
+        return await upload.finish(dedup)
+    except BaseException:
+        try:
+            await upload.abort()
+        except Exception as e:
+            logger.warning("Не удалось отменить multipart-загрузку %s: %s", key, e)
+        raise
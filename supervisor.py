@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+Мультипроцессный запуск бота.
+
+Супервизор стартует BOT_WORKERS процессов `main.py` в режиме BOT_MODE=worker
+(у каждого свой event loop и свой пул async_session_maker) и раскладывает
+апдейты по воркерам по хэшу from_user.id. Сам супервизор только принимает
+апдейты (polling или webhook), пересылает их и собирает health/metrics.
+"""
+
+import os
+import sys
+import asyncio
+import secrets
+import signal
+
+import aiohttp
+import structlog
+from aiohttp import web
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    generate_latest,
+    CONTENT_TYPE_LATEST,
+)
+from prometheus_client.metrics_core import Metric
+from prometheus_client.parser import text_string_to_metric_families
+
+from core.logging_setup import setup_logging
+from config import (
+    BOT_TOKEN,
+    BOT_MODE,
+    BOT_WORKERS,
+    WORKER_BASE_PORT,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+)
+from metrics.registry import registry
+
+setup_logging()
+logger = structlog.get_logger(__name__)
+
+# Все роутеры бота слушают только эти типы апдейтов
+ALLOWED_UPDATES = ["message", "callback_query"]
+TELEGRAM_API = "https://api.telegram.org/bot{token}/{method}"
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+FORWARDED = Counter(
+    "supervisor_forwarded_total",
+    "Updates forwarded to a worker",
+    ["shard"],
+    registry=registry,
+)
+FORWARD_ERRORS = Counter(
+    "supervisor_forward_errors_total",
+    "Updates dropped after failed forwarding",
+    ["shard"],
+    registry=registry,
+)
+WORKER_RESTARTS = Counter(
+    "supervisor_worker_restarts_total",
+    "Worker processes restarted after exit",
+    ["shard"],
+    registry=registry,
+)
+SHARD_QUEUE = Gauge(
+    "supervisor_shard_queue_depth",
+    "Updates waiting to be forwarded to a worker",
+    ["shard"],
+    registry=registry,
+)
+
+
+def update_tg_id(update: dict) -> int | None:
+    """Достаёт from.id (или chat.id) из сырого апдейта Telegram."""
+    for key, event in update.items():
+        if key == "update_id" or not isinstance(event, dict):
+            continue
+        user = event.get("from") or {}
+        if "id" in user:
+            return user["id"]
+        chat = event.get("chat") or (event.get("message") or {}).get("chat") or {}
+        if "id" in chat:
+            return chat["id"]
+    return None
+
+
+def shard_for_update(update: dict, shards: int) -> int:
+    """Номер воркера для апдейта: один пользователь всегда попадает в один шард."""
+    tg_id = update_tg_id(update)
+    if tg_id is None:
+        return 0
+    return abs(tg_id) % shards
+
+
+class _StaticCollector:
+    """Отдаёт заранее собранные семейства метрик (для generate_latest)."""
+
+    def __init__(self, families: list[Metric]):
+        self._families = families
+
+    def collect(self):
+        return self._families
+
+
+class Supervisor:
+    def __init__(self, workers: int, base_port: int):
+        self.workers = workers
+        self.base_port = base_port
+        # внутренний секрет между супервизором и воркерами
+        self.worker_secret = secrets.token_urlsafe(32)
+        self.queues = [asyncio.Queue(maxsize=10_000) for _ in range(workers)]
+        self.procs: list[asyncio.subprocess.Process | None] = [None] * workers
+        self.http: aiohttp.ClientSession | None = None
+        self.stopping = False
+
+    def worker_url(self, shard: int, path: str) -> str:
+        return f"http://127.0.0.1:{self.base_port + shard}{path}"
+
+    # --- процессы ---
+    async def _spawn(self, shard: int) -> asyncio.subprocess.Process:
+        env = {
+            **os.environ,
+            "BOT_MODE": "worker",
+            "PORT": str(self.base_port + shard),
+            "SHARD_INDEX": str(shard),
+            "WEBHOOK_SECRET": self.worker_secret,
+        }
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, MAIN_SCRIPT, env=env
+        )
+        logger.info("worker started", shard=shard, pid=proc.pid)
+        return proc
+
+    async def keep_alive(self, shard: int):
+        """Держит воркер запущенным: перезапускает, если процесс упал."""
+        while not self.stopping:
+            proc = self.procs[shard] = await self._spawn(shard)
+            code = await proc.wait()
+            if self.stopping:
+                return
+            WORKER_RESTARTS.labels(shard=str(shard)).inc()
+            logger.warning("worker exited, restarting", shard=shard, code=code)
+            await asyncio.sleep(1)
+
+    async def stop_workers(self):
+        self.stopping = True
+        for proc in self.procs:
+            if proc and proc.returncode is None:
+                proc.terminate()
+        await asyncio.gather(
+            *(p.wait() for p in self.procs if p and p.returncode is None),
+            return_exceptions=True,
+        )
+
+    # --- маршрутизация ---
+    def route(self, update: dict):
+        shard = shard_for_update(update, self.workers)
+        queue = self.queues[shard]
+        if queue.full():
+            FORWARD_ERRORS.labels(shard=str(shard)).inc()
+            logger.warning("shard queue full, update dropped", shard=shard)
+            return
+        queue.put_nowait(update)
+        SHARD_QUEUE.labels(shard=str(shard)).set(queue.qsize())
+
+    async def forwarder(self, shard: int):
+        """
+        По одному форвардеру на шард: апдейты уходят в воркер строго по порядку.
+        Воркер отвечает 200 сразу (handle_in_background), поэтому это быстро.
+        """
+        url = self.worker_url(shard, WEBHOOK_PATH)
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.worker_secret}
+        queue = self.queues[shard]
+        while True:
+            update = await queue.get()
+            SHARD_QUEUE.labels(shard=str(shard)).set(queue.qsize())
+            for attempt in range(5):
+                try:
+                    async with self.http.post(url, json=update, headers=headers) as r:
+                        if r.status == 200:
+                            FORWARDED.labels(shard=str(shard)).inc()
+                            break
+                        logger.warning(
+                            "worker rejected update", shard=shard, status=r.status
+                        )
+                except aiohttp.ClientError as e:
+                    logger.warning("worker unreachable", shard=shard, error=str(e))
+                # воркер мог перезапускаться — ждём и пробуем снова
+                await asyncio.sleep(0.5 * (attempt + 1))
+            else:
+                FORWARD_ERRORS.labels(shard=str(shard)).inc()
+                logger.error(
+                    "update dropped", shard=shard, update_id=update.get("update_id")
+                )
+
+    # --- приём апдейтов ---
+    async def poll(self):
+        """Long polling без разбора апдейтов: супервизору нужен только from.id."""
+        offset = None
+        await self._telegram("deleteWebhook", drop_pending_updates=False)
+        while True:
+            try:
+                updates = await self._telegram(
+                    "getUpdates",
+                    offset=offset,
+                    timeout=30,
+                    allowed_updates=ALLOWED_UPDATES,
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("getUpdates failed", error=str(e))
+                await asyncio.sleep(1)
+                continue
+            for update in updates or []:
+                self.route(update)
+                offset = update["update_id"] + 1
+
+    async def _telegram(self, method: str, **params):
+        url = TELEGRAM_API.format(token=BOT_TOKEN, method=method)
+        payload = {k: v for k, v in params.items() if v is not None}
+        async with self.http.post(
+            url, json=payload, timeout=aiohttp.ClientTimeout(total=40)
+        ) as r:
+            data = await r.json()
+        if not data.get("ok"):
+            raise aiohttp.ClientError(f"{method}: {data.get('description')}")
+        return data.get("result")
+
+    async def handle_webhook(self, request: web.Request):
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not WEBHOOK_SECRET or not secrets.compare_digest(token, WEBHOOK_SECRET):
+            return web.Response(body="Unauthorized", status=401)
+        self.route(await request.json())
+        return web.json_response({})
+
+    # --- health / metrics ---
+    async def handle_health(self, request: web.Request):
+        async def check(shard: int) -> bool:
+            try:
+                async with self.http.get(
+                    self.worker_url(shard, "/healthz"),
+                    timeout=aiohttp.ClientTimeout(total=2),
+                ) as r:
+                    return r.status == 200
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return False
+
+        results = await asyncio.gather(*(check(i) for i in range(self.workers)))
+        lines = [f"shard {i}: {'OK' if ok else 'DOWN'}" for i, ok in enumerate(results)]
+        return web.Response(text="\n".join(lines), status=200 if all(results) else 503)
+
+    async def handle_metrics(self, request: web.Request):
+        """Метрики всех воркеров с меткой shard + метрики самого супервизора."""
+
+        async def fetch(shard: int) -> str:
+            try:
+                async with self.http.get(
+                    self.worker_url(shard, "/metrics"),
+                    timeout=aiohttp.ClientTimeout(total=5),
+                ) as r:
+                    return await r.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return ""
+
+        texts = await asyncio.gather(*(fetch(i) for i in range(self.workers)))
+        merged: dict[str, Metric] = {}
+        for shard, text in enumerate(texts):
+            for family in text_string_to_metric_families(text):
+                target = merged.get(family.name)
+                if target is None:
+                    target = merged[family.name] = Metric(
+                        family.name, family.documentation, family.type, family.unit
+                    )
+                target.samples.extend(
+                    s._replace(labels={**s.labels, "shard": str(shard)})
+                    for s in family.samples
+                )
+
+        workers_registry = CollectorRegistry()
+        workers_registry.register(_StaticCollector(list(merged.values())))
+        body = generate_latest(registry) + generate_latest(workers_registry)
+        return web.Response(body=body, content_type=CONTENT_TYPE_LATEST.split(";")[0])
+
+    async def start_server(self):
+        app = web.Application()
+        app.router.add_get("/healthz", self.handle_health)
+        app.router.add_get("/metrics", self.handle_metrics)
+        if BOT_MODE == "webhook":
+            app.router.add_post(WEBHOOK_PATH, self.handle_webhook)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+        port = int(os.getenv("PORT", 8080))
+        await web.TCPSite(runner, "0.0.0.0", port).start()
+        logger.info("🩺 Supervisor health/metrics запущены", port=port)
+
+    async def run(self):
+        self.http = aiohttp.ClientSession()
+        try:
+            for shard in range(self.workers):
+                asyncio.create_task(self.keep_alive(shard))
+                asyncio.create_task(self.forwarder(shard))
+            await self.start_server()
+
+            if BOT_MODE == "webhook":
+                if not WEBHOOK_BASE_URL or not WEBHOOK_SECRET:
+                    raise RuntimeError(
+                        "BOT_MODE=webhook требует WEBHOOK_BASE_URL и WEBHOOK_SECRET."
+                    )
+                await self._telegram(
+                    "setWebhook",
+                    url=WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH,
+                    secret_token=WEBHOOK_SECRET,
+                    allowed_updates=ALLOWED_UPDATES,
+                )
+                await asyncio.Event().wait()
+            else:
+                await self.poll()
+        finally:
+            await self.stop_workers()
+            await self.http.close()
+
+
+async def main():
+    logger.info("[BOOT] Supervisor", workers=BOT_WORKERS, mode=BOT_MODE)
+    supervisor = Supervisor(BOT_WORKERS, WORKER_BASE_PORT)
+
+    loop = asyncio.get_running_loop()
+    runner = asyncio.current_task()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, runner.cancel)
+
+    try:
+        await supervisor.run()
+    except asyncio.CancelledError:
+        logger.info("🛑 Supervisor остановлен")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+import gzip
+import json
+from datetime import datetime, UTC
+from types import SimpleNamespace
+
+import pytest
+
+from services import archive
+
+
+class FakeStorage:
+    def __init__(self, objects: dict[str, bytes]):
+        self.objects = objects
+        self.puts = {}
+        self.reclassed = []
+
+    async def iter_object(self, key, chunk_size=4):
+        data = self.objects[key]
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size]  # noqa: E203
+
+    async def put_object(self, key, body, content_type=None, **extra):
+        self.puts[key] = (body, content_type, extra)
+
+    async def set_storage_class(self, key, storage_class):
+        self.reclassed.append((key, storage_class))
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_text_is_gzipped_next_to_original():
+    data = b"report line\n" * 500
+    storage = FakeStorage({"company_1/blobs/a.csv": data})
+
+    result = await archive.archive_blob(
+        7,
+        "company_1/blobs/a.csv",
+        "text/csv",
+        storage=storage,
+        storage_class="GLACIER_IR",
+    )
+
+    body, content_type, extra = storage.puts["company_1/blobs/a.csv.gz"]
+    assert gzip.decompress(body) == data and content_type == "text/csv"
+    assert extra == {"ContentEncoding": "gzip", "StorageClass": "GLACIER_IR"}
+    assert result.new_key == "company_1/blobs/a.csv.gz"
+    assert result.read == len(data) and result.written == len(body) < len(data)
+
+
+@pytest.mark.asyncio
+async def test_compressed_formats_only_change_storage_class():
+    storage = FakeStorage({})
+
+    result = await archive.archive_blob(
+        8,
+        "company_1/blobs/b.jpg",
+        "image/jpeg",
+        storage=storage,
+        storage_class="STANDARD_IA",
+    )
+
+    assert storage.reclassed == [("company_1/blobs/b.jpg", "STANDARD_IA")]
+    assert result.new_key == result.old_key and not storage.puts
+
+
+@pytest.mark.asyncio
+async def test_run_resumes_from_checkpoint(tmp_path, monkeypatch):
+    checkpoint = tmp_path / "archive.json"
+    cutoff = datetime(2026, 1, 1, tzinfo=UTC)
+    checkpoint.write_text(json.dumps({"cutoff": cutoff.isoformat(), "last_id": 2}))
+    rows = [
+        SimpleNamespace(id=i, s3_key=f"k{i}", mime_type="text/plain")
+        for i in range(1, 6)
+    ]
+    storage = FakeStorage({row.s3_key: b"x" * 10 for row in rows})
+    seen_cutoffs, applied = [], []
+
+    async def select_candidates(session, cutoff, after_id, limit):
+        seen_cutoffs.append(cutoff)
+        return [row for row in rows if row.id > after_id][:limit]
+
+    async def apply_batch(session, archived, storage_class):
+        # точка продолжения пишется только после записи пачки
+        applied.append(json.loads(checkpoint.read_text())["last_id"])
+        return len(archived)
+
+    monkeypatch.setattr(archive, "select_candidates", select_candidates)
+    monkeypatch.setattr(archive, "apply_batch", apply_batch)
+
+    stats = await archive.run_archive(
+        FakeSession, storage=storage, batch_size=2, checkpoint_path=str(checkpoint)
+    )
+
+    assert sorted(storage.puts) == ["k3.gz", "k4.gz", "k5.gz"]
+    assert applied == [2, 4] and stats.archived == 3
+    assert set(seen_cutoffs) == {cutoff}
+    assert not checkpoint.exists()
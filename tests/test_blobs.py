@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models import Blob, Company, StorageDeletion
+from services.blobs import (
+    acquire_blob_by_hash,
+    acquire_blob_by_unique_id,
+    register_blob,
+    release_blobs,
+    reserve_upload_key,
+    store_blob,
+)
+from config import PREVIEW_MAX_ATTEMPTS
+from services.previews import claim_missing_previews
+from services import purge
+from services.purge import drain_storage_deletions
+
+SHA = "a" * 64
+
+
+@pytest.fixture
+async def company_id(session):
+    await session.execute(
+        text("TRUNCATE TABLE blobs, storage_deletions RESTART IDENTITY CASCADE")
+    )
+    company = Company(name="blobs test")
+    session.add(company)
+    await session.commit()
+    return company.id
+
+
+async def _queued(session) -> list[str]:
+    result = await session.execute(
+        select(StorageDeletion.s3_key).order_by(StorageDeletion.id)
+    )
+    return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_unique_id_hit_skips_download(session, company_id):
+    blob = await register_blob(
+        session, company_id, SHA, "c/blobs/1.jpg", 10, "image/jpeg", "uniq-1"
+    )
+
+    def open_stream():
+        raise AssertionError("файл с известным file_unique_id не скачивается")
+
+    again = await store_blob(
+        session, company_id, open_stream, "c/blobs/2.jpg", "image/jpeg", "uniq-1"
+    )
+    third = await acquire_blob_by_unique_id(session, company_id, "uniq-1")
+
+    assert again is blob and third is blob
+    # в identity map — свежий счётчик, а не снимок первой загрузки
+    assert third.ref_count == 3
+
+
+@pytest.mark.asyncio
+async def test_hash_hit_takes_a_reference(session, company_id):
+    blob = await register_blob(session, company_id, SHA, "c/blobs/1.pdf", 10, "a/pdf")
+
+    hit = await acquire_blob_by_hash(session, company_id, SHA)
+    miss = await acquire_blob_by_hash(session, company_id, "b" * 64)
+
+    assert hit.id == blob.id and hit.ref_count == 2
+    assert miss is None
+
+
+@pytest.mark.asyncio
+async def test_conflict_after_upload_queues_duplicate_key(session, company_id):
+    first = await register_blob(session, company_id, SHA, "c/blobs/1.pdf", 10, "a/pdf")
+    second = await register_blob(session, company_id, SHA, "c/blobs/2.pdf", 10, "a/pdf")
+
+    assert second.id == first.id and second.s3_key == "c/blobs/1.pdf"
+    assert second.ref_count == 2
+    assert await _queued(session) == ["c/blobs/2.pdf"]
+
+
+@pytest.mark.asyncio
+async def test_last_reference_deletes_blob_and_queues_all_keys(session, company_id):
+    blob = await register_blob(
+        session, company_id, SHA, "c/blobs/1.png", 10, "image/png"
+    )
+    await acquire_blob_by_hash(session, company_id, SHA)
+    blob.preview_s3_key = "c/blobs/1.preview.jpg"
+    blob.thumbnail_s3_key = "c/blobs/1.thumb.jpg"
+    await session.flush()
+
+    # один id дважды — две ссылки одним вызовом
+    assert await release_blobs(session, [blob.id, blob.id, None]) == 1
+
+    assert await session.get(Blob, blob.id, populate_existing=True) is None
+    assert await _queued(session) == [
+        "c/blobs/1.png",
+        "c/blobs/1.preview.jpg",
+        "c/blobs/1.thumb.jpg",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_release_keeps_blob_with_remaining_references(session, company_id):
+    blob = await register_blob(
+        session, company_id, SHA, "c/blobs/1.png", 10, "image/png"
+    )
+    await acquire_blob_by_hash(session, company_id, SHA)
+
+    assert await release_blobs(session, [blob.id]) == 0
+    await session.refresh(blob)
+    assert blob.ref_count == 1 and await _queued(session) == []
+
+
+@pytest.mark.asyncio
+async def test_upload_reservation_survives_rollback_until_grace(
+    engine, session, company_id
+):
+    # резерв закоммичен отдельно: откат основной транзакции его не снимает
+    await reserve_upload_key("c/blobs/pending.jpg", async_sessionmaker(engine))
+    await session.rollback()
+
+    assert await _queued(session) == ["c/blobs/pending.jpg"]
+    # до истечения UPLOAD_PENDING_GRACE_SEC drain объект не трогает
+    assert await drain_storage_deletions(session, 10) == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_keys_do_not_block_the_queue(session, company_id, monkeypatch):
+    class DenyingStorage:
+        async def delete_objects(self, keys):
+            return [key for key in keys if key.startswith("denied/")]
+
+    monkeypatch.setattr(purge, "storage", DenyingStorage())
+    session.add_all(
+        StorageDeletion(s3_key=key)
+        for key in ("denied/1", "denied/2", "c/blobs/1", "c/blobs/2")
+    )
+    await session.flush()
+
+    # первая пачка целиком падает...
+    assert await drain_storage_deletions(session, 2) == 0
+    # ...но следующий запуск берёт свежие ключи, а не её же снова
+    assert await drain_storage_deletions(session, 2) == 2
+    assert await _queued(session) == ["denied/1", "denied/2"]
+
+
+@pytest.mark.asyncio
+async def test_preview_sweep_claims_only_stale_images(session, company_id):
+    def blob(n: int, mime_type: str = "image/jpeg", **values) -> Blob:
+        return Blob(
+            company_id=company_id,
+            sha256=f"{n:064d}",
+            s3_key=f"c/blobs/{n}",
+            size=10,
+            mime_type=mime_type,
+            **values,
+        )
+
+    session.add_all(
+        [
+            blob(1),
+            blob(2, "application/pdf"),
+            blob(3, preview_s3_key="c/blobs/3.preview.jpg"),
+            blob(4, archived_at=datetime.now(UTC)),
+            blob(5, preview_attempts=PREVIEW_MAX_ATTEMPTS),
+            blob(6),
+        ]
+    )
+    await session.flush()
+    # все, кроме 6, загружены давно — бот с ними уже не возится
+    await session.execute(
+        update(Blob)
+        .where(Blob.s3_key != "c/blobs/6")
+        .values(created_at=datetime.now(UTC) - timedelta(days=1))
+    )
+
+    for _ in range(PREVIEW_MAX_ATTEMPTS):
+        rows = await claim_missing_previews(session, 0, 10)
+        assert [row.s3_key for row in rows] == ["c/blobs/1"]
+    # попытки кончились — битая картинка выпадает из добора
+    assert await claim_missing_previews(session, 0, 10) == []
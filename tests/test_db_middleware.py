@@ -0,0 +1,109 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from metrics.registry import registry
+from middlewares.db_middleware import DbSessionMiddleware
+
+
+class FakeTransaction:
+    def __init__(self, is_active=True):
+        self.is_active = is_active
+
+
+class FakeSession:
+    def __init__(self):
+        self.info = {}
+        self.transaction = None
+        self.calls = []
+
+    def get_transaction(self):
+        return self.transaction
+
+    async def commit(self):
+        self.calls.append("commit")
+
+    async def rollback(self):
+        self.calls.append("rollback")
+        self.transaction = None
+
+
+def fake_pool(sessions=None):
+    @asynccontextmanager
+    async def _session():
+        session = FakeSession()
+        if sessions is not None:
+            sessions.append(session)
+        yield session
+
+    return _session
+
+
+def _count(status: str, session: str) -> float:
+    value = registry.get_sample_value(
+        "db_requests_total", {"status": status, "session": session}
+    )
+    return value or 0
+
+
+@pytest.mark.asyncio
+async def test_updates_are_labeled_by_session_usage():
+    middleware = DbSessionMiddleware(fake_pool())
+    unused_before = _count("ok", "unused")
+    used_before = _count("ok", "used")
+
+    async def static_handler(event, data):
+        return "help"
+
+    async def db_handler(event, data):
+        # так after_begin помечает сессию, взявшую соединение
+        data["session"].info["db_used"] = True
+        return "tasks"
+
+    assert await middleware(static_handler, object(), {}) == "help"
+    assert await middleware(db_handler, object(), {}) == "tasks"
+
+    assert _count("ok", "unused") == unused_before + 1
+    assert _count("ok", "used") == used_before + 1
+
+
+@pytest.mark.asyncio
+async def test_one_commit_per_update():
+    sessions = []
+    middleware = DbSessionMiddleware(fake_pool(sessions))
+
+    async def write_handler(event, data):
+        data["session"].transaction = FakeTransaction()
+        return "ok"
+
+    async def swallowed_flush_error(event, data):
+        # flush упал, хэндлер ответил пользователю сам — транзакция неактивна
+        data["session"].transaction = FakeTransaction(is_active=False)
+
+    async def failing_handler(event, data):
+        data["session"].transaction = FakeTransaction()
+        raise RuntimeError("boom")
+
+    async def static_handler(event, data):
+        return "help"
+
+    async def answered_error(event, data):
+        # хэндлер ответил «ошибка» и откатил сам — commit быть не должно
+        data["session"].transaction = FakeTransaction()
+        await data["session"].rollback()
+
+    await middleware(write_handler, object(), {})
+    await middleware(swallowed_flush_error, object(), {})
+    with pytest.raises(RuntimeError):
+        await middleware(failing_handler, object(), {})
+    await middleware(static_handler, object(), {})
+    await middleware(answered_error, object(), {})
+
+    # исключение откатывает закрытие сессии; без транзакции commit не нужен
+    assert [s.calls for s in sessions] == [
+        ["commit"],
+        ["rollback"],
+        [],
+        [],
+        ["rollback"],
+    ]
@@ -0,0 +1,63 @@
+import pytest
+from prometheus_client.openmetrics.exposition import generate_latest
+from sqlalchemy import create_engine, text
+
+from core.context import request_id
+from metrics.db_statements import observe_statements, track_statements
+from metrics.registry import registry
+from tests.utils import assert_max_queries
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def test_statements_are_counted_only_inside_block(sqlite_engine):
+    with sqlite_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with track_statements("outer") as outer:
+            conn.execute(text("SELECT 1"))
+            with track_statements("inner") as inner:
+                conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 3"))
+
+    assert inner.count == 1
+    assert outer.count == 2  # вложенный блок отдаёт запросы и родителю
+    assert outer.duration >= inner.duration > 0
+
+
+def test_repeated_statement_is_reported_as_n_plus_one(sqlite_engine):
+    with sqlite_engine.connect() as conn, track_statements("loop") as stats:
+        for i in range(6):
+            conn.execute(text("SELECT :i"), {"i": i})
+        conn.execute(text("SELECT 'once'"))
+
+    assert stats.repeated(threshold=5) == [("SELECT ?", 6)]
+    assert stats.repeated(threshold=7) == []
+
+
+def test_assert_max_queries_fails_over_budget(sqlite_engine):
+    with sqlite_engine.connect() as conn:
+        with assert_max_queries(2):
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+        with pytest.raises(AssertionError, match="не больше 1"):
+            with assert_max_queries(1):
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+
+
+def test_request_id_is_exposed_as_exemplar_in_openmetrics(sqlite_engine):
+    token = request_id.set("req-exemplar-1")
+    try:
+        with sqlite_engine.connect() as conn, track_statements("exemplar") as stats:
+            conn.execute(text("SELECT 1"))
+        observe_statements(stats)
+    finally:
+        request_id.reset(token)
+
+    assert 'request_id="req-exemplar-1"' in generate_latest(registry).decode()
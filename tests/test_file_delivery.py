@@ -0,0 +1,46 @@
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendDocument
+
+from handlers.files import send_by_file_id
+from models import File
+
+
+class FakeMessage:
+    def __init__(self, reject: bool = False):
+        self.sent = []
+        self.reject = reject
+
+    async def answer_document(self, document, caption=None):
+        if self.reject:
+            raise TelegramBadRequest(
+                SendDocument(chat_id=1, document=document), "wrong file identifier"
+            )
+        self.sent.append(("document", document))
+
+    async def answer_photo(self, photo, caption=None):
+        self.sent.append(("photo", photo))
+
+
+def _file(**kw):
+    return File(id=1, original_name="plan.pdf", s3_key="k", **kw)
+
+
+@pytest.mark.asyncio
+async def test_file_is_resent_by_file_id_with_its_type():
+    message = FakeMessage()
+
+    assert await send_by_file_id(
+        message, _file(tg_file_id="AgAD", tg_file_type="photo")
+    )
+    assert await send_by_file_id(
+        message, _file(tg_file_id="BQAD", tg_file_type="document")
+    )
+    assert message.sent == [("photo", "AgAD"), ("document", "BQAD")]
+
+
+@pytest.mark.asyncio
+async def test_missing_or_rejected_file_id_falls_back():
+    assert not await send_by_file_id(FakeMessage(), _file())
+    rejected = _file(tg_file_id="stale", tg_file_type="document")
+    assert not await send_by_file_id(FakeMessage(reject=True), rejected)
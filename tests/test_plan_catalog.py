@@ -0,0 +1,50 @@
+import pytest
+
+from models.plan import Plan
+from services.plans import (
+    PlanCatalog,
+    PlanFeatures,
+    PlanInfo,
+    SEED_FIELDS,
+    plans_checksum,
+)
+from services.seed import DEFAULT_PLANS
+
+
+def test_plan_features_typed_access():
+    features = PlanFeatures({"features": ["файлы"], "max_users": 10, "reports": False})
+    assert features.has("файлы")
+    assert not features.has("reports")
+    assert not features.has("unknown")
+    assert features.limit("max_users") == 10
+    assert features.limit("reports") is None
+    assert features.limit("unknown", default=5) == 5
+
+
+def test_seed_checksum_matches_loaded_rows():
+    rows = [Plan(id=i, **p) for i, p in enumerate(reversed(DEFAULT_PLANS), 1)]
+    loaded = plans_checksum({c: getattr(p, c) for c in SEED_FIELDS} for p in rows)
+    assert loaded == plans_checksum(DEFAULT_PLANS)
+
+    info = PlanInfo(rows[0])
+    assert info.code == DEFAULT_PLANS[-1]["code"]
+    assert not info.features.has("files")
+
+
+@pytest.mark.asyncio
+async def test_refresh_reloads_only_changed_catalog(session):
+    catalog = PlanCatalog()
+    plan = Plan(code="refresh-test", name="До", monthly_price=1, period_days=30)
+    session.add(plan)
+    await session.flush()
+    await catalog.load(session)
+
+    assert not await catalog.refresh(session)
+    assert catalog.version == 1
+
+    # тариф поправили в другом процессе — следующая сверка подхватывает
+    plan.name = "После"
+    await session.flush()
+    assert await catalog.refresh(session)
+    assert catalog.version == 2
+    assert catalog.by_code("refresh-test").name == "После"
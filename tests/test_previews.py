@@ -0,0 +1,153 @@
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+Image = pytest.importorskip("PIL.Image")
+
+from models import Blob, Company, File, StorageDeletion, Task  # noqa: E402
+from services import previews  # noqa: E402
+from services.previews import PREVIEW_SPECS, derived_key, wants_previews  # noqa: E402
+from utils.images import render_previews  # noqa: E402
+
+
+def _encode(image, fmt: str, **params) -> bytes:
+    out = io.BytesIO()
+    image.save(out, fmt, **params)
+    return out.getvalue()
+
+
+def test_previews_are_jpeg_within_bounds():
+    # прозрачный PNG: фон заливается белым, JPEG без альфа-канала
+    data = _encode(Image.new("RGBA", (3000, 1500), (255, 0, 0, 0)), "PNG")
+
+    rendered = render_previews(data, PREVIEW_SPECS)
+
+    assert list(rendered) == ["preview", "thumb"]
+    for (kind, max_side, _), body in zip(PREVIEW_SPECS, rendered.values()):
+        with Image.open(io.BytesIO(body)) as image:
+            assert image.format == "JPEG" and image.mode == "RGB"
+            assert max(image.size) == max_side
+            assert image.getpixel((0, 0)) == (255, 255, 255)
+
+
+def test_exif_orientation_is_applied():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # повернуть на 90° по часовой
+    data = _encode(Image.new("RGB", (800, 400)), "JPEG", exif=exif)
+
+    rendered = render_previews(data, (("thumb", 200, 75),))
+
+    with Image.open(io.BytesIO(rendered["thumb"])) as image:
+        assert image.size == (100, 200)
+
+
+def test_derived_keys_and_supported_types():
+    assert (
+        derived_key("company_1/blobs/abc.png", "thumb")
+        == "company_1/blobs/abc.thumb.jpg"
+    )
+    assert wants_previews("image/jpeg", 1024)
+    assert not wants_previews("image/heic", 1024)
+    assert not wants_previews("application/pdf", 1024)
+
+
+class FakeStorage:
+    def __init__(self, objects: dict[str, bytes]):
+        self.objects = objects
+
+    async def get_object(self, key):
+        return self.objects[key]
+
+    async def put_object(self, key, body, content_type=None):
+        self.objects[key] = body
+
+
+@pytest.fixture
+async def blob_with_files(session):
+    await session.execute(
+        text("TRUNCATE TABLE blobs, storage_deletions RESTART IDENTITY CASCADE")
+    )
+    company = Company(name="previews test")
+    session.add(company)
+    await session.flush()
+    task = Task(title="previews", company_id=company.id)
+    blob = Blob(
+        company_id=company.id,
+        sha256="b" * 64,
+        s3_key="c/blobs/photo.png",
+        size=100,
+        mime_type="image/png",
+    )
+    session.add_all([task, blob])
+    await session.flush()
+    for name in ("a.png", "b.png"):
+        session.add(
+            File(
+                task_id=task.id,
+                company_id=company.id,
+                blob_id=blob.id,
+                s3_key=blob.s3_key,
+                original_name=name,
+                size=blob.size,
+                mime_type=blob.mime_type,
+            )
+        )
+    await session.commit()
+    return blob
+
+
+@pytest.mark.asyncio
+async def test_build_previews_through_process_pool(
+    engine, session, blob_with_files, monkeypatch
+):
+    storage = FakeStorage(
+        {"c/blobs/photo.png": _encode(Image.new("RGB", (2000, 1000)), "PNG")}
+    )
+    monkeypatch.setattr(previews, "storage", storage)
+    try:
+        # настоящий пул (spawn): рендер идёт в отдельном процессе
+        await previews.build_previews(
+            blob_with_files.id, "c/blobs/photo.png", async_sessionmaker(engine)
+        )
+    finally:
+        previews.shutdown_previews()
+
+    keys = ("c/blobs/photo.preview.jpg", "c/blobs/photo.thumb.jpg")
+    assert all(key in storage.objects for key in keys)
+    await session.refresh(blob_with_files)
+    assert (blob_with_files.preview_s3_key, blob_with_files.thumbnail_s3_key) == keys
+    files = await session.execute(
+        select(File.preview_s3_key, File.thumbnail_s3_key).where(
+            File.blob_id == blob_with_files.id
+        )
+    )
+    assert files.all() == [keys, keys]
+
+
+@pytest.mark.asyncio
+async def test_previews_of_deleted_blob_are_queued_for_deletion(session):
+    await session.execute(
+        text("TRUNCATE TABLE blobs, storage_deletions RESTART IDENTITY CASCADE")
+    )
+    keys = {"preview": "c/blobs/gone.preview.jpg", "thumb": "c/blobs/gone.thumb.jpg"}
+
+    assert await previews._attach(session, 404, keys) == "orphaned"
+    queued = await session.execute(
+        select(StorageDeletion.s3_key).order_by(StorageDeletion.id)
+    )
+    assert queued.scalars().all() == list(keys.values())
+
+
+def test_main_is_importable_by_pool_workers():
+    # воркер пула (spawn) исполняет main.py как __mp_main__ — бот там не стартует
+    script = "import runpy; runpy.run_path('main.py', run_name='__mp_main__')"
+    env = {**os.environ, "BOT_TOKEN": os.getenv("BOT_TOKEN") or "1:test"}
+    result = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr.decode()[-2000:]
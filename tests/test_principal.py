@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from models import Subscription, Trial, User
+from services.principal import Principal, principal_query
+from utils.enums import SubscriptionStatus, UserRole
+
+UTC = timezone.utc
+
+
+def test_principal_status_without_queries():
+    now = datetime.now(UTC)
+    user = User(tg_id=1, role=UserRole.worker, company_id=10)
+    expired_trial = Trial(
+        company_id=10, is_active=True, expires_at=now - timedelta(days=1)
+    )
+    sub = Subscription(
+        company_id=10,
+        plan_id=1,
+        status=SubscriptionStatus.active.value,
+        starts_at=now,
+        expires_at=now + timedelta(days=30),
+    )
+
+    principal = Principal(user, trial=expired_trial, subscription=sub)
+    st = principal.subscription_status
+    assert st["available"] is True
+    assert st["trial"]["exists"] and not st["trial"]["is_active"]
+
+    no_company = Principal(User(tg_id=2, role=UserRole.worker, company_id=None))
+    assert not no_company.has_company
+
+
+def test_principal_query_is_single_statement_with_tenant():
+    sql = str(principal_query(1).compile(dialect=postgresql.dialect()))
+    assert sql.count("FROM users") == 1
+    assert "set_config" in sql
+    assert "LEFT OUTER JOIN subscriptions" in sql
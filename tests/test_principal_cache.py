@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from database import async_session_maker
+from models import Company, User
+from services.principal import (
+    get_principal,
+    invalidate_principal,
+    principal_cache,
+    _snapshot,
+)
+from utils.cache import TTLCache
+from utils.enums import UserRole
+
+
+def test_ttl_cache_lru_and_expiry(monkeypatch):
+    cache = TTLCache("test", maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" становится самым свежим
+    cache.set("c", 3)  # вытесняет "b"
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_ttl_cache_entry_ttl_is_capped():
+    cache = TTLCache("test", maxsize=10, ttl=10)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is None
+    cache.set("b", 2, ttl=1000)
+    assert cache._data["b"][0] <= time.monotonic() + 10
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_attaches_user_without_db():
+    user = User(id=7, tg_id=700, role=UserRole.foreman, company_id=3)
+    company = Company(id=3, name="Acme")
+    principal_cache.set(700, (_snapshot(user), _snapshot(company)))
+    try:
+        async with async_session_maker() as session:
+            principal = await get_principal(session, 700)
+
+            assert principal.user in session
+            assert principal.user.role == UserRole.foreman
+            assert principal.company.name == "Acme"
+            assert not principal.billing_loaded
+            assert not session.info.get("db_used")
+    finally:
+        invalidate_principal(700)
+    assert principal_cache.get(700) is None
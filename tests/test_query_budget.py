@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from handlers.tasks import my_tasks_cmd
+from models import Trial
+from services.companies import create_company
+from services.notify_jobs import enforce_expirations
+from services.projects import create_project
+from services.tasks import create_task
+from services.users import get_or_create_user
+from tests.utils import assert_max_queries, unique_tg_id
+
+UTC = timezone.utc
+
+
+class FakeMessage:
+    def __init__(self):
+        self.answers = []
+
+    async def answer(self, text, **kwargs):
+        self.answers.append(text)
+
+
+class FakeBot:
+    async def send_message(self, chat_id, text, **kwargs):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_my_tasks_query_count_does_not_grow_with_tasks(session):
+    user, _ = await get_or_create_user(session, unique_tg_id())
+    company = await create_company(session, "Budget Co", created_by=user.id)
+    for n in range(3):
+        project = await create_project(session, f"Budget project {n}", company.id)
+        for i in range(3):
+            await create_task(session, f"task {i}", "", project.id, company.id, user.id)
+    session.expunge_all()
+
+    message = FakeMessage()
+    # задачи + проекты одним запросом, без session.get на каждую задачу
+    with assert_max_queries(1, "my_tasks_cmd"):
+        await my_tasks_cmd(message, session, user)
+    assert "Budget project 2" in message.answers[0]
+
+
+@pytest.mark.asyncio
+async def test_enforce_expirations_loads_managers_in_one_query(session):
+    expired = datetime.now(UTC) - timedelta(minutes=1)
+    for n in range(6):
+        manager, _ = await get_or_create_user(session, unique_tg_id())
+        company = await create_company(session, f"Expired {n}", created_by=manager.id)
+        session.add(Trial(company_id=company.id, starts_at=expired, expires_at=expired))
+    await session.flush()
+
+    # триалы + менеджеры + подписки + менеджеры, сколько бы компаний ни истекло
+    with assert_max_queries(4, "enforce_expirations"):
+        await enforce_expirations(session, FakeBot())
+    await session.rollback()
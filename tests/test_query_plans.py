@@ -0,0 +1,31 @@
+from scripts.plan_audit import _explainable, seq_scans, service_calls, unaudited
+
+PLAN = {
+    "Node Type": "Nested Loop",
+    "Plans": [
+        {"Node Type": "Seq Scan", "Relation Name": "tasks"},
+        {
+            "Node Type": "Index Scan",
+            "Relation Name": "users",
+            "Plans": [{"Node Type": "Seq Scan", "Relation Name": "plans"}],
+        },
+    ],
+}
+
+
+def test_seq_scans_only_on_large_tables():
+    big = {"tasks": 200_000.0, "users": 20_000.0}
+    assert seq_scans(PLAN, big) == [("tasks", 200_000.0)]
+    assert seq_scans(PLAN, {}) == []
+
+
+def test_explainable_statements():
+    assert _explainable("SELECT 1")
+    assert _explainable("\n UPDATE tasks SET status = $1")
+    assert not _explainable("INSERT INTO tasks (title) VALUES ($1)")
+    assert not _explainable("SAVEPOINT sa_savepoint_1")
+
+
+def test_every_service_with_session_is_audited():
+    # новый сервис должен попасть в service_calls() или NOT_AUDITED с причиной
+    assert unaudited(service_calls()) == []
@@ -0,0 +1,28 @@
+import time
+
+from core.replica import ReplicaRouter
+
+
+class FakePool:
+    pass
+
+
+def test_reads_fall_back_to_primary_when_replica_lags():
+    pool = FakePool()
+    router = ReplicaRouter(engine=None, session_pool=pool, max_lag=5)
+
+    # отставание ещё не измерено — читаем из primary
+    assert router.read_pool() is None
+
+    router.lag, router.checked_at = 0.3, time.monotonic()
+    assert router.read_pool() is pool
+
+    router.lag = 12
+    assert router.read_pool() is None
+
+
+def test_router_without_replica_always_uses_primary():
+    router = ReplicaRouter(engine=None, session_pool=None)
+    router.lag, router.checked_at = 0, time.monotonic()
+    assert not router.enabled
+    assert router.read_pool() is None
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, UTC
+
+import boto3
+import pytest
+from botocore.client import Config
+from botocore.credentials import Credentials, RefreshableCredentials
+from botocore.stub import Stubber
+
+from metrics.registry import registry
+from storage.presign import LocalPresigner, bucket_base_url
+from storage.s3 import S3Storage
+
+
+@pytest.fixture
+def stubbed():
+    client = boto3.client(
+        "s3",
+        region_name="us-east-1",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        config=Config(signature_version="s3v4"),
+    )
+    storage = S3Storage(bucket="bucket", max_workers=2)
+    storage._client = client
+    with Stubber(client) as stubber:
+        yield storage, stubber
+    storage.close()
+
+
+def _observed(operation: str, status: str = "ok") -> float:
+    value = registry.get_sample_value(
+        "s3_operation_duration_seconds_count",
+        {"operation": operation, "status": status},
+    )
+    return value or 0
+
+
+@pytest.mark.asyncio
+async def test_head_object_returns_none_for_missing_key(stubbed):
+    storage, stubber = stubbed
+    before = _observed("head", "error")
+    stubber.add_client_error("head_object", service_error_code="404")
+
+    assert await storage.head_object("missing") is None
+    assert _observed("head", "error") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_delete_objects_reports_failed_keys(stubbed):
+    storage, stubber = stubbed
+    stubber.add_response(
+        "delete_objects",
+        {"Errors": [{"Key": "b", "Code": "AccessDenied"}]},
+        {
+            "Bucket": "bucket",
+            "Delete": {"Objects": [{"Key": "a"}, {"Key": "b"}], "Quiet": True},
+        },
+    )
+
+    assert await storage.delete_objects(["a", "b"]) == ["b"]
+
+
+def test_presign_signs_locally_and_caches():
+    presigner = LocalPresigner(
+        bucket_base_url("bucket", "us-east-1", "http://minio:9000"),
+        "us-east-1",
+        Credentials("test", "test"),
+        cache_size=10,
+        margin=300,
+    )
+
+    first = presigner.sign("get_object", "company_1/file name.pdf", 3600)
+    urls = presigner.sign_many("get_object", ["company_1/file name.pdf", "b"], 3600)
+
+    assert first.url.startswith("http://minio:9000/bucket/company_1/file%20name.pdf?")
+    assert "X-Amz-Expires=3600" in first.url and first.minutes_left == 59
+    assert urls["company_1/file name.pdf"] is first
+    assert presigner.sign("put_object", "b", 3600) is not urls["b"]
+    # ссылка короче запаса не кэшируется — каждый раз новая
+    assert presigner.sign("get_object", "c", 60) is not presigner.sign(
+        "get_object", "c", 60
+    )
+
+
+def test_presign_with_temporary_credentials_expires_with_them():
+    def temporary(margin: int) -> LocalPresigner:
+        credentials = RefreshableCredentials(
+            "test",
+            "test",
+            "token",
+            datetime.now(UTC) + timedelta(minutes=20),
+            refresh_using=lambda: pytest.fail("не должно обновляться"),
+            method="test",
+        )
+        return LocalPresigner(
+            bucket_base_url("bucket", "us-east-1", None),
+            "us-east-1",
+            credentials,
+            cache_size=10,
+            margin=margin,
+        )
+
+    presigner = temporary(margin=300)
+    first = presigner.sign("get_object", "a", 3600)
+    # ссылка не переживёт сессию ключей, в кэше — не дольше неё
+    assert first.minutes_left == 19
+    assert presigner.sign("get_object", "a", 3600) is first
+
+    # до конца сессии меньше запаса — не кэшируем
+    presigner = temporary(margin=1500)
+    assert presigner.sign("get_object", "a", 3600) is not presigner.sign(
+        "get_object", "a", 3600
+    )
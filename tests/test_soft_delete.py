@@ -0,0 +1,47 @@
+from datetime import datetime, UTC
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+import database  # noqa: F401 — регистрирует фильтр мягкого удаления
+from models import Project, Task
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Project.__table__.create(engine)
+    Task.__table__.create(engine)
+    with Session(engine) as session:
+        session.add_all(
+            [
+                Project(id=1, name="live", company_id=1),
+                Task(id=1, title="live", company_id=1, project_id=1),
+                Task(
+                    id=2,
+                    title="gone",
+                    company_id=1,
+                    project_id=1,
+                    deleted_at=datetime.now(UTC),
+                ),
+            ]
+        )
+        session.commit()
+        session.expunge_all()
+        yield session
+    engine.dispose()
+
+
+def test_soft_deleted_rows_are_hidden_by_default(session):
+    assert session.scalars(select(Task.id)).all() == [1]
+    assert [t.id for t in session.scalars(select(Task))] == [1]
+    assert session.get(Task, 2) is None
+    # ленивая связь тоже не видит удалённые задачи
+    assert [t.id for t in session.get(Project, 1).tasks] == [1]
+
+
+def test_include_deleted_opts_out(session):
+    stmt = select(Task.id).order_by(Task.id)
+    ids = session.scalars(stmt, execution_options={"include_deleted": True}).all()
+    assert ids == [1, 2]
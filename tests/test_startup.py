@@ -0,0 +1,17 @@
+from core.startup import process_uptime, record_startup_phase
+from database import alembic_heads
+from metrics.registry import registry
+
+
+def test_alembic_heads_are_read_without_db():
+    heads = alembic_heads()
+    assert len(heads) == 1
+
+
+def test_startup_phase_is_exported():
+    assert process_uptime() > 0
+    seconds = record_startup_phase("imports")
+    assert (
+        registry.get_sample_value("bot_startup_seconds", {"phase": "imports"})
+        == seconds
+    )
@@ -0,0 +1,92 @@
+import hashlib
+
+import pytest
+
+from storage.upload import stream_to_s3
+
+
+class FakeStorage:
+    def __init__(self, fail_on_part: int | None = None):
+        self.calls = []
+        self.parts = {}
+        self.fail_on_part = fail_on_part
+
+    async def put_object(self, key, body, content_type=None):
+        self.calls.append(("put", len(body)))
+
+    async def create_multipart_upload(self, key, content_type=None):
+        self.calls.append(("create",))
+        return "upload-1"
+
+    async def upload_part(self, key, upload_id, part_number, body):
+        if part_number == self.fail_on_part:
+            raise RuntimeError("S3 down")
+        self.parts[part_number] = len(body)
+        return f"etag-{part_number}"
+
+    async def complete_multipart_upload(self, key, upload_id, etags):
+        self.calls.append(("complete", etags))
+
+    async def abort_multipart_upload(self, key, upload_id):
+        self.calls.append(("abort",))
+
+
+async def chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]  # noqa: E203
+
+
+@pytest.mark.asyncio
+async def test_small_file_is_one_put():
+    storage = FakeStorage()
+    data = b"x" * 1000
+
+    result = await stream_to_s3(chunks(data, 64), "k", storage=storage, part_size=4096)
+
+    assert storage.calls == [("put", 1000)]
+    assert result.size == 1000
+    assert result.sha256 == hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_large_file_goes_in_fixed_size_parts():
+    storage = FakeStorage()
+    data = bytes(range(256)) * 40  # 10240 байт
+
+    result = await stream_to_s3(chunks(data, 300), "k", storage=storage, part_size=4096)
+
+    assert storage.parts == {1: 4096, 2: 4096, 3: 2048}
+    assert storage.calls[-1] == ("complete", ["etag-1", "etag-2", "etag-3"])
+    assert result.size == len(data) and result.parts == 3
+    assert result.sha256 == hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_failed_part_aborts_multipart_upload():
+    storage = FakeStorage(fail_on_part=2)
+
+    with pytest.raises(RuntimeError):
+        await stream_to_s3(
+            chunks(b"y" * 20000, 500), "k", storage=storage, part_size=4096
+        )
+
+    assert storage.calls[-1] == ("abort",)
+
+
+@pytest.mark.asyncio
+async def test_known_hash_skips_put_for_single_part_file():
+    storage = FakeStorage()
+    data = b"same drawing" * 10
+    seen = []
+
+    async def dedup(sha256):
+        seen.append(sha256)
+        return "company_1/blobs/existing.pdf"
+
+    result = await stream_to_s3(
+        chunks(data, 16), "k", storage=storage, part_size=4096, dedup=dedup
+    )
+
+    assert storage.calls == []
+    assert seen == [hashlib.sha256(data).hexdigest()]
+    assert result.key == "company_1/blobs/existing.pdf" and not result.uploaded
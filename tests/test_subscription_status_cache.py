@@ -0,0 +1,44 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from models import Subscription, Trial
+from services.subscriptions import (
+    build_subscription_status,
+    cache_subscription_status,
+    invalidate_subscription_status,
+    subscription_status_cache,
+)
+from utils.enums import SubscriptionStatus
+
+UTC = timezone.utc
+
+
+def _expires_in(company_id: int) -> float:
+    return subscription_status_cache._data[company_id][0] - time.monotonic()
+
+
+def test_entry_expires_with_active_trial():
+    now = datetime.now(UTC)
+    trial = Trial(company_id=1, is_active=True, expires_at=now + timedelta(seconds=5))
+    cache_subscription_status(1, build_subscription_status(trial, None))
+
+    assert subscription_status_cache.get(1)["available"] is True
+    assert _expires_in(1) <= 5
+    invalidate_subscription_status(1)
+    assert subscription_status_cache.get(1) is None
+
+
+def test_inactive_status_uses_configured_ttl():
+    now = datetime.now(UTC)
+    sub = Subscription(
+        company_id=2,
+        plan_id=1,
+        status=SubscriptionStatus.paused.value,
+        starts_at=now,
+        expires_at=now + timedelta(seconds=5),
+    )
+    cache_subscription_status(2, build_subscription_status(None, sub))
+
+    assert subscription_status_cache.get(2)["available"] is False
+    assert _expires_in(2) > 5
+    invalidate_subscription_status(2)
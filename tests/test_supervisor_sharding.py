@@ -0,0 +1,13 @@
+from supervisor import shard_for_update, update_tg_id
+
+
+def test_routes_by_from_user_id():
+    message = {"update_id": 1, "message": {"from": {"id": 42}, "chat": {"id": -100}}}
+    callback = {"update_id": 2, "callback_query": {"from": {"id": 42}, "data": "x"}}
+
+    assert update_tg_id(message) == 42
+    assert shard_for_update(message, 4) == shard_for_update(callback, 4) == 42 % 4
+
+
+def test_update_without_user_goes_to_first_shard():
+    assert shard_for_update({"update_id": 3, "poll": {"id": "abc"}}, 4) == 0
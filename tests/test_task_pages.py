@@ -0,0 +1,84 @@
+import pytest
+
+from handlers.tasks import parse_task_filters, parse_tasks_page_data
+from models import Task
+from services.companies import create_company
+from services.projects import create_project
+from services.tasks import TaskPage, create_task, get_my_tasks_page, set_task_status
+from services.users import get_or_create_user
+from tests.utils import unique_tg_id
+from utils.enums import TaskStatus
+from utils.keyboards import get_tasks_page_keyboard
+
+
+def test_parse_task_filters():
+    assert parse_task_filters(None) == (None, None)
+    assert parse_task_filters("12 IN_PROGRESS") == (TaskStatus.in_progress, 12)
+    with pytest.raises(ValueError):
+        parse_task_filters("done")
+
+
+def test_parse_tasks_page_data():
+    assert parse_tasks_page_data("my_tasks:n:-:12:todo:5") == (
+        "n",
+        None,
+        12,
+        (TaskStatus.todo, 5),
+    )
+    for stale in (
+        "my_tasks:n:-:-:todo",
+        "my_tasks:x:-:-:todo:5",
+        "my_tasks:p:-:-:old:5",
+    ):
+        with pytest.raises(ValueError):
+            parse_tasks_page_data(stale)
+
+
+def test_page_keyboard_cursor_fits_callback_limit():
+    tasks = [
+        Task(id=9_999_999_999, status=TaskStatus.in_progress),
+        Task(id=9_999_999_998, status=TaskStatus.in_progress),
+    ]
+    page = TaskPage(tasks, has_prev=True, has_next=True)
+    keyboard = get_tasks_page_keyboard(page, TaskStatus.in_progress, 9_999_999_999)
+
+    prev, nxt = keyboard.inline_keyboard[0]
+    assert (
+        prev.callback_data == "my_tasks:p:in_progress:9999999999:in_progress:9999999999"
+    )
+    assert nxt.callback_data.endswith(":in_progress:9999999998")
+    assert all(len(b.callback_data.encode()) <= 64 for b in (prev, nxt))
+    assert get_tasks_page_keyboard(TaskPage(tasks, False, False)) is None
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_walk_forward_and_back(session):
+    user, _ = await get_or_create_user(session, unique_tg_id())
+    company = await create_company(session, "Paging Co", created_by=user.id)
+    project = await create_project(session, "Paging project", company.id)
+    ids = []
+    for i in range(5):
+        task = await create_task(
+            session, f"task {i}", "", project.id, company.id, user.id
+        )
+        ids.append(task.id)
+    await set_task_status(session, ids[0], TaskStatus.ready, company.id)
+    await session.flush()
+
+    # порядок (status, id): todo по id, затем ready
+    expected = ids[1:] + ids[:1]
+    first = await get_my_tasks_page(session, user.id, limit=2)
+    assert [t.id for t in first.tasks] == expected[:2]
+    assert not first.has_prev and first.has_next
+
+    second = await get_my_tasks_page(session, user.id, after=first.last, limit=2)
+    third = await get_my_tasks_page(session, user.id, after=second.last, limit=2)
+    assert [t.id for t in second.tasks + third.tasks] == expected[2:]
+    assert not third.has_next
+
+    back = await get_my_tasks_page(session, user.id, before=third.first, limit=2)
+    assert [t.id for t in back.tasks] == expected[2:4]
+    assert back.has_prev and back.has_next
+
+    ready = await get_my_tasks_page(session, user.id, status=TaskStatus.ready)
+    assert [t.id for t in ready.tasks] == ids[:1]
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from core.update_executor import ChatPartitionedExecutor
+
+
+@pytest.mark.asyncio
+async def test_same_chat_is_ordered_other_chats_run_in_parallel():
+    executor = ChatPartitionedExecutor(max_workers=4, max_pending=100)
+    log: list[tuple[int, int]] = []
+
+    def job(chat_id: int, n: int, delay: float):
+        async def _run():
+            await asyncio.sleep(delay)
+            log.append((chat_id, n))
+            return n
+
+        return _run
+
+    # первый апдейт чата 1 медленный — чат 2 не должен его ждать
+    futures = [
+        executor.submit(1, job(1, 1, 0.05)),
+        executor.submit(1, job(1, 2, 0)),
+        executor.submit(2, job(2, 1, 0)),
+    ]
+    results = await asyncio.gather(*futures)
+
+    assert results == [1, 2, 1]
+    assert log[0] == (2, 1)
+    assert [n for chat, n in log if chat == 1] == [1, 2]
+    assert executor.pending == 0
+    assert executor.active_partitions == 0
+
+
+@pytest.mark.asyncio
+async def test_sheds_load_when_queue_is_full():
+    executor = ChatPartitionedExecutor(max_workers=1, max_pending=2)
+    gate = asyncio.Event()
+
+    async def blocked():
+        await gate.wait()
+
+    first = executor.submit(1, blocked)
+    second = executor.submit(2, blocked)
+    assert executor.submit(3, blocked) is None
+
+    gate.set()
+    await asyncio.gather(first, second)
+    assert executor.submit(3, blocked) is not None
+
+
+@pytest.mark.asyncio
+async def test_job_errors_are_returned_to_the_caller():
+    executor = ChatPartitionedExecutor(max_workers=2)
+
+    async def boom():
+        raise ValueError("boom")
+
+    async def ok():
+        return "ok"
+
+    failed = executor.submit(1, boom)
+    after = executor.submit(1, ok)
+
+    with pytest.raises(ValueError):
+        await failed
+    assert await after == "ok"
@@ -0,0 +1,50 @@
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+import handlers.file_upload as file_upload
+from models import User
+from services.pagination import IdPage, like_pattern
+
+
+def test_like_pattern_escapes_wildcards():
+    assert like_pattern("50%_off") == "%50\\%\\_off%"
+
+
+def test_picker_keyboard_has_navigation_and_reset():
+    page = IdPage([(3, "Alpha"), (4, "Beta")], has_prev=True, has_next=True)
+    keyboard = file_upload.picker_keyboard("project", page, "al")
+
+    rows = [[b.callback_data for b in row] for row in keyboard.inline_keyboard]
+    assert rows == [
+        ["upload_project:3"],
+        ["upload_project:4"],
+        ["upload_pick:project:p:3", "upload_pick:project:n:4"],
+        ["upload_pick:project:all:0"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_picker_pages_are_cached_in_fsm(monkeypatch):
+    calls = []
+
+    async def fake_projects_page(session, company_id, *, query, after, before, limit):
+        calls.append((query, after, before))
+        return IdPage([((after or 0) + 1, "p")], True, True)
+
+    monkeypatch.setattr(file_upload, "get_projects_page", fake_projects_page)
+    state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=2, user_id=2))
+    user = User(id=1, company_id=7)
+
+    first = await file_upload.load_picker_page(state, None, user, "project")
+    await file_upload.load_picker_page(state, None, user, "project", "n", 1)
+    again = await file_upload.load_picker_page(state, None, user, "project")
+    assert again.items == first.items
+    assert len(calls) == 2
+
+    # поиск — другой ключ кэша
+    await state.update_data(project_query="al")
+    await file_upload.load_picker_page(state, None, user, "project")
+    assert calls[-1] == ("al", None, None)
+    assert len(calls) == 3
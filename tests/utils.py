@@ -1,4 +1,7 @@
 import uuid
+from contextlib import contextmanager
+
+from metrics.db_statements import track_statements
 
 # Хранилище сгенерированных ID (только для текущего запуска тестов)
 _issued_tg_ids: set[int] = set()
@@ -11,3 +14,16 @@ def unique_tg_id() -> int:
         if tg_id not in _issued_tg_ids:
             _issued_tg_ids.add(tg_id)
             return tg_id
+
+
+@contextmanager
+def assert_max_queries(limit: int, handler: str = "test"):
+    """
+    Падает, если внутри блока выполнено больше limit SQL-запросов.
+    Ловит N+1: число запросов хэндлера не должно расти вместе с данными.
+    """
+    with track_statements(handler) as stats:
+        yield stats
+    assert (
+        stats.count <= limit
+    ), f"{handler}: ожидали не больше {limit} запросов\n{stats.report()}"
@@ -0,0 +1,75 @@
+# utils/cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from prometheus_client import Counter
+
+from metrics.registry import registry
+
+CACHE_HITS = Counter(
+    "cache_hits_total", "In-process cache hits", ["cache"], registry=registry
+)
+CACHE_MISSES = Counter(
+    "cache_misses_total", "In-process cache misses", ["cache"], registry=registry
+)
+CACHE_EVICTIONS = Counter(
+    "cache_evictions_total",
+    "In-process cache entries dropped before use",
+    ["cache", "reason"],  # reason: lru | expired | invalidated
+    registry=registry,
+)
+
+
+class TTLCache:
+    """
+    Ограниченный in-process кэш: TTL на запись + вытеснение LRU.
+
+    Не потокобезопасен — рассчитан на один event loop процесса.
+    При ttl <= 0 кэш выключен (get всегда промахивается, set ничего не хранит).
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            CACHE_MISSES.labels(cache=self.name).inc()
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            CACHE_EVICTIONS.labels(cache=self.name, reason="expired").inc()
+            CACHE_MISSES.labels(cache=self.name).inc()
+            return None
+
+        self._data.move_to_end(key)
+        CACHE_HITS.labels(cache=self.name).inc()
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """ttl — срок жизни этой записи (не больше общего ttl кэша)."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            CACHE_EVICTIONS.labels(cache=self.name, reason="lru").inc()
+
+    def invalidate(self, key: Hashable) -> None:
+        if self._data.pop(key, None) is not None:
+            CACHE_EVICTIONS.labels(cache=self.name, reason="invalidated").inc()
+
+    def clear(self) -> None:
+        self._data.clear()
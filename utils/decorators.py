@@ -41,6 +41,7 @@ def require_active_subscription():
             # aiogram v3: зависимости приходят напрямую в kwargs
             session = kwargs.get("session")
             user = kwargs.get("user")
+            principal = kwargs.get("principal")
 
             if not user or not getattr(user, "company_id", None):
                 if isinstance(event, Message):
@@ -51,7 +52,11 @@ def require_active_subscription():
                     )
                 return
 
-            st = await get_company_subscription_status(session, user.company_id)
+            # principal уже загружен middleware вместе с trial и подпиской
+            if principal is not None and principal.billing_loaded:
+                st = principal.subscription_status
+            else:
+                st = await get_company_subscription_status(session, user.company_id)
             if not st["available"]:
                 if isinstance(event, Message):
                     await event.answer("⛔ Нет активной подписки.")
@@ -15,6 +15,11 @@ def format_project_list(projects: list[Project]) -> str:
     return "Список проектов:\n" + "\n".join(formatted_list)
 
 
+def shorten(value: str, limit: int = 100) -> str:
+    """Обрезает длинную строку для вывода в сообщении."""
+    return value if len(value) <= limit else value[: limit - 1] + "…"
+
+
 def format_tasks_list(tasks: list[Task]) -> str:
     """
     Форматирует список задач в читаемый текст.
@@ -25,9 +30,11 @@ def format_tasks_list(tasks: list[Task]) -> str:
     text = "Список задач:\n"
     for task in tasks:
         # Проверяем, что объект project существует, чтобы избежать ошибок
-        project_name = task.project.name if task.project else "Неизвестный проект"
+        project_name = (
+            shorten(task.project.name) if task.project else "Неизвестный проект"
+        )
         text += f"\nЗадача ID: {task.id}\n"
-        text += f"  - Название: {task.title}\n"
+        text += f"  - Название: {shorten(task.title)}\n"
         text += f"  - Проект: {project_name}\n"
         text += f"  - Статус: {task.status}\n"
 
@@ -0,0 +1,46 @@
+import io
+
+from PIL import Image, ImageOps
+
+# Модуль исполняется в процессах пула services.previews (spawn): импортирует
+# только Pillow, без БД и бота, чтобы воркер стартовал быстро.
+
+# Больше пикселей — не декодируем (защита от «декомпрессионных бомб»)
+MAX_SOURCE_PIXELS = 64_000_000
+
+
+def render_previews(
+    data: bytes, specs: tuple[tuple[str, int, int], ...]
+) -> dict[str, bytes]:
+    """
+    Уменьшенные JPEG по specs — (вид, максимальная сторона, качество), от
+    большего к меньшему. Каждый следующий вид режется из предыдущего,
+    а не из оригинала. Ориентация из EXIF применяется, прозрачность — на белом.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width * image.height > MAX_SOURCE_PIXELS:
+            raise ValueError(f"image too large: {image.width}x{image.height}")
+        # JPEG декодируется сразу в уменьшенном масштабе (1/2 … 1/8)
+        largest = specs[0][1]
+        image.draft("RGB", (largest, largest))
+        current = ImageOps.exif_transpose(image)
+        current = _flatten(current)
+
+        rendered = {}
+        for kind, max_side, quality in specs:
+            current.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            current.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+            rendered[kind] = out.getvalue()
+        return rendered
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    if image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    ):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, "white")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return image.convert("RGB")
@@ -51,6 +51,32 @@ def get_tasks_keyboard(tasks):
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+def get_tasks_page_keyboard(page, status=None, project_id=None):
+    """
+    Кнопки «назад»/«вперёд» для /my_tasks (keyset по (status, id)).
+    callback_data: my_tasks:<p|n>:<фильтр status>:<фильтр project>:<status>:<id>
+    """
+    filters = f"{status.value if status else '-'}:{project_id or '-'}"
+    row = []
+    if page.has_prev:
+        key_status, key_id = page.first
+        row.append(
+            InlineKeyboardButton(
+                text="◀️ Назад",
+                callback_data=f"my_tasks:p:{filters}:{key_status.value}:{key_id}",
+            )
+        )
+    if page.has_next:
+        key_status, key_id = page.last
+        row.append(
+            InlineKeyboardButton(
+                text="Вперёд ▶️",
+                callback_data=f"my_tasks:n:{filters}:{key_status.value}:{key_id}",
+            )
+        )
+    return InlineKeyboardMarkup(inline_keyboard=[row]) if row else None
+
+
 def get_task_options_keyboard(task_id):
     buttons = [
         [
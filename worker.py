@@ -5,9 +5,16 @@ import os
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
+from config import (
+    PREVIEW_SWEEP_INTERVAL_MIN,
+    PURGE_BATCH_PAUSE_SEC,
+    PURGE_BATCH_SIZE,
+    PURGE_INTERVAL_MIN,
+)
 from database import init_db, async_session_maker
-from services import notify_jobs
+from services import notify_jobs, previews, purge
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
@@ -22,10 +29,54 @@ async def run_jobs():
     async with async_session_maker() as session:
         bot = Bot(BOT_TOKEN)
         await notify_jobs.run_all(session, bot)
+        # enforce_expirations только помечает строки; кэш статусов сбросится после commit
+        await session.commit()
         await bot.session.close()
     logger.info("✅ Все задачи выполнены")
 
 
+async def run_batches(batch, *args) -> int:
+    """
+    Гоняет batch(session, *args, limit) пачками: каждая — своя короткая транзакция,
+    между пачками пауза, чтобы не забивать БД и реплику. Стоп на неполной пачке.
+    """
+    total = 0
+    while True:
+        async with async_session_maker() as session:
+            done = await batch(session, *args, PURGE_BATCH_SIZE)
+            await session.commit()
+        total += done
+        if done < PURGE_BATCH_SIZE:
+            return total
+        await asyncio.sleep(PURGE_BATCH_PAUSE_SEC)
+
+
+async def run_purge():
+    """Физически удаляет мягко удалённые задачи/проекты и их объекты в S3."""
+    cutoff = purge.purge_cutoff()
+    try:
+        tasks = await run_batches(purge.purge_tasks_batch, cutoff)
+        projects = await run_batches(purge.purge_projects_batch, cutoff)
+        objects = await run_batches(purge.drain_storage_deletions)
+    except Exception:
+        logger.exception("purge failed")
+        return
+    logger.info(
+        "🧹 Purge: задач %s, проектов %s, объектов S3 %s", tasks, projects, objects
+    )
+
+
+async def run_preview_sweep():
+    """Доделывает превью картинок, оставшиеся без них после загрузки."""
+    try:
+        done = await previews.backfill_previews(async_session_maker)
+    except Exception:
+        logger.exception("preview sweep failed")
+        return
+    if done:
+        logger.info("🖼 Превью: добрано для %s blob", done)
+
+
 async def main():
     logger.info("🚀 Worker started")
     await init_db()
@@ -34,6 +85,16 @@ async def main():
 
     # Запускаем каждый день в 09:00 UTC
     scheduler.add_job(run_jobs, CronTrigger(hour=9, minute=0))
+    # purge мягко удалённого — небольшими пачками, регулярно
+    scheduler.add_job(
+        run_purge, IntervalTrigger(minutes=PURGE_INTERVAL_MIN), max_instances=1
+    )
+    # превью, которые бот не успел сделать (фоновая задача умерла вместе с ним)
+    scheduler.add_job(
+        run_preview_sweep,
+        IntervalTrigger(minutes=PREVIEW_SWEEP_INTERVAL_MIN),
+        max_instances=1,
+    )
 
     # Дополнительно первый запуск сразу при старте контейнера
     asyncio.create_task(run_jobs())